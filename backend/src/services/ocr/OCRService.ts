@@ -8,6 +8,7 @@
 import { OCRProvider, InferenceEngine, OCRServiceConfig, ProcessedReceipt, FieldInference } from './types';
 import { EasyOCRProvider } from './providers/EasyOCRProvider';
 import { TesseractProvider } from './providers/TesseractProvider';
+import { CascadeProvider } from './providers/CascadeProvider';
 import { RuleBasedInferenceEngine } from './inference/RuleBasedInferenceEngine';
 import { createLLMProvider } from './inference/LLMProvider';
 
@@ -186,6 +187,9 @@ export class OCRService {
           languages: ['en'],
           useGPU: false
         });
+      case 'cascade':
+        // Tesseract first, EasyOCR only for receipts Tesseract reads poorly
+        return new CascadeProvider();
       default:
         console.warn(`[OCRService] Unknown provider: ${name}, defaulting to Tesseract`);
         return new TesseractProvider();
@@ -13,108 +13,181 @@ Key advantages over Tesseract/PaddleOCR:
 
 Usage:
     python3 easyocr_processor.py <image_path> [--lang en] [--gpu false]
+    python3 easyocr_processor.py - [--lang en] < receipt.jpg
+    python3 easyocr_processor.py <image_path> --tiling on
+    python3 easyocr_processor.py --serve [--lang en] [--gpu false]
+    python3 easyocr_processor.py --health
+
+Server mode (--serve):
+    Loads the EasyOCR Reader once and then answers newline-delimited JSON
+    requests on stdin, one JSON response line per request on stdout:
+        request:  {"id": 1, "image_path": "/path/receipt.jpg", "preprocess": true}
+        response: {"id": 1, "success": true, "text": "...", ...}
+    Instead of "image_path", a request can carry the encoded image in shared
+    memory ("image_shm" + "image_size") or inline ("image_base64"); see
+    ocr_input.py.
+    A {"command": "ping"} request is answered with {"pong": true}, and
+    {"command": "shutdown"} (or EOF on stdin) stops the worker.
+
+Tiling (--tiling auto|on|off, default auto):
+    Long thermal rolls (height >= 3x width in auto mode) are not shrunk to
+    fit the detector canvas. They are cut into equal, overlapping horizontal
+    strips at native resolution (width capped at 1600px), detected and
+    recognized strip by strip in batches, and merged: each strip keeps only
+    the lines centred in its share of the overlaps, then any remaining
+    duplicates are dropped. Cost grows with the receipt's length instead of
+    with the square of the canvas.
+
+Quality gate (--quality-gate enforce|warn|off, or "quality_gate" per request):
+    Black, blank or badly blurred captures are flagged right after decoding
+    (default warn); with enforce they are rejected before preprocessing and
+    the neural models run (see ocr_quality.py).
+
+Results are cached on disk by content hash (see ocr_cache.py); a cache hit
+returns before EasyOCR, PyTorch or OpenCV are imported. Pass --no-cache
+(or set OCR_CACHE=off) to always recompute.
 """
 
+from __future__ import annotations
+
 import sys
 import os
 import json
+import time
 import argparse
 import warnings
-from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # Set EasyOCR cache directory explicitly BEFORE importing easyocr
 os.environ['EASYOCR_MODULE_PATH'] = os.environ.get('EASYOCR_MODULE_PATH', '/var/lib/expenseapp/.EasyOCR')
 os.environ['HOME'] = os.environ.get('HOME', '/var/lib/expenseapp')
 
-# Disable PyTorch CPU optimizations that require AVX2 (for older CPUs like Sandy Bridge)
-# These settings prevent SIGILL (Illegal Instruction) errors on older hardware
-os.environ['MKL_THREADING_LAYER'] = 'GNU'
-os.environ['MKL_SERVICE_FORCE_INTEL'] = '0'
-os.environ['OMP_NUM_THREADS'] = '1'
-os.environ['PYTORCH_NNPACK_DISABLE'] = '1'
+# Thread budget for PyTorch/OpenCV/BLAS, plus the settings that prevent SIGILL
+# (Illegal Instruction) on CPUs without AVX2 such as Sandy Bridge; must be
+# exported BEFORE importing torch (see ocr_threads.py)
+import ocr_threads
+ocr_threads.configure_environment()
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
 
-try:
-    import easyocr
-    import cv2
-    import numpy as np
-except ImportError as e:
-    print(json.dumps({
-        "success": False,
-        "error": f"Missing dependency: {str(e)}",
-        "text": "",
-        "confidence": 0.0,
-        "provider": "easyocr"
-    }))
-    sys.exit(1)
+from ocr_cache import OCRResultCache
+from ocr_timing import StageTimer
+import ocr_health
+import ocr_input
+import ocr_output
+import ocr_preprocessing
+import ocr_quality
+
+# Where EasyOCR keeps the CRAFT detector and recognizer weights
+MODEL_STORAGE_DIR = '/tmp/easyocr_models'
+
+# Heavy dependencies are imported by load_dependencies() on first real OCR
+# work, so cache hits and argument errors never pay the PyTorch import.
+easyocr = None
+cv2 = None
+np = None
+
+
+def load_dependencies() -> None:
+    """Import EasyOCR/OpenCV/NumPy once; exits with a JSON error if missing"""
+    global easyocr, cv2, np
+    if easyocr is not None:
+        return
+    
+    try:
+        import easyocr
+        import cv2
+        import numpy as np
+    except ImportError as e:
+        print(json.dumps({
+            "success": False,
+            "error": f"Missing dependency: {str(e)}",
+            "text": "",
+            "confidence": 0.0,
+            "provider": "easyocr"
+        }))
+        sys.exit(1)
+    
+    ocr_threads.apply_runtime(torch=sys.modules.get('torch'), cv2=cv2)
 
 
 class ReceiptPreprocessor:
     """Image preprocessing for optimal OCR accuracy"""
     
     @staticmethod
-    def preprocess(image_path: str) -> np.ndarray:
+    def preprocess(image_path: ocr_input.ImageSource, timer: Optional[StageTimer] = None) -> np.ndarray:
         """
         Apply preprocessing steps to enhance OCR accuracy:
         - Resize if too large (memory optimization)
         - Convert to grayscale
         - Denoise with bilateral filter
         - Adaptive threshold for text enhancement
-        - Deskew if rotated
+        
+        The steps are the shared "easyocr" preprocessing profile (see
+        ocr_preprocessing.py); EasyOCR handles rotation well, so it skips deskew.
         
         Args:
-            image_path: Path to receipt image
+            image_path: Path to receipt image, or its encoded bytes
+            timer: Optional StageTimer that records each step
             
         Returns:
-            Preprocessed image as numpy array
+            Preprocessed image as numpy array (a pipeline buffer, valid until
+            the next preprocess() call in this thread)
         """
-        # Read image
-        img = cv2.imread(image_path)
-        if img is None:
-            raise ValueError(f"Failed to load image: {image_path}")
-        
-        # Resize if too large (max 2000px on longest side)
-        height, width = img.shape[:2]
-        max_dim = 2000
-        if max(height, width) > max_dim:
-            scale = max_dim / max(height, width)
-            new_width = int(width * scale)
-            new_height = int(height * scale)
-            img = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
-        
-        # Convert to grayscale
-        if len(img.shape) == 3:
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = img
-        
-        # Denoise (preserve edges)
-        denoised = cv2.bilateralFilter(gray, 9, 75, 75)
-        
-        # Adaptive threshold for text enhancement
-        # This works better than global threshold for receipts with uneven lighting
-        enhanced = cv2.adaptiveThreshold(
-            denoised,
-            255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY,
-            11,
-            2
-        )
-        
-        # Optional: Deskew (detect and correct rotation)
-        # For now, EasyOCR handles rotation well, so we skip this
-        # Can add deskewing if needed for specific receipt types
+        load_dependencies()
+        pipeline = ocr_preprocessing.get_pipeline("easyocr")
+        return ReceiptPreprocessor.apply(pipeline.load(image_path, timer), timer)
+    
+    @staticmethod
+    def apply(image: np.ndarray, timer: Optional[StageTimer] = None,
+              native_resolution: bool = False) -> np.ndarray:
+        """
+        Run the "easyocr" profile over an already decoded image
         
-        return enhanced
+        Args:
+            native_resolution: Keep the height of tall receipts (tiling
+                mode); only the width is capped
+        """
+        params = None
+        if native_resolution:
+            params = {"resize": {"max_dim": 0, "max_width": EasyOCRProcessor.TILE_MAX_WIDTH}}
+        return ocr_preprocessing.get_pipeline("easyocr").run(image, timer, params=params)
+
+
+def _box_overlap(a: List[List[float]], b: List[List[float]]) -> float:
+    """Intersection of two quads' bounding rectangles over the smaller one's area"""
+    ax, ay = [p[0] for p in a], [p[1] for p in a]
+    bx, by = [p[0] for p in b], [p[1] for p in b]
+    width = min(max(ax), max(bx)) - max(min(ax), min(bx))
+    height = min(max(ay), max(by)) - max(min(ay), min(by))
+    if width <= 0 or height <= 0:
+        return 0.0
+    smaller = min((max(ax) - min(ax)) * (max(ay) - min(ay)), (max(bx) - min(bx)) * (max(by) - min(by)))
+    return width * height / smaller if smaller > 0 else 0.0
 
 
 class EasyOCRProcessor:
     """EasyOCR-based receipt text extraction"""
     
+    # readtext() settings shared by whole-image and tiled recognition
+    READTEXT_OPTIONS = {
+        "detail": 1,  # Return bounding boxes and confidence
+        "paragraph": False,  # Return line by line
+        "min_size": 10,  # Minimum text box size
+        "text_threshold": 0.7,  # Confidence threshold for text detection
+        "low_text": 0.4,  # Lower bound for text detection
+        "link_threshold": 0.4,  # Threshold for linking text boxes
+    }
+    
+    # Tiling: aspect ratio (height / width) that triggers it in auto mode,
+    # strip height, overlap (a few text lines), width cap and strips per batch
+    TILE_MIN_ASPECT = 3.0
+    TILE_HEIGHT = 1280
+    TILE_OVERLAP = 192
+    TILE_MAX_WIDTH = 1600
+    TILE_BATCH_SIZE = 4
+    
     def __init__(self, languages: List[str] = ['en'], gpu: bool = False):
         """
         Initialize EasyOCR reader
@@ -123,108 +196,445 @@ class EasyOCRProcessor:
             languages: List of language codes (e.g., ['en', 'es'])
             gpu: Whether to use GPU acceleration (requires CUDA)
         """
-        print(f"[EasyOCR] Initializing with languages: {languages}, GPU: {gpu}", file=sys.stderr)
+        load_dependencies()
+        self.languages = languages
+        
+        ocr_output.log(f"[EasyOCR] Initializing with languages: {languages}, GPU: {gpu}")
         
         # Initialize reader (downloads models on first run)
         self.reader = easyocr.Reader(
             languages,
             gpu=gpu,
-            model_storage_directory='/tmp/easyocr_models',  # Cache models
+            model_storage_directory=MODEL_STORAGE_DIR,  # Cache models
             download_enabled=True,
             verbose=False
         )
         
-        print("[EasyOCR] Reader initialized successfully", file=sys.stderr)
+        ocr_output.log("[EasyOCR] Reader initialized successfully")
+    
+    def should_tile(self, image: np.ndarray, tiling: str = 'auto') -> bool:
+        """Tile when forced on, or in auto mode for receipts much taller than wide"""
+        if tiling == 'on':
+            return True
+        if tiling == 'off':
+            return False
+        height, width = image.shape[:2]
+        return height >= self.TILE_MIN_ASPECT * width and height > self.TILE_HEIGHT
+    
+    @staticmethod
+    def tile_offsets(height: int, tile_height: int, overlap: int) -> List[int]:
+        """
+        Top rows of equal-height strips covering ``height``
+        
+        The last strip is aligned with the bottom edge (overlapping its
+        neighbour by more than ``overlap``), so every strip has the same
+        shape and they can be detected as one batch.
+        """
+        if height <= tile_height:
+            return [0]
+        step = tile_height - overlap
+        return list(range(0, height - tile_height, step)) + [height - tile_height]
+    
+    def read_tiled(self, image: np.ndarray, timer: StageTimer) -> Tuple[List, Dict]:
+        """
+        Detect and recognize overlapping horizontal strips, then merge them
+        
+        Strips are as wide as the image, so the width is capped here too
+        (not only by preprocessing, which the caller may skip): EasyOCR's
+        detector canvas grows with it.
+        
+        Returns:
+            (readtext-style results in page coordinates, tiling metadata)
+        """
+        height, width = image.shape[:2]
+        scale = 1.0
+        if width > self.TILE_MAX_WIDTH:
+            scale = self.TILE_MAX_WIDTH / width
+            with timer.stage("tile_resize"):
+                image = cv2.resize(image, (self.TILE_MAX_WIDTH, max(1, round(height * scale))),
+                                   interpolation=cv2.INTER_AREA)
+            height, width = image.shape[:2]
+        tile_height = min(height, self.TILE_HEIGHT)
+        offsets = self.tile_offsets(height, tile_height, self.TILE_OVERLAP)
+        tiles = [image[offset:offset + tile_height] for offset in offsets]
+        
+        # Native resolution: the canvas is exactly one strip, no magnification
+        options = dict(self.READTEXT_OPTIONS, canvas_size=max(tile_height, width), mag_ratio=1.0)
+        
+        tile_results = []
+        with timer.stage("recognition", image):
+            batched = getattr(self.reader, 'readtext_batched', None)
+            for start in range(0, len(tiles), self.TILE_BATCH_SIZE):
+                batch = tiles[start:start + self.TILE_BATCH_SIZE]
+                if batched is not None:
+                    tile_results.extend(batched(batch, n_width=width, n_height=tile_height, **options))
+                else:
+                    tile_results.extend(self.reader.readtext(tile, **options) for tile in batch)
+        
+        with timer.stage("tile_merge"):
+            results, duplicates = self.merge_tiles(tile_results, offsets, tile_height)
+            if scale != 1.0:
+                results = [([[x / scale, y / scale] for x, y in bbox], text, confidence)
+                           for bbox, text, confidence in results]
+        
+        ocr_output.log(f"[EasyOCR] Tiled {width}x{height} into {len(tiles)} strips, "
+                       f"{len(results)} lines after merge", 'debug')
+        return results, {
+            "tiles": len(tiles),
+            "tile_height": tile_height,
+            "overlap": self.TILE_OVERLAP,
+            "scale": round(scale, 4),
+            "duplicates_removed": duplicates
+        }
+    
+    @staticmethod
+    def merge_tiles(tile_results: List[List], offsets: List[int], tile_height: int) -> Tuple[List, int]:
+        """
+        Shift strip detections to page coordinates and drop overlap duplicates
+        
+        Each strip owns the rows between the midpoints of its overlaps with
+        its neighbours and keeps only the lines centred there. The owned
+        bands are disjoint and ascending, so the kept lines stay in reading
+        order. A line whose centre falls near a band edge can still come
+        from both strips; of two lines that mostly cover each other, the
+        more confident one is kept.
+        
+        Returns:
+            (merged results, number of duplicates removed)
+        """
+        merged = []
+        duplicates = 0
+        for index, (offset, results) in enumerate(zip(offsets, tile_results)):
+            band_top = (offsets[index - 1] + tile_height + offset) / 2 if index > 0 else float('-inf')
+            band_bottom = (offset + tile_height + offsets[index + 1]) / 2 if index + 1 < len(offsets) else float('inf')
+            
+            for bbox, text, confidence in results:
+                bbox = [[float(x), float(y) + offset] for x, y in bbox]
+                ys = [y for _, y in bbox]
+                center = (min(ys) + max(ys)) / 2
+                if not band_top <= center < band_bottom:
+                    duplicates += 1  # Inside an overlap: the neighbouring strip owns it
+                    continue
+                merged.append((bbox, text, confidence, index))
+        
+        # Safety net for lines owned by two strips (centres on either side of an edge)
+        kept = []
+        for candidate in merged:
+            clash = next((i for i, line in enumerate(kept)
+                          if line[3] != candidate[3] and _box_overlap(line[0], candidate[0]) > 0.5), None)
+            if clash is None:
+                kept.append(candidate)
+                continue
+            duplicates += 1
+            if candidate[2] > kept[clash][2]:
+                kept[clash] = candidate
+        
+        return [(bbox, text, confidence) for bbox, text, confidence, _ in kept], duplicates
     
-    def extract_text(self, image_path: str, preprocess: bool = True) -> Dict:
+    def recognize_boxes(self, image: np.ndarray,
+                        boxes: List[List[int]]) -> List[Optional[Tuple[str, float]]]:
+        """
+        Read known text-line regions without running the detector
+        
+        Args:
+            image: Image the boxes refer to (BGR or grayscale)
+            boxes: Line regions as [x_min, x_max, y_min, y_max], inside the image
+            
+        Returns:
+            (text, confidence) per box in input order; None where EasyOCR
+            returned nothing (e.g. a box too thin to resize)
+        """
+        if not boxes:
+            return []
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        results = self.reader.recognize(
+            gray,
+            horizontal_list=[list(map(int, box)) for box in boxes],
+            free_list=[],
+            batch_size=len(boxes),
+            detail=1,
+            paragraph=False
+        )
+        
+        # Results may come back in a different order; the returned corners
+        # are the (already clipped) input box corners
+        by_corner = {(int(bbox[0][0]), int(bbox[0][1])): (text.strip(), float(confidence))
+                     for bbox, text, confidence in results}
+        return [by_corner.get((int(box[0]), int(box[2]))) for box in boxes]
+    
+    def extract_text(self, image_path: ocr_input.ImageSource, preprocess: bool = True,
+                     profile: bool = False, trace_memory: bool = False,
+                     tiling: str = 'auto', quality_gate: Optional[str] = None) -> Dict:
         """
         Extract text from receipt image using EasyOCR
         
         Args:
-            image_path: Path to receipt image
+            image_path: Path to receipt image, or its encoded bytes
             preprocess: Whether to apply preprocessing
+            profile: Add cProfile top functions to metadata.timings
+            trace_memory: Add per-step tracemalloc peaks to metadata.timings
+            tiling: 'auto' (tall receipts only), 'on' or 'off'
+            quality_gate: Quality gate mode (default: $OCR_QUALITY_GATE or warn)
             
         Returns:
-            Dictionary with extracted text, confidence, and metadata
+            Dictionary with extracted text, confidence, and metadata; a
+            rejected image returns success=false with the verdict in "quality"
         """
+        timer = StageTimer(profile=profile, trace_memory=trace_memory)
         try:
-            # Preprocess image if requested
-            if preprocess:
-                image = ReceiptPreprocessor.preprocess(image_path)
-            else:
-                image = cv2.imread(image_path)
+            with timer.stage("load") as record:
+                image = ocr_preprocessing.decode_image(image_path)
+                record["output"] = image
             
-            # Run EasyOCR
-            # Returns list of ([bbox], text, confidence)
-            results = self.reader.readtext(
-                image,
-                detail=1,  # Return bounding boxes and confidence
-                paragraph=False,  # Return line by line
-                min_size=10,  # Minimum text box size
-                text_threshold=0.7,  # Confidence threshold for text detection
-                low_text=0.4,  # Lower bound for text detection
-                link_threshold=0.4,  # Threshold for linking text boxes
-                canvas_size=2560,  # Canvas size for detection
-                mag_ratio=1.5  # Magnification ratio
-            )
+            # Reject unreadable captures before the models run
+            with timer.stage("quality_gate", image):
+                quality = ocr_quality.check(image, quality_gate)
             
-            # Parse results
-            text_lines = []
-            confidences = []
+            result = self.recognize_image(image, timer, preprocess=preprocess, tiling=tiling)
+            result["metadata"]["quality"] = quality
+            result["metadata"]["timings"] = timer.report()
+            return result
             
-            for bbox, text, confidence in results:
-                if text.strip():  # Skip empty detections
-                    text_lines.append(text.strip())
-                    confidences.append(confidence)
-            
-            # Combine all text
-            full_text = '\n'.join(text_lines)
-            
-            # Calculate average confidence
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
-            
-            # Build structured response
+        except ocr_quality.QualityRejected as e:
+            ocr_output.log(f"[EasyOCR] {e}", 'warning')
             return {
-                "success": True,
-                "text": full_text,
-                "confidence": round(avg_confidence, 4),
+                "success": False,
+                "error": str(e),
+                "text": "",
+                "confidence": 0.0,
                 "provider": "easyocr",
-                "line_count": len(text_lines),
-                "lines": [
-                    {
-                        "text": text,
-                        "confidence": round(conf, 4)
-                    }
-                    for text, conf in zip(text_lines, confidences)
-                ],
-                "metadata": {
-                    "preprocessed": preprocess,
-                    "detection_count": len(results)
-                }
+                "quality": e.verdict,
+                "metadata": {"timings": timer.report()}
             }
-            
         except Exception as e:
             return {
+                "success": False,
+                "error": str(e),
+                "text": "",
+                "confidence": 0.0,
+                "provider": "easyocr",
+                "metadata": {"timings": timer.report()}
+            }
+    
+    def recognize_image(self, image: np.ndarray, timer: StageTimer, preprocess: bool = True,
+                        tiling: str = 'auto') -> Dict:
+        """
+        Preprocess (optionally) and read an already decoded image
+        
+        Used by extract_text() and by the engine cascade, which hands over
+        the image it decoded once for every tier. The image is not modified.
+        Raises on recognition errors; metadata.timings is left to the caller.
+        """
+        tiled = self.should_tile(image, tiling)
+        
+        # Preprocess image if requested
+        if preprocess:
+            image = ReceiptPreprocessor.apply(image, timer, native_resolution=tiled)
+        
+        # Run EasyOCR
+        # Returns list of ([bbox], text, confidence)
+        tiling_info = None
+        if tiled:
+            results, tiling_info = self.read_tiled(image, timer)
+        else:
+            results = timer.run(
+                "recognition",
+                self.reader.readtext,
+                image,
+                canvas_size=2560,  # Canvas size for detection
+                mag_ratio=1.5,  # Magnification ratio
+                **self.READTEXT_OPTIONS
+            )
+        
+        # Parse results
+        text_lines = []
+        confidences = []
+        
+        for bbox, text, confidence in results:
+            if text.strip():  # Skip empty detections
+                text_lines.append(text.strip())
+                confidences.append(confidence)
+        
+        # Combine all text
+        full_text = '\n'.join(text_lines)
+        
+        # Calculate average confidence
+        avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        
+        # Build structured response
+        return {
+            "success": True,
+            "text": full_text,
+            "confidence": round(avg_confidence, 4),
+            "provider": "easyocr",
+            "line_count": len(text_lines),
+            "lines": [
+                {
+                    "text": text,
+                    "confidence": round(conf, 4)
+                }
+                for text, conf in zip(text_lines, confidences)
+            ],
+            "metadata": {
+                "preprocessed": preprocess,
+                "detection_count": len(results),
+                "tiling": tiling_info,
+                "threads": ocr_threads.describe()
+            }
+        }
+
+
+def health_report() -> Dict:
+    """Versions and model presence, without importing EasyOCR/PyTorch/OpenCV"""
+    started = time.perf_counter()
+    return ocr_health.build_report(
+        "easyocr",
+        ["easyocr", "torch", "cv2", "numpy"],
+        models={"easyocr": ocr_health.directory_info(MODEL_STORAGE_DIR, '*.pth')},
+        started=started
+    )
+
+
+def cache_key(cache: OCRResultCache, image_path: ocr_input.ImageSource, languages: List[str], preprocess: bool,
+              tiling: str = 'auto', quality_gate: Optional[str] = None) -> str:
+    """Cache key for an EasyOCR image request"""
+    options = {"preprocess": preprocess, "tiling": tiling,
+               "quality_gate": ocr_quality.gate_mode(quality_gate)}
+    if preprocess:
+        options["preprocess_steps"] = ocr_preprocessing.profile_steps("easyocr")
+    return cache.make_key(image_path, 'easyocr', languages, options,
+                          code_path=(__file__, ocr_preprocessing.__file__, ocr_quality.__file__))
+
+
+def extract_text_cached(processor: EasyOCRProcessor, cache: OCRResultCache,
+                        image_path: ocr_input.ImageSource, preprocess: bool,
+                        tiling: str = 'auto', quality_gate: Optional[str] = None) -> Dict:
+    """Run processor.extract_text() through the result cache"""
+    key = cache_key(cache, image_path, processor.languages, preprocess, tiling, quality_gate)
+    result = cache.get(key)
+    if result is not None:
+        return cache.annotate(result, hit=True)
+    
+    result = processor.extract_text(image_path, preprocess=preprocess, tiling=tiling,
+                                    quality_gate=quality_gate)
+    if result.get('success'):
+        cache.put(key, result)
+    return cache.annotate(result, hit=False)
+
+
+def emit(payload: Dict) -> None:
+    """Write a single JSON line to stdout and flush it (server mode framing)"""
+    ocr_output.emit(payload)
+
+
+def serve(processor: EasyOCRProcessor, default_preprocess: bool = True,
+          cache: Optional[OCRResultCache] = None, default_tiling: str = 'auto',
+          default_quality_gate: Optional[str] = None) -> None:
+    """
+    Long-lived worker loop: newline-delimited JSON requests on stdin
+    
+    The Reader held by ``processor`` is reused for every request, so model
+    load is paid once per worker instead of once per receipt.
+    
+    Args:
+        processor: Initialized EasyOCR processor
+        default_preprocess: Preprocessing flag used when a request omits it
+        default_tiling: Tiling mode used when a request omits "tiling"
+        default_quality_gate: Gate mode used when a request omits "quality_gate"
+        cache: Optional result cache consulted before running OCR
+    """
+    emit({"ready": True, "provider": "easyocr", "pid": os.getpid()})
+    ocr_output.log("[EasyOCR] Worker ready, waiting for requests on stdin")
+    
+    for raw_line in sys.stdin:
+        raw_line = raw_line.strip()
+        if not raw_line:
+            continue
+        
+        try:
+            request = json.loads(raw_line)
+            if not isinstance(request, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            emit({
+                "id": None,
+                "success": False,
+                "error": f"Invalid request: {str(e)}",
+                "text": "",
+                "confidence": 0.0,
+                "provider": "easyocr"
+            })
+            continue
+        
+        request_id = request.get('id')
+        command = request.get('command', 'ocr')
+        
+        if command == 'shutdown':
+            break
+        if command == 'ping':
+            emit({"id": request_id, "pong": True})
+            continue
+        
+        preprocess = bool(request.get('preprocess', default_preprocess))
+        tiling = request.get('tiling', default_tiling)
+        quality_gate = request.get('quality_gate', default_quality_gate)
+        try:
+            with ocr_input.request_source(request) as source:
+                if not ocr_input.source_exists(source):
+                    raise FileNotFoundError(f"Image not found: {ocr_input.describe(source)}")
+                if cache is not None:
+                    result = extract_text_cached(processor, cache, source, preprocess, tiling, quality_gate)
+                else:
+                    result = processor.extract_text(source, preprocess=preprocess, tiling=tiling,
+                                                    quality_gate=quality_gate)
+        except Exception as e:
+            # Missing file or segment, bad base64, unknown gate mode, malformed
+            # options: fail this request, never the worker other callers share
+            result = {
                 "success": False,
                 "error": str(e),
                 "text": "",
                 "confidence": 0.0,
                 "provider": "easyocr"
             }
+        result["id"] = request_id
+        emit(result)
+    
+    ocr_output.log("[EasyOCR] Worker shutting down")
 
 
 def main():
     """Main entry point for command-line usage"""
     parser = argparse.ArgumentParser(description='EasyOCR Receipt Processor')
-    parser.add_argument('image_path', help='Path to receipt image')
+    parser.add_argument('image_path', nargs='?', help='Path to receipt image ("-" reads the image bytes from stdin)')
     parser.add_argument('--lang', default='en', help='Language code (default: en)')
     parser.add_argument('--gpu', default='false', help='Use GPU (default: false)')
     parser.add_argument('--preprocess', default='true', help='Apply preprocessing (default: true)')
+    parser.add_argument('--tiling', choices=('auto', 'on', 'off'), default='auto',
+                        help='Detect tall receipts in overlapping native-resolution strips (default: auto)')
+    parser.add_argument('--quality-gate', choices=ocr_quality.GATE_MODES, default=None,
+                        help='Reject, only report, or skip unreadable captures (default: $OCR_QUALITY_GATE or warn)')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run as a long-lived worker reading JSON requests from stdin')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the on-disk result cache')
+    parser.add_argument('--profile', action='store_true', help='Add cProfile top functions to metadata.timings')
+    parser.add_argument('--trace-memory', action='store_true', help='Add per-step tracemalloc peaks to metadata.timings')
+    parser.add_argument('--health', action='store_true',
+                        help='Report package versions and model presence without loading EasyOCR')
+    ocr_output.add_arguments(parser)
     
     args = parser.parse_args()
+    ocr_output.configure(args.output, args.log_level)
+    
+    if args.health:
+        ocr_health.print_report(health_report())
+    
+    if not args.serve and not args.image_path:
+        parser.error('image_path is required unless --serve is given')
     
     # Validate image exists
-    if not Path(args.image_path).exists():
+    source = None if args.serve else ocr_input.cli_source(args.image_path)
+    if not args.serve and not ocr_input.source_exists(source):
         print(json.dumps({
             "success": False,
             "error": f"Image not found: {args.image_path}",
@@ -238,16 +648,37 @@ def main():
     languages = [lang.strip() for lang in args.lang.split(',')]
     use_gpu = args.gpu.lower() in ('true', '1', 'yes')
     do_preprocess = args.preprocess.lower() in ('true', '1', 'yes')
+    # Profiling runs want fresh measurements, never a cached result
+    profiling = args.profile or args.trace_memory
+    cache = OCRResultCache(enabled=False if args.no_cache or profiling else None)
+    
+    # Cache hit: answer without loading EasyOCR/PyTorch at all
+    if not args.serve:
+        key = cache_key(cache, source, languages, do_preprocess, args.tiling, args.quality_gate)
+        cached = cache.get(key)
+        if cached is not None:
+            ocr_output.print_result(cache.annotate(cached, hit=True))
+            sys.exit(0)
     
     # Initialize processor
     try:
         processor = EasyOCRProcessor(languages=languages, gpu=use_gpu)
         
+        if args.serve:
+            serve(processor, default_preprocess=do_preprocess, cache=cache, default_tiling=args.tiling,
+                  default_quality_gate=args.quality_gate)
+            sys.exit(0)
+        
         # Extract text
-        result = processor.extract_text(args.image_path, preprocess=do_preprocess)
+        result = processor.extract_text(source, preprocess=do_preprocess,
+                                        profile=args.profile, trace_memory=args.trace_memory,
+                                        tiling=args.tiling, quality_gate=args.quality_gate)
+        if result.get('success'):
+            cache.put(key, result)
+        cache.annotate(result, hit=False)
         
         # Output JSON result
-        print(json.dumps(result, indent=2))
+        ocr_output.print_result(result)
         
         # Exit with appropriate code
         sys.exit(0 if result.get('success', False) else 1)
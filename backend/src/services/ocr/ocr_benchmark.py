@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+OCR Benchmark Harness
+
+Runs each OCR provider and each preprocessing step over a corpus of sample
+receipts (and synthetic PDFs built from them) and records, per stage:
+- wall time and CPU time (including tesseract/poppler child processes)
+- peak RSS (per stage on Linux, process-lifetime peak elsewhere)
+- OCR confidence where the stage produces one
+
+Results are written as JSON (full rows + per-stage summary + environment)
+and optionally CSV, so runs from different commits can be compared with
+--compare.
+
+Providers whose Python packages are not installed are reported as skipped.
+
+Usage:
+    python3 ocr_benchmark.py <corpus_dir> [--providers tesseract,easyocr,paddleocr,pdf]
+                             [--repeat 3] [--output results.json] [--csv results.csv]
+                             [--synthetic-pdf-pages 1,3] [--compare previous.json]
+                             [--threads 1,2,4]
+
+--threads sweeps the thread budget (see ocr_threads.py): the benchmark is
+rerun in a fresh process per count, since OpenMP pools are sized at import,
+and rows/summary entries are tagged with the count ("stage@2t").
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Benchmarks measure the processors, never the result cache
+os.environ['OCR_CACHE'] = 'off'
+
+import ocr_threads
+
+# Size the thread pools before NumPy/OpenCV/PyTorch are imported
+ocr_threads.configure_environment()
+
+import ocr_health
+import ocr_preprocessing
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff', '.bmp', '.webp')
+ALL_PROVIDERS = ('tesseract', 'easyocr', 'paddleocr', 'pdf')
+
+# Python packages each provider needs before it can be benchmarked
+PROVIDER_MODULES = {
+    'tesseract': ['cv2', 'numpy', 'PIL', 'pytesseract'],
+    'easyocr': ['cv2', 'numpy', 'easyocr'],
+    'paddleocr': ['cv2', 'numpy', 'paddleocr'],
+    'pdf': ['cv2', 'numpy', 'PIL', 'easyocr', 'pdf2image'],
+}
+
+
+class StageMeter:
+    """
+    Wall/CPU/peak-RSS measurement around one stage
+
+    On Linux the RSS high-water mark is reset before each stage
+    (/proc/self/clear_refs), so peak_rss_mb is per stage. Elsewhere it falls
+    back to ru_maxrss, which is the process-lifetime peak.
+    """
+
+    PER_STAGE_RSS = os.path.exists('/proc/self/clear_refs')
+
+    @staticmethod
+    def _cpu_seconds() -> float:
+        usage_self = resource.getrusage(resource.RUSAGE_SELF)
+        usage_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return (usage_self.ru_utime + usage_self.ru_stime +
+                usage_children.ru_utime + usage_children.ru_stime)
+
+    @classmethod
+    def _reset_peak_rss(cls) -> None:
+        if cls.PER_STAGE_RSS:
+            try:
+                with open('/proc/self/clear_refs', 'w') as handle:
+                    handle.write('5')
+            except OSError:
+                cls.PER_STAGE_RSS = False
+
+    @classmethod
+    def _peak_rss_mb(cls) -> float:
+        if cls.PER_STAGE_RSS:
+            with open('/proc/self/status') as handle:
+                for line in handle:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) / 1024
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+    def measure(self, fn: Callable[[], object]) -> Tuple[object, Dict]:
+        """
+        Run ``fn`` and return (result, measurements)
+
+        A raised exception or a returned {"error": ...} dict (how the
+        recognizers report failure) is recorded as the stage's error.
+        """
+        self._reset_peak_rss()
+        cpu_start = self._cpu_seconds()
+        wall_start = time.perf_counter()
+        error = None
+        result = None
+        try:
+            result = fn()
+        except Exception as e:
+            error = str(e)
+        wall = time.perf_counter() - wall_start
+        cpu = self._cpu_seconds() - cpu_start
+        if isinstance(result, dict) and result.get('error'):
+            error = str(result['error'])
+
+        return result, {
+            "wall_ms": round(wall * 1000, 2),
+            "cpu_ms": round(cpu * 1000, 2),
+            "peak_rss_mb": round(self._peak_rss_mb(), 1),
+            "error": error
+        }
+
+
+def extract_confidence(result: object) -> Optional[float]:
+    """Confidence from a provider result dict (or (image, metadata) tuple), if any"""
+    if isinstance(result, dict) and isinstance(result.get('confidence'), (int, float)):
+        return round(float(result['confidence']), 4)
+    return None
+
+
+def environment_info() -> Dict:
+    """Host, CPU features and versions, so runs are comparable across machines/commits"""
+    cpu_model = None
+    cpu_flags = []
+    try:
+        with open('/proc/cpuinfo') as handle:
+            for line in handle:
+                if line.startswith('model name') and not cpu_model:
+                    cpu_model = line.split(':', 1)[1].strip()
+                elif line.startswith('flags'):
+                    flags = line.split(':', 1)[1].split()
+                    cpu_flags = [flag for flag in ('sse4_2', 'avx', 'avx2', 'avx512f', 'fma') if flag in flags]
+                    break
+    except OSError:
+        pass
+    cpu_model = cpu_model or platform.processor()
+
+    commit = None
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+    return {
+        "commit": commit,
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "hostname": platform.node(),
+        "python": platform.python_version(),
+        "cpu_model": cpu_model,
+        "cpu_count": os.cpu_count(),
+        "cpu_flags": cpu_flags,
+        "threads": ocr_threads.describe(),
+        "per_stage_rss": StageMeter.PER_STAGE_RSS,
+        "packages": {
+            name: ocr_health.package_info(name)["version"]
+            for name in ('cv2', 'numpy', 'torch', 'easyocr', 'pytesseract', 'paddleocr', 'pdf2image')
+        }
+    }
+
+
+def find_samples(corpus_dir: str) -> Tuple[List[str], List[str]]:
+    """Image and PDF files in the corpus directory (recursive, sorted)"""
+    images, pdfs = [], []
+    for path in sorted(Path(corpus_dir).rglob('*')):
+        suffix = path.suffix.lower()
+        if suffix in IMAGE_EXTENSIONS:
+            images.append(str(path))
+        elif suffix == '.pdf':
+            pdfs.append(str(path))
+    return images, pdfs
+
+
+def build_synthetic_pdfs(images: List[str], page_counts: List[int], output_dir: str) -> List[str]:
+    """
+    Raster PDFs with 1..N pages made from corpus images (cycled), so the PDF
+    path is benchmarked even when the corpus has no PDFs
+    """
+    if not images or not page_counts:
+        return []
+
+    from PIL import Image
+
+    pdfs = []
+    for pages in page_counts:
+        frames = [Image.open(images[i % len(images)]).convert('RGB') for i in range(pages)]
+        pdf_path = os.path.join(output_dir, f"synthetic_{pages}p.pdf")
+        frames[0].save(pdf_path, save_all=True, append_images=frames[1:], resolution=300.0)
+        for frame in frames:
+            frame.close()
+        pdfs.append(pdf_path)
+    return pdfs
+
+
+def tesseract_stages(image_path: str) -> List[Tuple[str, Callable[[], object]]]:
+    """Each AdvancedImagePreprocessor step, in pipeline order, then recognition"""
+    import tesseract_processor as tp
+
+    preprocessor = tp.AdvancedImagePreprocessor()
+    # Full-resolution Hough deskew, measured on the same input for comparison
+    hough_preprocessor = tp.AdvancedImagePreprocessor(deskew_proxy_width=0)
+    ocr = tp.TesseractOCR()
+    state = {}
+
+    def load():
+        state['image'] = tp.cv2.imread(image_path)
+        if state['image'] is None:
+            raise ValueError(f"Could not load image: {image_path}")
+
+    def dpi():
+        current_dpi, dpi_source = preprocessor.detect_dpi(image_path, state['image'])
+        state['image'] = preprocessor.normalize_dpi(state['image'],
+                                                    preprocessor.resample_dpi(current_dpi, dpi_source))
+
+    def step(name: str, fn: Callable):
+        def run():
+            state['image'] = fn(state['image'])
+        return name, run
+
+    return [
+        ('tesseract.load', load),
+        ('tesseract.dpi_normalization', dpi),
+        step('tesseract.grayscale', lambda img: tp.cv2.cvtColor(img, tp.cv2.COLOR_BGR2GRAY)),
+        step('tesseract.crop_borders', preprocessor.crop_borders),
+        step('tesseract.denoise', preprocessor.denoise),
+        ('tesseract.deskew_hough', lambda: hough_preprocessor.deskew(state['image'])),
+        step('tesseract.deskew', lambda img: preprocessor.deskew(img)[0]),
+        step('tesseract.contrast', preprocessor.enhance_contrast),
+        step('tesseract.sharpen', preprocessor.sharpen),
+        step('tesseract.otsu', lambda img: tp.cv2.threshold(img, 0, 255, tp.cv2.THRESH_BINARY + tp.cv2.THRESH_OTSU)[1]),
+        ('tesseract.preprocess_total', lambda: preprocessor.process(image_path)),
+        ('tesseract.recognize', lambda: ocr.recognize(state['image'], psm_mode=6)),
+        ('tesseract.recognize_best', lambda: ocr.recognize_best(state['image'])),
+    ]
+
+
+def easyocr_stages(image_path: str, context: Dict) -> List[Tuple[str, Callable[[], object]]]:
+    """ReceiptPreprocessor, then EasyOCR recognition (Reader loaded once per run)"""
+    import easyocr_processor as ep
+
+    if 'easyocr' not in context:
+        context['easyocr'] = ep.EasyOCRProcessor()
+    processor = context['easyocr']
+
+    return [
+        ('easyocr.preprocess', lambda: ep.ReceiptPreprocessor.preprocess(image_path)),
+        ('easyocr.extract_text', lambda: processor.extract_text(image_path, preprocess=True)),
+    ]
+
+
+def paddleocr_stages(image_path: str) -> List[Tuple[str, Callable[[], object]]]:
+    """
+    Paddle preprocessing, then recognition (engine cached by the module)
+
+    The deskew and denoise stages all run on the same binarized input:
+    the old minAreaRect over every foreground pixel against the bounded
+    projection estimator, and each binary_denoising strategy (the old
+    full-resolution NLM is the "nlm" one).
+    """
+    import paddleocr_processor as pp
+
+    pp.load_dependencies()
+    state = {}
+
+    def binarize():
+        image = ocr_preprocessing.PreprocessingPipeline([]).load(image_path)
+        gray = ocr_preprocessing.run_step("grayscale_conversion", image)
+        state['binary'] = ocr_preprocessing.run_step("adaptive_threshold", gray)
+
+    return [
+        ('paddleocr.binarize', binarize),
+        ('paddleocr.deskew_min_area_rect',
+         lambda: ocr_preprocessing.run_step("min_area_rect_deskewing", state['binary'])),
+        ('paddleocr.deskew_projection',
+         lambda: ocr_preprocessing.run_step("deskewing", state['binary'], expand=False)),
+        *[(f'paddleocr.denoise_{strategy}',
+           lambda strategy=strategy: ocr_preprocessing.run_step("binary_denoising", state['binary'],
+                                                                strategy=strategy))
+          for strategy in ocr_preprocessing.BINARY_DENOISE_STRATEGIES],
+        ('paddleocr.preprocess', lambda: pp.preprocess_image(image_path)),
+        ('paddleocr.process_receipt', lambda: pp.process_receipt(image_path)),
+    ]
+
+
+def pdf_stages(pdf_path: str, context: Dict) -> List[Tuple[str, Callable[[], object]]]:
+    """Text layer, rasterization, per-page preprocessing and full PDF processing"""
+    import pdf_processor as pdfp
+
+    if 'pdf' not in context:
+        context['pdf'] = pdfp.PDFProcessor()
+    processor = context['pdf']
+
+    def preprocess_pages():
+        for _, image in processor.iter_pdf_pages(pdf_path):
+            processor.preprocess_image(image)
+
+    return [
+        ('pdf.text_layer', lambda: processor.extract_text_layer(pdf_path)),
+        ('pdf.rasterize', lambda: sum(1 for _ in processor.iter_pdf_pages(pdf_path))),
+        ('pdf.preprocess_pages', preprocess_pages),
+        ('pdf.process_pdf', lambda: processor.process_pdf(pdf_path)),
+    ]
+
+
+def summarize(rows: List[Dict]) -> Dict[str, Dict]:
+    """Per-stage medians (time), max (RSS) and mean (confidence)"""
+    by_stage: Dict[str, List[Dict]] = {}
+    for row in rows:
+        if not row.get('error'):
+            by_stage.setdefault(row['stage'], []).append(row)
+
+    summary = {}
+    for stage, stage_rows in sorted(by_stage.items()):
+        confidences = [row['confidence'] for row in stage_rows if row.get('confidence') is not None]
+        summary[stage] = {
+            "runs": len(stage_rows),
+            "wall_ms_median": round(statistics.median(row['wall_ms'] for row in stage_rows), 2),
+            "cpu_ms_median": round(statistics.median(row['cpu_ms'] for row in stage_rows), 2),
+            "peak_rss_mb_max": max(row['peak_rss_mb'] for row in stage_rows),
+            "confidence_mean": round(statistics.mean(confidences), 4) if confidences else None
+        }
+    return summary
+
+
+def compare(summary: Dict[str, Dict], previous_path: str) -> None:
+    """Print per-stage wall/CPU/RSS deltas against an earlier results file"""
+    with open(previous_path) as handle:
+        previous = json.load(handle)
+    baseline = previous.get('summary', {})
+    label = previous.get('environment', {}).get('commit') or previous_path
+
+    print(f"\nComparison against {label}:", file=sys.stderr)
+    print(f"{'stage':36} {'wall ms':>18} {'cpu ms':>18} {'rss MB':>14}", file=sys.stderr)
+
+    def delta(new: float, old: float) -> str:
+        if not old:
+            return f"{new:.1f}"
+        return f"{new:.1f} ({(new - old) / old * 100:+.0f}%)"
+
+    for stage, stats in summary.items():
+        old = baseline.get(stage)
+        if not old:
+            continue
+        print(f"{stage:36} {delta(stats['wall_ms_median'], old['wall_ms_median']):>18} "
+              f"{delta(stats['cpu_ms_median'], old['cpu_ms_median']):>18} "
+              f"{delta(stats['peak_rss_mb_max'], old['peak_rss_mb_max']):>14}", file=sys.stderr)
+
+
+def run_benchmark(corpus_dir: str, providers: List[str], repeat: int,
+                  synthetic_pdf_pages: List[int]) -> Dict:
+    """Run every stage of every available provider over the corpus"""
+    images, pdfs = find_samples(corpus_dir)
+    meter = StageMeter()
+    context: Dict = {}
+    rows: List[Dict] = []
+    skipped: Dict[str, str] = {}
+
+    available = {}
+    for provider in providers:
+        missing = [name for name in PROVIDER_MODULES[provider] if not ocr_health.package_info(name)['installed']]
+        available[provider] = not missing
+        if missing:
+            skipped[provider] = f"missing packages: {', '.join(missing)}"
+            print(f"[Benchmark] Skipping {provider}: {skipped[provider]}", file=sys.stderr)
+
+    # pytesseract without the binary only produces error dicts
+    if available.get('tesseract') and shutil.which('tesseract') is None:
+        available['tesseract'] = False
+        skipped['tesseract'] = "tesseract binary not found"
+        print(f"[Benchmark] Skipping tesseract: {skipped['tesseract']}", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory(prefix='ocr_bench_') as scratch:
+        if available.get('pdf'):
+            pdfs = pdfs + build_synthetic_pdfs(images, synthetic_pdf_pages, scratch)
+
+        jobs: List[Tuple[str, str, Callable[[], List]]] = []
+        for image_path in images:
+            if available.get('tesseract'):
+                jobs.append(('tesseract', image_path, lambda p=image_path: tesseract_stages(p)))
+            if available.get('easyocr'):
+                jobs.append(('easyocr', image_path, lambda p=image_path: easyocr_stages(p, context)))
+            if available.get('paddleocr'):
+                jobs.append(('paddleocr', image_path, lambda p=image_path: paddleocr_stages(p)))
+        if available.get('pdf'):
+            for pdf_path in pdfs:
+                jobs.append(('pdf', pdf_path, lambda p=pdf_path: pdf_stages(p, context)))
+
+        for provider, sample, make_stages in jobs:
+            for iteration in range(1, repeat + 1):
+                print(f"[Benchmark] {provider} {Path(sample).name} (run {iteration}/{repeat})", file=sys.stderr)
+                for stage, fn in make_stages():
+                    result, measured = meter.measure(fn)
+                    rows.append({
+                        "provider": provider,
+                        "sample": os.path.basename(sample),
+                        "stage": stage,
+                        "run": iteration,
+                        **measured,
+                        "confidence": extract_confidence(result)
+                    })
+
+    summary = summarize(rows)
+    return {
+        "environment": environment_info(),
+        "corpus": {"dir": os.path.abspath(corpus_dir), "images": len(images), "pdfs": len(pdfs)},
+        "repeat": repeat,
+        "skipped": skipped,
+        "summary": summary,
+        "rows": rows
+    }
+
+
+def sweep_threads(argv: List[str], thread_counts: List[int]) -> Dict:
+    """
+    Rerun this benchmark once per thread budget and merge the results
+
+    Each run is a child process with OCR_THREADS set, so OpenMP, BLAS,
+    OpenCV and PyTorch all start with that pool size.
+    """
+    merged: Dict = {"environment": environment_info(), "thread_counts": thread_counts,
+                    "skipped": {}, "summary": {}, "rows": []}
+    for threads in thread_counts:
+        print(f"[Benchmark] Thread budget {threads}", file=sys.stderr)
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *argv],
+            env=dict(os.environ, OCR_THREADS=str(threads)),
+            stdout=subprocess.PIPE, text=True
+        )
+        if completed.returncode != 0:
+            merged["skipped"][f"{threads}t"] = f"benchmark exited with code {completed.returncode}"
+            continue
+
+        run = json.loads(completed.stdout)
+        merged["corpus"] = run["corpus"]
+        merged["repeat"] = run["repeat"]
+        merged["skipped"].update(run["skipped"])
+        for stage, stats in run["summary"].items():
+            merged["summary"][f"{stage}@{threads}t"] = stats
+        merged["rows"].extend(dict(row, threads=threads) for row in run["rows"])
+    return merged
+
+
+def write_csv(rows: List[Dict], csv_path: str) -> None:
+    fields = ["provider", "sample", "stage", "threads", "run", "wall_ms", "cpu_ms", "peak_rss_mb", "confidence", "error"]
+    with open(csv_path, 'w', newline='') as handle:
+        writer = csv.DictWriter(handle, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OCR processor benchmark harness')
+    parser.add_argument('corpus_dir', help='Directory of sample receipts (images and/or PDFs)')
+    parser.add_argument('--providers', default=','.join(ALL_PROVIDERS),
+                        help=f"Comma-separated providers (default: {','.join(ALL_PROVIDERS)})")
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per sample (default: 3)')
+    parser.add_argument('--synthetic-pdf-pages', default='1,3',
+                        help='Page counts of synthetic PDFs built from corpus images (default: 1,3; empty to skip)')
+    parser.add_argument('--output', default=None, help='Write JSON results here (default: stdout)')
+    parser.add_argument('--csv', default=None, help='Also write per-stage rows as CSV')
+    parser.add_argument('--compare', default=None, help='Earlier JSON results to compare against')
+    parser.add_argument('--threads', default=None,
+                        help='Comma-separated thread budgets to sweep, one fresh process each (e.g. 1,2,4)')
+
+    args = parser.parse_args()
+
+    if not Path(args.corpus_dir).is_dir():
+        parser.error(f"corpus directory not found: {args.corpus_dir}")
+
+    providers = [name.strip() for name in args.providers.split(',') if name.strip()]
+    unknown = [name for name in providers if name not in ALL_PROVIDERS]
+    if unknown:
+        parser.error(f"unknown providers: {', '.join(unknown)}")
+
+    page_counts = [int(n) for n in args.synthetic_pdf_pages.split(',') if n.strip()]
+
+    if args.threads:
+        thread_counts = [int(n) for n in args.threads.split(',') if n.strip()]
+        child_argv = [args.corpus_dir, '--providers', ','.join(providers), '--repeat', str(args.repeat),
+                      '--synthetic-pdf-pages', args.synthetic_pdf_pages]
+        results = sweep_threads(child_argv, thread_counts)
+    else:
+        results = run_benchmark(args.corpus_dir, providers, max(1, args.repeat), page_counts)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f"[Benchmark] Wrote {len(results['rows'])} rows to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.csv:
+        write_csv(results['rows'], args.csv)
+
+    if args.compare:
+        compare(results['summary'], args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed OCR Result Cache
+
+Shared on-disk cache for the OCR processors (easyocr, tesseract, paddleocr, pdf).
+Results are keyed by a SHA-256 of:
+- the input file bytes (or the in-memory image bytes, see ocr_input.py)
+- provider name and languages
+- processing options (preprocessing flags, DPI, PSM mode, ...)
+- the processor script's own source, so code changes invalidate old entries
+
+Only the final JSON result is stored. Entries older than the max age
+(since written, the file mtime) are dropped on read. Once the directory
+grows past the size budget the least recently read entries (atime, set on
+each hit) are evicted; the directory is scanned at most once a minute.
+
+The directory is created private (0700). If it exists but belongs to
+another user or is group/world writable, the cache disables itself rather
+than trust or leak its entries.
+
+This module is stdlib-only on purpose: a cache hit must return without
+importing OpenCV, NumPy, PyTorch or Paddle.
+
+Environment:
+    OCR_CACHE                  'off' disables the cache (default: on)
+    OCR_CACHE_DIR              Cache directory (default: <tmp>/expenseapp-ocr-cache)
+    OCR_CACHE_MAX_MB           Size budget in MB (default: 256)
+    OCR_CACHE_MAX_AGE_HOURS    Entry lifetime in hours (default: 168)
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import ocr_output
+
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'expenseapp-ocr-cache')
+DEFAULT_MAX_MB = 256
+DEFAULT_MAX_AGE_HOURS = 168
+
+# Minimum time between eviction scans (each one stats every entry)
+EVICT_INTERVAL_SECONDS = 60
+
+
+class OCRResultCache:
+    """Size- and age-bounded JSON result cache addressed by content hash"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None,
+                 max_age_seconds: Optional[int] = None, enabled: Optional[bool] = None):
+        self.cache_dir = Path(cache_dir or os.environ.get('OCR_CACHE_DIR', DEFAULT_CACHE_DIR))
+        self.max_bytes = max_bytes if max_bytes is not None else \
+            int(os.environ.get('OCR_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024
+        self.max_age_seconds = max_age_seconds if max_age_seconds is not None else \
+            int(float(os.environ.get('OCR_CACHE_MAX_AGE_HOURS', DEFAULT_MAX_AGE_HOURS)) * 3600)
+        self.enabled = enabled if enabled is not None else \
+            os.environ.get('OCR_CACHE', 'on').lower() not in ('off', '0', 'false', 'no')
+
+        # Per-process counters (accumulate across requests in --serve mode)
+        self.hits = 0
+        self.misses = 0
+        self._private = None
+
+    @staticmethod
+    def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+        """SHA-256 of a file's bytes, read in chunks"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def hash_source(cls, source: Union[str, bytes, bytearray, memoryview]) -> str:
+        """SHA-256 of an input: a file's bytes, or in-memory bytes hashed in place"""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return hashlib.sha256(source).hexdigest()
+        return cls.hash_file(source)
+
+    def make_key(self, file_path: Union[str, bytes, bytearray, memoryview],
+                 provider: str, languages: List[str],
+                 options: Optional[Dict] = None,
+                 code_path: Union[str, Sequence[str], None] = None) -> str:
+        """
+        Build the cache key for one OCR request
+
+        Args:
+            file_path: Input image/PDF path, or the encoded image bytes
+            provider: Provider name (e.g. 'easyocr', 'tesseract')
+            languages: OCR languages
+            options: Any processing options that change the result
+            code_path: Processor source file(s); their hashes version the key
+        """
+        code_paths = [code_path] if isinstance(code_path, str) else list(code_path or [])
+        material = {
+            "version": CACHE_FORMAT_VERSION,
+            "file": self.hash_source(file_path),
+            "provider": provider,
+            "languages": list(languages),
+            "options": options or {},
+            "code": [self.hash_file(path) for path in code_paths]
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _usable(self) -> bool:
+        """Enabled, and the directory exists and is private to this user (checked once)"""
+        if not self.enabled:
+            return False
+        if self._private is None:
+            try:
+                self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+                stat = self.cache_dir.stat()
+                owned = not hasattr(os, 'getuid') or stat.st_uid == os.getuid()
+                self._private = owned and not stat.st_mode & 0o022
+                if not self._private:
+                    ocr_output.log(f"[OCR-Cache] {self.cache_dir} is not private to this user, cache disabled",
+                                   'warning')
+            except OSError as e:
+                ocr_output.log(f"[OCR-Cache] Cannot use {self.cache_dir}: {str(e)}", 'warning')
+                self._private = False
+        return self._private
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached result for ``key`` or None (counts a hit or a miss)"""
+        if not self._usable():
+            return None
+
+        path = self._entry_path(key)
+        try:
+            written = path.stat().st_mtime
+            if time.time() - written > self.max_age_seconds:
+                path.unlink()
+                raise FileNotFoundError(path)
+            with open(path, 'r', encoding='utf-8') as handle:
+                result = json.load(handle)
+            os.utime(path, (time.time(), written))  # last read, for eviction; mtime keeps the age
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        """Store a result atomically, then enforce the size budget"""
+        if not self._usable():
+            return
+
+        path = self._entry_path(key)
+        tmp_path = None
+        try:
+            path.parent.mkdir(mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+                json.dump(result, handle, separators=(',', ':'))
+            os.replace(tmp_path, path)
+            tmp_path = None
+            self.maybe_evict()
+        except (OSError, TypeError, ValueError) as e:
+            ocr_output.log(f"[OCR-Cache] Failed to store result: {str(e)}", 'warning')
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+    def maybe_evict(self) -> None:
+        """evict(), unless any process sharing the directory did so in the last interval"""
+        marker = self.cache_dir / '.last-evict'
+        try:
+            if time.time() - marker.stat().st_mtime < EVICT_INTERVAL_SECONDS:
+                return
+        except OSError:
+            pass
+        marker.touch()
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop expired entries, then the least recently read until under budget"""
+        now = time.time()
+        entries = []
+        total = 0
+
+        for entry in self.cache_dir.glob('*/*.json'):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                entry.unlink(missing_ok=True)
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            entry.unlink(missing_ok=True)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self, hit: bool) -> Dict:
+        """Cache block for a result's metadata"""
+        return {
+            "enabled": self.enabled and self._private is not False,
+            "hit": hit,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def annotate(self, result: Dict, hit: bool) -> Dict:
+        """Attach cache stats to ``result['metadata']['cache']`` and return it"""
+        result.setdefault("metadata", {})["cache"] = self.stats(hit)
+        return result
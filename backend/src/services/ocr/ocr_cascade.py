@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Cost-Aware OCR Engine Cascade
+
+Runs the cheap engine first and escalates only when its answer is weak:
+
+    tesseract  ->  easyocr  ->  paddleocr      (--tiers, default tesseract,easyocr)
+
+The image is decoded and quality-gated once. Tesseract reads the output of
+its binarizing preprocessing; the heavier tiers get the same decoded image
+(never re-read from disk) and run their own profiles on it. A tier's answer
+is accepted when:
+- its mean confidence is at least --min-confidence
+- at most --max-weak-lines of its lines are below --min-line-confidence
+- every --require'd field (total, date, merchant) appears in a line that is
+  itself at least --min-line-confidence
+Otherwise, if only a few lines are weak (--refine-max-lines), just those
+lines are re-read on crops by EasyOCR's recognizer and the merged answer is
+checked again ("tesseract+refine", see ocr_refine.py); failing that the next
+tier runs. Clean receipts finish at Tesseract speed.
+If no tier passes, the best attempt (most required fields, then highest
+confidence) is returned with "accepted": false. Tiers whose engine is not
+installed are skipped.
+
+Usage:
+    python3 ocr_cascade.py <image_path> [--tiers tesseract,easyocr,paddleocr]
+    python3 ocr_cascade.py - < receipt.jpg
+    python3 ocr_cascade.py --serve
+    python3 ocr_cascade.py --health [--tiers ...]
+
+Server mode (--serve) uses the easyocr_processor framing: one JSON request
+per line on stdin ("image_path", "image_shm" + "image_size" or
+"image_base64"; optional "quality_gate"), one JSON response per line.
+Engines are loaded on first escalation and stay resident.
+
+Output: the usual result fields (text, confidence, lines, ...) with
+"provider" set to the tier that answered, plus
+    "cascade": {"tier": "tesseract", "accepted": true,
+                "tiers": [{"tier": "tesseract", "wall_ms": 812.4, "accepted": true,
+                           "reasons": [], "confidence": 0.91,
+                           "fields": {"total": true, "date": true, "merchant": true}}]}
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+from typing import Dict, List, Optional, Sequence
+
+# Thread budget before any native library loads (see ocr_threads.py)
+import ocr_threads
+ocr_threads.configure_environment()
+
+from ocr_cache import OCRResultCache
+from ocr_timing import StageTimer
+import ocr_health
+import ocr_input
+import ocr_output
+import ocr_preprocessing
+import ocr_quality
+import ocr_refine
+import easyocr_processor
+import paddleocr_processor
+import tesseract_processor
+
+TIERS = ('tesseract', 'easyocr', 'paddleocr')
+DEFAULT_TIERS = ('tesseract', 'easyocr')
+
+RECEIPT_FIELDS = ('total', 'date', 'merchant')
+
+DEFAULT_THRESHOLDS = {
+    "min_confidence": 0.75,       # Mean confidence of the tier's answer
+    "min_line_confidence": 0.60,  # Below this a line is weak
+    "max_weak_lines": 0.25,       # Largest accepted share of weak lines
+    "required_fields": RECEIPT_FIELDS,
+}
+
+# Same cues as the rule-based inference engine (inference/RuleBasedInferenceEngine.ts)
+_AMOUNT = r'(?:\$|USD|€|EUR|£|GBP)?\s*\d{1,3}(?:,\d{3})*[.,]\d{2}\b'
+TOTAL_PATTERNS = [
+    re.compile(r'\b(?:grand\s+)?total\b[\s:]*' + _AMOUNT, re.I),
+    re.compile(r'\b(?:amount|balance)(?:\s+due)?\b[\s:]*' + _AMOUNT, re.I),
+    re.compile(r'(?:\$|USD|€|EUR|£|GBP)\s*\d{1,3}(?:,\d{3})*[.,]\d{2}\s*(?:total|amount|balance|due|paid)\b', re.I),
+]
+_MONTHS = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*'
+DATE_PATTERNS = [
+    re.compile(r'\b\d{4}[-/]\d{1,2}[-/]\d{1,2}\b'),
+    re.compile(r'\b\d{1,2}[-/.]\d{1,2}[-/.](?:\d{4}|\d{2})\b'),
+    re.compile(r'\b' + _MONTHS + r'\s+\d{1,2},?\s+\d{4}\b', re.I),
+    re.compile(r'\b\d{1,2}\s+' + _MONTHS + r'\s+\d{4}\b', re.I),
+]
+# Header lines that are not a merchant name
+NOT_MERCHANT = re.compile(r'^(?:receipt|invoice|welcome|customer copy|merchant copy)$', re.I)
+
+
+def find_fields(lines: Sequence[Dict], min_line_confidence: float = 0.0) -> Dict[str, bool]:
+    """
+    Which receipt fields a result's lines contain
+
+    Only lines with at least ``min_line_confidence`` count, so a total read
+    as noise does not pass for a total. The merchant is the first
+    substantial line among the first eight, as in the inference engine.
+    """
+    confident = [line["text"].strip() for line in lines
+                 if line.get("confidence", 0.0) >= min_line_confidence and line.get("text", "").strip()]
+    merchant = any(
+        len(re.findall(r'[A-Za-z]', text)) >= 3 and not NOT_MERCHANT.match(text)
+        and not any(pattern.fullmatch(text) for pattern in DATE_PATTERNS)
+        for text in confident[:8]
+    )
+    return {
+        "total": any(pattern.search(text) for text in confident for pattern in TOTAL_PATTERNS),
+        "date": any(pattern.search(text) for text in confident for pattern in DATE_PATTERNS),
+        "merchant": merchant,
+    }
+
+
+def evaluate(result: Dict, thresholds: Dict) -> Dict:
+    """Acceptance check of one tier's result: accepted, reasons, fields"""
+    lines = result.get("lines") or []
+    min_line = thresholds["min_line_confidence"]
+    fields = find_fields(lines, min_line)
+
+    reasons = []
+    if not lines:
+        reasons.append("no_text")
+    if result.get("confidence", 0.0) < thresholds["min_confidence"]:
+        reasons.append("low_confidence")
+    weak = sum(1 for line in lines if line.get("confidence", 0.0) < min_line)
+    if lines and weak / len(lines) > thresholds["max_weak_lines"]:
+        reasons.append("weak_lines")
+    reasons.extend(f"no_{field}" for field in thresholds["required_fields"] if not fields.get(field))
+
+    return {
+        "accepted": not reasons,
+        "reasons": reasons,
+        "fields": fields,
+        "weak_lines": weak,
+    }
+
+
+def tier_available(tier: str) -> bool:
+    """Whether a tier's engine is installed (package metadata only, no import)"""
+    if tier == 'tesseract':
+        return ocr_health.package_info('pytesseract')["installed"] and shutil.which('tesseract') is not None
+    if tier == 'easyocr':
+        return ocr_health.package_info('easyocr')["installed"]
+    return ocr_health.package_info('paddleocr')["installed"] and ocr_health.package_info('paddle')["installed"]
+
+
+def health_report(tiers: Sequence[str]) -> Dict:
+    """Which tiers can run (metadata only); available if OpenCV and any tier are"""
+    started = time.perf_counter()
+    report = ocr_health.build_report("cascade", ["cv2", "numpy"], started=started)
+    report["tiers"] = {tier: tier_available(tier) for tier in tiers}
+    report["available"] = report["available"] and any(report["tiers"].values())
+    return report
+
+
+class OCRCascade:
+    """
+    Tiered OCR over one decoded image
+
+    Engines are built on first use and kept, so in server mode the EasyOCR
+    Reader and Paddle models load once, and only if a receipt escalates.
+    """
+
+    def __init__(self, tiers: Sequence[str] = DEFAULT_TIERS, thresholds: Optional[Dict] = None,
+                 tesseract_lang: str = 'eng', languages: Sequence[str] = ('en',),
+                 psm_mode: int = 6, refine_max_lines: int = ocr_refine.DEFAULT_MAX_LINES):
+        unknown = [tier for tier in tiers if tier not in TIERS]
+        if unknown or not tiers:
+            raise ValueError(f"Unknown cascade tiers: {', '.join(unknown) or '(none)'}")
+        self.tiers = list(tiers)
+        self.thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+        self.tesseract_lang = tesseract_lang
+        self.languages = list(languages)
+        self.psm_mode = psm_mode
+        self.refine_max_lines = refine_max_lines
+        self._engines: Dict = {}
+        self._available: Dict[str, bool] = {}
+
+    def available(self, tier: str) -> bool:
+        if tier not in self._available:
+            self._available[tier] = tier_available(tier)
+        return self._available[tier]
+
+    def run_tesseract(self, source: ocr_input.ImageSource, image, timer: StageTimer) -> Dict:
+        if 'tesseract' not in self._engines:
+            self._engines['tesseract'] = (tesseract_processor.AdvancedImagePreprocessor(),
+                                          tesseract_processor.TesseractOCR(language=self.tesseract_lang))
+        preprocessor, engine = self._engines['tesseract']
+        binary, metadata = preprocessor.process(source, timer=timer, image=image)
+        with timer.stage("tesseract.recognition", binary):
+            result = engine.recognize(binary, psm_mode=self.psm_mode)
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        details = {key: metadata[key] for key in ("detected_dpi", "skew_angle") if key in metadata}
+        details["backend"] = engine.backend  # tesserocr handles stay loaded across requests
+        return {
+            **result,
+            "image": binary,  # Line boxes refer to it (kept for refine())
+            "metadata": details,
+        }
+
+    def _easyocr(self) -> "easyocr_processor.EasyOCRProcessor":
+        if 'easyocr' not in self._engines:
+            self._engines['easyocr'] = easyocr_processor.EasyOCRProcessor(languages=self.languages)
+        return self._engines['easyocr']
+
+    def run_easyocr(self, source: ocr_input.ImageSource, image, timer: StageTimer) -> Dict:
+        result = self._easyocr().recognize_image(image, timer)
+        result.pop("success", None)
+        result.pop("provider", None)
+        return result
+
+    def run_paddleocr(self, source: ocr_input.ImageSource, image, timer: StageTimer) -> Dict:
+        if not paddleocr_processor.load_dependencies():
+            raise RuntimeError("PaddleOCR could not be imported")
+        paddle = paddleocr_processor.recognize_image(image, lang=self.languages[0], timer=timer)
+        # Paddle's "words" are text lines
+        lines = [{"text": word["text"], "confidence": word["confidence"]} for word in paddle["words"]]
+        return {
+            "text": paddle["text"],
+            "confidence": paddle["confidence"],
+            "line_count": len(lines),
+            "lines": lines,
+        }
+
+    def refinable(self, tier: str, result: Dict, work_image) -> bool:
+        """Whether re-reading a tier's weak lines with EasyOCR is possible and worth it"""
+        return (work_image is not None and self.refine_max_lines > 0 and tier != 'easyocr' and
+                self.available('easyocr') and
+                ocr_refine.should_refine(result.get("lines") or [],
+                                         self.thresholds["min_line_confidence"], self.refine_max_lines))
+
+    def refine(self, result: Dict, work_image, timer: StageTimer) -> Dict:
+        """Re-read the weak lines of a result on crops of ``work_image`` with EasyOCR's recognizer"""
+        processor = self._easyocr()
+        with timer.stage("refine", work_image):
+            return ocr_refine.refine(result, work_image, processor.recognize_boxes, 'easyocr',
+                                     min_line_confidence=self.thresholds["min_line_confidence"],
+                                     max_lines=self.refine_max_lines)
+
+    def _consider(self, attempts: List[Dict], best, tier: str, result: Dict, started: float):
+        """Evaluate a tier's result, record the attempt, and keep the best answer so far"""
+        wall_ms = round((time.perf_counter() - started) * 1000, 2)
+        verdict = evaluate(result, self.thresholds)
+        attempt = {
+            "tier": tier,
+            "wall_ms": wall_ms,
+            "accepted": verdict["accepted"],
+            "reasons": verdict["reasons"],
+            "confidence": round(result.get("confidence", 0.0), 4),
+            "line_count": len(result.get("lines") or []),
+            "weak_lines": verdict["weak_lines"],
+            "fields": verdict["fields"],
+        }
+        if "refinement" in result:
+            attempt.update(result.pop("refinement"))
+        attempts.append(attempt)
+        ocr_output.log(f"[Cascade] {tier}: {'accepted' if verdict['accepted'] else 'not accepted'} "
+                       f"({', '.join(verdict['reasons']) or 'all checks passed'}, {wall_ms:.0f}ms)", 'debug')
+
+        rank = (sum(verdict["fields"].values()), result.get("confidence", 0.0))
+        if best is None or verdict["accepted"] or rank > best[0]:
+            best = (rank, tier, result, verdict["accepted"])
+        return best, verdict["accepted"]
+
+    def run(self, source: ocr_input.ImageSource, quality_gate: Optional[str] = None,
+            timer: Optional[StageTimer] = None) -> Dict:
+        """
+        OCR one image (path or encoded bytes) through the tiers
+
+        Returns the answering tier's result with a "cascade" summary; a
+        gate rejection, or every tier failing, returns success=false.
+        """
+        timer = timer or StageTimer()
+        with timer.stage("load") as record:
+            image = ocr_preprocessing.decode_image(source)
+            record["output"] = image
+        try:
+            with timer.stage("quality_gate", image):
+                quality = ocr_quality.check(image, quality_gate)
+        except ocr_quality.QualityRejected as e:
+            ocr_output.log(f"[Cascade] {e}", 'warning')
+            return {
+                "success": False,
+                "error": str(e),
+                "text": "",
+                "confidence": 0.0,
+                "provider": "cascade",
+                "quality": e.verdict,
+                "metadata": {"timings": timer.report()}
+            }
+
+        attempts = []
+        best = None
+        for tier in self.tiers:
+            if not self.available(tier):
+                ocr_output.log(f"[Cascade] Skipping {tier}: engine not installed", 'debug')
+                attempts.append({"tier": tier, "skipped": "not_installed"})
+                continue
+
+            started = time.perf_counter()
+            try:
+                result = getattr(self, f"run_{tier}")(source, image, timer)
+            except Exception as e:
+                ocr_output.log(f"[Cascade] {tier} failed: {e}", 'warning')
+                attempts.append({"tier": tier, "wall_ms": round((time.perf_counter() - started) * 1000, 2),
+                                 "error": str(e)})
+                continue
+            work_image = result.pop("image", None)
+            best, accepted = self._consider(attempts, best, tier, result, started)
+            if accepted:
+                break
+
+            # A few weak lines: re-read just those before paying for a full pass
+            if self.refinable(tier, result, work_image):
+                started = time.perf_counter()
+                try:
+                    result = self.refine(result, work_image, timer)
+                except Exception as e:
+                    ocr_output.log(f"[Cascade] Refining {tier} failed: {e}", 'warning')
+                    attempts.append({"tier": f"{tier}+refine",
+                                     "wall_ms": round((time.perf_counter() - started) * 1000, 2),
+                                     "error": str(e)})
+                    continue
+                best, accepted = self._consider(attempts, best, f"{tier}+refine", result, started)
+                if accepted:
+                    break
+
+        if best is None:
+            return {
+                "success": False,
+                "error": "No cascade tier produced a result",
+                "text": "",
+                "confidence": 0.0,
+                "provider": "cascade",
+                "cascade": {"tier": None, "accepted": False, "tiers": attempts},
+                "metadata": {"timings": timer.report()}
+            }
+
+        _, tier, result, accepted = best
+        lines = result.get("lines") or []
+        return {
+            "success": True,
+            "text": result.get("text", ""),
+            "confidence": round(result.get("confidence", 0.0), 4),
+            "provider": tier.split('+')[0],
+            "line_count": len(lines),
+            "lines": lines,
+            "cascade": {"tier": tier, "accepted": accepted, "tiers": attempts},
+            "metadata": {
+                **(result.get("metadata") or {}),
+                "quality": quality,
+                "threads": ocr_threads.describe(),
+                "timings": timer.report()
+            }
+        }
+
+
+def cache_key(cache: OCRResultCache, source: ocr_input.ImageSource, cascade: OCRCascade,
+              quality_gate: Optional[str] = None) -> str:
+    """Cache key for a cascade request"""
+    options = {
+        "tiers": cascade.tiers,
+        "thresholds": {**cascade.thresholds, "required_fields": list(cascade.thresholds["required_fields"])},
+        "psm_mode": cascade.psm_mode,
+        "refine_max_lines": cascade.refine_max_lines,
+        "quality_gate": ocr_quality.gate_mode(quality_gate),
+        "preprocess_steps": {tier: ocr_preprocessing.profile_steps(tier) for tier in cascade.tiers},
+    }
+    if 'tesseract' in cascade.tiers:
+        # Binary and tesserocr builds can read the same image differently
+        options["tesseract_backend"] = tesseract_processor.backend_cache_fields()
+    return cache.make_key(source, 'cascade', [cascade.tesseract_lang, *cascade.languages], options,
+                          code_path=(__file__, ocr_preprocessing.__file__, ocr_quality.__file__, ocr_refine.__file__,
+                                     tesseract_processor.__file__, easyocr_processor.__file__,
+                                     paddleocr_processor.__file__))
+
+
+def run_cached(cascade: OCRCascade, cache: OCRResultCache, source: ocr_input.ImageSource,
+               quality_gate: Optional[str] = None) -> Dict:
+    """Run the cascade through the result cache (successful results only)"""
+    key = cache_key(cache, source, cascade, quality_gate)
+    result = cache.get(key)
+    if result is not None:
+        return cache.annotate(result, hit=True)
+
+    result = cascade.run(source, quality_gate=quality_gate)
+    if result.get('success'):
+        cache.put(key, result)
+    return cache.annotate(result, hit=False)
+
+
+def serve(cascade: OCRCascade, cache: OCRResultCache, default_quality_gate: Optional[str] = None) -> None:
+    """Long-lived worker loop: newline-delimited JSON requests on stdin"""
+    ocr_output.emit({"ready": True, "provider": "cascade", "tiers": cascade.tiers, "pid": os.getpid()})
+
+    for raw_line in sys.stdin:
+        raw_line = raw_line.strip()
+        if not raw_line:
+            continue
+
+        try:
+            request = json.loads(raw_line)
+            if not isinstance(request, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            ocr_output.emit({"id": None, "success": False, "error": f"Invalid request: {str(e)}",
+                             "text": "", "confidence": 0.0, "provider": "cascade"})
+            continue
+
+        request_id = request.get('id')
+        command = request.get('command', 'ocr')
+        if command == 'shutdown':
+            break
+        if command == 'ping':
+            ocr_output.emit({"id": request_id, "pong": True})
+            continue
+
+        try:
+            with ocr_input.request_source(request) as source:
+                if not ocr_input.source_exists(source):
+                    raise FileNotFoundError(f"Image not found: {ocr_input.describe(source)}")
+                result = run_cached(cascade, cache, source, request.get('quality_gate', default_quality_gate))
+        except Exception as e:
+            # Missing file or segment, bad base64, unknown gate mode, malformed
+            # options: fail this request, never the worker other callers share
+            result = {"success": False, "error": str(e), "text": "", "confidence": 0.0, "provider": "cascade"}
+        result["id"] = request_id
+        ocr_output.emit(result)
+
+
+def parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cost-aware OCR engine cascade')
+    parser.add_argument('image_path', nargs='?', help='Path to receipt image ("-" reads the image bytes from stdin)')
+    parser.add_argument('--tiers', default=','.join(DEFAULT_TIERS),
+                        help=f'Engines in escalation order, from {", ".join(TIERS)} (default: %(default)s)')
+    parser.add_argument('--min-confidence', type=float, default=DEFAULT_THRESHOLDS["min_confidence"],
+                        help='Mean confidence a tier needs to answer (default: %(default)s)')
+    parser.add_argument('--min-line-confidence', type=float, default=DEFAULT_THRESHOLDS["min_line_confidence"],
+                        help='Confidence below which a line is weak (default: %(default)s)')
+    parser.add_argument('--max-weak-lines', type=float, default=DEFAULT_THRESHOLDS["max_weak_lines"],
+                        help='Largest share of weak lines a tier may answer with (default: %(default)s)')
+    parser.add_argument('--require', default=','.join(RECEIPT_FIELDS),
+                        help='Fields a tier must find, from total, date, merchant; "" for none (default: %(default)s)')
+    parser.add_argument('--tesseract-lang', default='eng', help='Tesseract language (default: eng)')
+    parser.add_argument('--lang', default='en', help='EasyOCR/Paddle language codes (default: en)')
+    parser.add_argument('--psm', type=int, default=6, help='Tesseract page segmentation mode (default: 6)')
+    parser.add_argument('--refine-max-lines', type=int, default=ocr_refine.DEFAULT_MAX_LINES,
+                        help='Re-read up to this many weak Tesseract lines with EasyOCR before a '
+                             'full EasyOCR pass; 0 disables (default: %(default)s)')
+    parser.add_argument('--quality-gate', choices=ocr_quality.GATE_MODES, default=None,
+                        help='Reject, only report, or skip unreadable captures (default: $OCR_QUALITY_GATE or warn)')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run as a long-lived worker reading JSON requests from stdin')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the on-disk result cache')
+    parser.add_argument('--health', action='store_true',
+                        help='Report which tiers are installed without loading any engine')
+    ocr_output.add_arguments(parser)
+
+    args = parser.parse_args()
+    ocr_output.configure(args.output, args.log_level)
+
+    required = parse_list(args.require)
+    if any(field not in RECEIPT_FIELDS for field in required):
+        parser.error(f"--require takes fields from: {', '.join(RECEIPT_FIELDS)}")
+    try:
+        cascade = OCRCascade(
+            tiers=parse_list(args.tiers),
+            thresholds={
+                "min_confidence": args.min_confidence,
+                "min_line_confidence": args.min_line_confidence,
+                "max_weak_lines": args.max_weak_lines,
+                "required_fields": tuple(required),
+            },
+            tesseract_lang=args.tesseract_lang,
+            languages=parse_list(args.lang),
+            psm_mode=args.psm,
+            refine_max_lines=args.refine_max_lines,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.health:
+        ocr_health.print_report(health_report(cascade.tiers))
+
+    cache = OCRResultCache(enabled=False if args.no_cache else None)
+
+    if args.serve:
+        serve(cascade, cache, default_quality_gate=args.quality_gate)
+        sys.exit(0)
+
+    if not args.image_path:
+        parser.error('image_path is required unless --serve is given')
+
+    source = ocr_input.cli_source(args.image_path)
+    if not ocr_input.source_exists(source):
+        print(json.dumps({
+            "success": False,
+            "error": f"Image not found: {args.image_path}",
+            "text": "",
+            "confidence": 0.0,
+            "provider": "cascade"
+        }))
+        sys.exit(1)
+
+    result = run_cached(cascade, cache, source, args.quality_gate)
+    ocr_output.print_result(result)
+    sys.exit(0 if result.get('success') else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+In-Memory Image Inputs for the OCR Processors
+
+Lets the processors take encoded image bytes instead of a filesystem path,
+so uploads never have to be written to (and re-read from) disk:
+- one-shot CLI: pass ``-`` as the image path and pipe the bytes on stdin
+- server mode: name a POSIX shared-memory segment holding the bytes,
+      {"id": 1, "image_shm": "expenseapp-ocr-812-7", "image_size": 81234}
+  or, for small images, inline them as {"id": 1, "image_base64": "..."}
+
+An image *source* is either a path (str) or a bytes-like buffer. Buffers are
+decoded with cv2.imdecode straight from the (shared) memory, and the result
+cache hashes them exactly like the file they came from, so a receipt sent
+both ways hits the same entry. Results still come back as JSON on stdout.
+
+The segment belongs to the sender: the processors attach, read and detach,
+and never unlink it.
+
+This module is stdlib-only, like ocr_cache: a cache hit must still return
+without importing OpenCV or NumPy.
+"""
+
+import os
+import sys
+import base64
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, Optional, Union
+
+import ocr_output
+
+# Image path meaning "read the encoded image from stdin"
+STDIN_PATH = '-'
+
+ImageSource = Union[str, bytes, bytearray, memoryview]
+
+
+def is_buffer(source: Optional[ImageSource]) -> bool:
+    """True for in-memory image bytes, False for a path"""
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def describe(source: Optional[ImageSource]) -> str:
+    """Path, or a short label for in-memory bytes (for logs and errors)"""
+    if is_buffer(source):
+        return f"<{memoryview(source).nbytes} bytes in memory>"
+    return str(source)
+
+
+def source_exists(source: Optional[ImageSource]) -> bool:
+    """A non-empty buffer, or a path that exists"""
+    if is_buffer(source):
+        return memoryview(source).nbytes > 0
+    return bool(source) and os.path.exists(source)
+
+
+def cli_source(image_path: str) -> ImageSource:
+    """The CLI image argument as a source: ``-`` reads all of stdin"""
+    if image_path == STDIN_PATH:
+        return sys.stdin.buffer.read()
+    return image_path
+
+
+# (view, segment) pairs whose view was still exported at release time;
+# closed on a later attach, once the arrays holding them are gone
+_lingering = []
+
+
+def _close_lingering() -> None:
+    for entry in list(_lingering):
+        view, segment = entry
+        try:
+            view.release()
+            segment.close()
+        except BufferError:
+            continue
+        _lingering.remove(entry)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without handing it to the resource tracker"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+
+    segment = shared_memory.SharedMemory(name=name)
+    # Older Pythons register every attached segment and unlink it when this
+    # process exits, which would pull it out from under the sender
+    from multiprocessing import resource_tracker
+    resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+@contextmanager
+def attach_shared_memory(name: str, size: Optional[int] = None) -> Iterator[memoryview]:
+    """
+    Zero-copy view of the first ``size`` bytes of a shared-memory segment
+
+    The segment may be larger than the image (it is rounded up to whole
+    pages), so senders should always pass the real size. Arrays built on
+    the view should be released before the block exits; one that is still
+    alive (say, held by a traceback) defers closing the segment to a later
+    call instead of failing the request.
+    """
+    _close_lingering()
+    segment = _attach(name)
+    view = segment.buf[:size] if size else segment.buf
+    try:
+        yield view
+    finally:
+        try:
+            view.release()
+            segment.close()
+        except BufferError:
+            ocr_output.log(f"[OCR-Input] Shared-memory segment {name} still in use, closing it later", 'warning')
+            _lingering.append((view, segment))
+
+
+@contextmanager
+def request_source(request: Dict) -> Iterator[Optional[ImageSource]]:
+    """The image source named by a server-mode request (shm, base64 or path)"""
+    if request.get('image_shm'):
+        with attach_shared_memory(request['image_shm'], request.get('image_size')) as view:
+            yield view
+    elif request.get('image_base64'):
+        yield base64.b64decode(request['image_base64'])
+    else:
+        yield request.get('image_path')
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Result Output and Log Levels for the OCR Processors
+
+Results:
+- ``pretty`` (default) prints the final result as indented JSON, as before
+- ``compact`` prints it on one line without separator whitespace; that is
+  also a valid NDJSON record, and per-line/per-word payloads shrink by
+  roughly a third
+Server and batch modes always write compact NDJSON lines through emit().
+
+Progress messages go to stderr through log(), which drops anything below the
+configured level. Per-step chatter is logged at ``debug``, lifecycle events
+at ``info`` and recoverable problems at ``warning``, so production runs can
+set ``warning`` and write nothing to stderr on success.
+
+Environment (the processors' --output/--log-level flags override these):
+    OCR_OUTPUT       'pretty' (default) or 'compact'
+    OCR_LOG_LEVEL    'debug', 'info' (default), 'warning', 'error' or 'silent'
+
+Stdlib-only, like ocr_cache: a cache hit still prints without importing OpenCV.
+"""
+
+import os
+import sys
+import json
+from typing import Any, Optional
+
+OUTPUT_FORMATS = ('pretty', 'compact')
+
+LOG_LEVELS = {
+    'debug': 10,
+    'info': 20,
+    'warning': 30,
+    'error': 40,
+    'silent': 100,
+}
+
+_output = os.environ.get('OCR_OUTPUT', 'pretty').lower()
+_log_threshold = LOG_LEVELS.get(os.environ.get('OCR_LOG_LEVEL', 'info').lower(), LOG_LEVELS['info'])
+
+
+def configure(output: Optional[str] = None, log_level: Optional[str] = None) -> None:
+    """
+    Override the output format and/or log level (None keeps the current one)
+
+    The values are also exported to the environment, so worker processes
+    started afterwards (PDF page workers, batch pools) inherit them.
+    """
+    global _output, _log_threshold
+    if output is not None:
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output}")
+        _output = output
+        os.environ['OCR_OUTPUT'] = output
+    if log_level is not None:
+        if log_level not in LOG_LEVELS:
+            raise ValueError(f"Unknown log level: {log_level}")
+        _log_threshold = LOG_LEVELS[log_level]
+        os.environ['OCR_LOG_LEVEL'] = log_level
+
+
+def dumps(payload: Any, compact: Optional[bool] = None) -> str:
+    """Serialize a result in the configured (or the given) format"""
+    if compact is None:
+        compact = _output == 'compact'
+    if compact:
+        return json.dumps(payload, separators=(',', ':'))
+    return json.dumps(payload, indent=2)
+
+
+def print_result(payload: Any) -> None:
+    """Print a one-shot result to stdout"""
+    print(dumps(payload))
+
+
+def emit(payload: Any) -> None:
+    """Write a single compact JSON line to stdout and flush it (NDJSON framing)"""
+    sys.stdout.write(dumps(payload, compact=True) + '\n')
+    sys.stdout.flush()
+
+
+def log(message: str, level: str = 'info') -> None:
+    """Write a progress message to stderr if ``level`` is enabled"""
+    if LOG_LEVELS[level] >= _log_threshold:
+        print(message, file=sys.stderr)
+
+
+def add_arguments(parser) -> None:
+    """Add --output and --log-level to a processor's argument parser"""
+    parser.add_argument('--output', choices=OUTPUT_FORMATS, default=None,
+                        help='Result format: indented or single-line JSON (default: $OCR_OUTPUT or pretty)')
+    parser.add_argument('--log-level', choices=list(LOG_LEVELS), default=None,
+                        help='Lowest stderr message level written (default: $OCR_LOG_LEVEL or info)')
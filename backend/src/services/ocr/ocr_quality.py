@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Pre-flight Image Quality Gate for the OCR Processors
+
+Measurements on a ~512px copy of the upload (512px wide for portrait
+images, so long thermal receipts keep legible text), taken before any
+preprocessing or OCR engine runs (about 30ms for a 12MP photo, most of it
+the downscale; engines take seconds):
+- sharpness: variance of the Laplacian (low = focus or motion blur)
+- exposure: mean brightness, contrast, and the share of crushed pixels on the paper
+- receipt coverage: share of the frame taken by the largest bright region
+- text density: share of ink pixels (local thresholding) on that region
+
+assess() turns them into a verdict:
+
+    {"action": "accept" | "warn" | "reject", "reasons": [...], "metrics": {...}}
+
+"reject" is for captures no engine can read (black frame, blank page,
+heavy blur). "warn" flags weak captures that are still worth OCR'ing and
+lets callers treat the result with less trust.
+
+Gate modes (OCR_QUALITY_GATE, or each processor's --quality-gate):
+    enforce   rejected images return success=false without running OCR
+    warn      always run OCR; the verdict is only reported (default)
+    off       skip the check
+
+The thresholds are calibrated on synthetic captures only, so rejecting is
+opt-in (OCR_QUALITY_GATE=enforce) until they are validated on real receipts.
+
+OpenCV/NumPy are imported on first use, so importing this module is cheap.
+"""
+
+import os
+import time
+from typing import Dict, Optional
+
+import ocr_preprocessing
+
+cv2 = None
+np = None
+
+GATE_MODES = ('enforce', 'warn', 'off')
+
+# Long side of the copy every metric is measured on (width for portrait images:
+# a 600x9000 receipt at 512px tall would shrink 22px text to about 1px)
+ANALYSIS_SIZE = 512
+
+# Calibrated on synthetic 3000x4000 receipt photos (40px text): sharp
+# captures measure 2000+, a Gaussian blur of sigma 10px about 25 and of
+# sigma 16px about 5; a blank sheet has an ink density near 0, text 0.04+
+THRESHOLDS = {
+    "reject_sharpness": 15.0,      # Laplacian variance
+    "warn_sharpness": 60.0,
+    "reject_mean_brightness": 30,  # Black frame (lens covered, no flash)...
+    "reject_max_bright": 0.01,     # ...with almost no paper-bright pixels
+    "reject_ink_density": 0.002,   # Blank page, wall, table top
+    "warn_clipped": 0.5,           # Share of crushed (<16) paper pixels
+    "warn_contrast": 20.0,         # Grey-level standard deviation
+    "warn_coverage": 0.15,         # Receipt is a small part of the frame
+}
+
+
+class QualityRejected(Exception):
+    """Raised by check() when the gate is enforced and the image is rejected"""
+
+    def __init__(self, verdict: Dict):
+        super().__init__("Image rejected by quality gate: " + ", ".join(verdict["reasons"]))
+        self.verdict = verdict
+
+
+def load_dependencies() -> None:
+    """Import OpenCV/NumPy once (raises ImportError if missing)"""
+    global cv2, np
+    if cv2 is not None:
+        return
+
+    import cv2
+    import numpy as np
+    ocr_preprocessing.load_dependencies()
+
+
+def gate_mode(mode: Optional[str] = None) -> str:
+    """Effective gate mode: the given one, else OCR_QUALITY_GATE, else 'warn'"""
+    mode = (mode or os.environ.get('OCR_QUALITY_GATE') or 'warn').lower()
+    if mode not in GATE_MODES:
+        raise ValueError(f"Unknown quality gate mode: {mode}")
+    return mode
+
+
+def measure(image: "np.ndarray") -> Dict:
+    """Raw quality metrics of an image (BGR or grayscale), on a small copy"""
+    load_dependencies()
+    height, width = image.shape[:2]
+    small = ocr_preprocessing.downscale_proxy(image, ANALYSIS_SIZE, by_width=height > width)
+    gray = small if small.ndim == 2 else cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    pixels = gray.size
+
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    mean, std = cv2.meanStdDev(gray)
+    bright = np.count_nonzero(gray > 245) / pixels
+
+    # Paper: the largest connected bright region after Otsu (text holes
+    # are closed first so lines do not split the sheet)
+    _, bright_mask = cv2.threshold(cv2.GaussianBlur(gray, (5, 5), 0), 0, 255,
+                                   cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    bright_mask = cv2.morphologyEx(bright_mask, cv2.MORPH_CLOSE, np.ones((9, 9), np.uint8))
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(bright_mask, connectivity=4)
+    if count > 1:
+        largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+        coverage = float(stats[largest, cv2.CC_STAT_AREA]) / pixels
+        # Eroded, so the paper's own edge does not count as ink
+        paper = cv2.erode((labels == largest).astype(np.uint8), np.ones((7, 7), np.uint8))
+    else:
+        coverage = 0.0
+        paper = np.ones_like(gray)
+
+    # Ink: clearly darker than its neighbourhood (C keeps paper texture out)
+    ink = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 15)
+    paper_pixels = np.count_nonzero(paper)
+    ink_density = np.count_nonzero(ink & paper) / paper_pixels if paper_pixels else 0.0
+
+    # Crushed paper means underexposure; bright paper is normal (a white
+    # scan is mostly >245), so blown-out pixels are not held against it
+    dark = np.count_nonzero((gray < 16) & (paper > 0)) / paper_pixels if paper_pixels else 0.0
+
+    return {
+        "analysis_size": [int(gray.shape[1]), int(gray.shape[0])],
+        "sharpness": round(sharpness, 1),
+        "mean_brightness": round(float(mean[0][0]), 1),
+        "contrast": round(float(std[0][0]), 1),
+        "dark_fraction": round(dark, 4),
+        "bright_fraction": round(bright, 4),
+        "ink_density": round(ink_density, 4),
+        "receipt_coverage": round(coverage, 3),
+    }
+
+
+def assess(image: "np.ndarray", thresholds: Optional[Dict] = None) -> Dict:
+    """Measure an image and classify it as accept / warn / reject, with reasons"""
+    started = time.perf_counter()
+    limits = dict(THRESHOLDS, **(thresholds or {}))
+    metrics = measure(image)
+
+    rejections = []
+    if (metrics["mean_brightness"] < limits["reject_mean_brightness"] and
+            metrics["bright_fraction"] < limits["reject_max_bright"]):
+        rejections.append("too_dark")
+    if metrics["ink_density"] < limits["reject_ink_density"]:
+        rejections.append("no_text")
+    if metrics["sharpness"] < limits["reject_sharpness"]:
+        rejections.append("blurry")
+
+    warnings = []
+    if not rejections:
+        if metrics["sharpness"] < limits["warn_sharpness"]:
+            warnings.append("soft_focus")
+        if metrics["dark_fraction"] > limits["warn_clipped"]:
+            warnings.append("underexposed")
+        if metrics["contrast"] < limits["warn_contrast"]:
+            warnings.append("low_contrast")
+        if metrics["receipt_coverage"] < limits["warn_coverage"]:
+            warnings.append("small_receipt")
+
+    return {
+        "action": "reject" if rejections else ("warn" if warnings else "accept"),
+        "reasons": rejections or warnings,
+        "metrics": metrics,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def check(image: "np.ndarray", mode: Optional[str] = None) -> Optional[Dict]:
+    """
+    Run the gate in the given mode
+
+    Returns:
+        The verdict, or None when the gate is off
+
+    Raises:
+        QualityRejected: mode is 'enforce' and the image was rejected
+    """
+    mode = gate_mode(mode)
+    if mode == 'off':
+        return None
+    verdict = assess(image)
+    verdict["mode"] = mode
+    if mode == 'enforce' and verdict["action"] == 'reject':
+        raise QualityRejected(verdict)
+    return verdict
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Selective Re-OCR of Low-Confidence Lines
+
+A weak OCR result is usually weak in a handful of lines, not everywhere.
+Instead of rerunning the whole receipt through a heavier engine, refine():
+- keeps every line at or above ``min_line_confidence``
+- crops the weak lines' boxes (padded by a fraction of the line height)
+- reads all crops in one call to a stronger recognizer, with no detection
+  pass (EasyOCR's recognizer, see EasyOCRProcessor.recognize_boxes)
+- takes a re-read line when it is more confident than the original
+
+Lines are replaced in place, so the result keeps the first engine's reading
+order, and the text and confidence are rebuilt from the merged lines. The
+confidence stays a mean over words, as Tesseract's is: each line counts
+once per word, so replacing a one-word line moves it as little as it should.
+Replaced lines are marked with ``refined_by`` and keep the original reading
+under ``original``.
+
+Lines need a ``bbox`` ([left, top, right, bottom]) in the pixels of the image
+passed in; tesseract_processor results have one. Stdlib-only: the
+recognizer callable brings its own dependencies.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Recognizer: (image, [[x_min, x_max, y_min, y_max], ...]) -> [(text, confidence) or None, ...]
+Recognizer = Callable[[object, List[List[int]]], List[Optional[Tuple[str, float]]]]
+
+DEFAULT_MIN_LINE_CONFIDENCE = 0.60
+
+# More weak lines than this and a full pass with the heavier engine is the better deal
+DEFAULT_MAX_LINES = 8
+
+# Box padding, as a fraction of the line height (ascenders/descenders often fall outside)
+DEFAULT_PADDING = 0.25
+
+
+def weak_line_indices(lines: Sequence[Dict], min_line_confidence: float = DEFAULT_MIN_LINE_CONFIDENCE) -> List[int]:
+    """Indices of lines below the confidence bar that have a box to crop"""
+    return [index for index, line in enumerate(lines)
+            if line.get("bbox") and line.get("confidence", 0.0) < min_line_confidence]
+
+
+def crop_box(bbox: Sequence[int], shape: Sequence[int], padding: float = DEFAULT_PADDING) -> Optional[List[int]]:
+    """Padded [x_min, x_max, y_min, y_max] of a line box, clipped to the image (None if empty)"""
+    left, top, right, bottom = bbox
+    pad = int(round((bottom - top) * padding))
+    height, width = shape[:2]
+    x_min, x_max = max(0, left - pad), min(width, right + pad)
+    y_min, y_max = max(0, top - pad), min(height, bottom + pad)
+    if x_max - x_min < 2 or y_max - y_min < 2:
+        return None
+    return [x_min, x_max, y_min, y_max]
+
+
+def should_refine(lines: Sequence[Dict], min_line_confidence: float = DEFAULT_MIN_LINE_CONFIDENCE,
+                  max_lines: int = DEFAULT_MAX_LINES) -> bool:
+    """Whether refinement is worth it: some weak lines, but few of them and not most of the receipt"""
+    weak = len(weak_line_indices(lines, min_line_confidence))
+    return 0 < weak <= max_lines and weak * 2 <= len(lines)
+
+
+def word_weighted_confidence(lines: Sequence[Dict]) -> float:
+    """Mean line confidence, each line weighted by its word count (Tesseract's scale)"""
+    weights = [max(1, len(line["text"].split())) for line in lines]
+    return sum(line["confidence"] * weight for line, weight in zip(lines, weights)) / sum(weights)
+
+
+def refine(result: Dict, image, recognizer: Recognizer, engine: str,
+           min_line_confidence: float = DEFAULT_MIN_LINE_CONFIDENCE,
+           max_lines: int = DEFAULT_MAX_LINES, padding: float = DEFAULT_PADDING) -> Dict:
+    """
+    Re-read the weak lines of ``result`` and merge them back
+
+    Args:
+        result: OCR result with "lines" carrying bboxes (not modified)
+        image: The image the boxes refer to
+        recognizer: Batch line recognizer (see Recognizer)
+        engine: Name recorded in ``refined_by``
+        max_lines: Re-read at most this many lines (weakest first)
+
+    Returns:
+        A copy of ``result`` with merged lines, text and confidence, plus
+        "refinement": {"engine", "attempted", "replaced", "original_confidence"}
+    """
+    lines = [dict(line) for line in result.get("lines") or []]
+    weak = sorted(weak_line_indices(lines, min_line_confidence),
+                  key=lambda index: lines[index]["confidence"])[:max_lines]
+
+    targets = []
+    for index in weak:
+        box = crop_box(lines[index]["bbox"], image.shape, padding)
+        if box is not None:
+            targets.append((index, box))
+
+    readings = recognizer(image, [box for _, box in targets]) if targets else []
+
+    replaced = 0
+    for (index, _), reading in zip(targets, readings):
+        if not reading:
+            continue
+        text, confidence = reading
+        line = lines[index]
+        if text and confidence > line["confidence"]:
+            lines[index] = {
+                **line,
+                "text": text,
+                "confidence": round(confidence, 4),
+                "refined_by": engine,
+                "original": {"text": line["text"], "confidence": line["confidence"]},
+            }
+            replaced += 1
+
+    refined = dict(result)
+    refined["lines"] = lines
+    refined["text"] = '\n'.join(line["text"] for line in lines)
+    refined["line_count"] = len(lines)
+    if replaced:
+        refined["confidence"] = word_weighted_confidence(lines)
+    refined["refinement"] = {"engine": engine, "attempted": len(targets), "replaced": replaced,
+                             "original_confidence": round(result.get("confidence", 0.0), 4)}
+    return refined
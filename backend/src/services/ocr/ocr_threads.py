@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Thread Budget for the OCR Processes
+
+One number sizes every thread pool an OCR process uses: PyTorch intra-op
+threads, OpenCV's pool, Paddle's CPU math threads and the OpenMP/BLAS pools
+behind NumPy, MKL, OpenBLAS and the tesseract binary.
+
+    threads per process = OCR_THREADS, or usable CPUs // OCR_WORKERS
+
+Usable CPUs honour the affinity mask and the cgroup CPU quota, so a
+container limited to 2 CPUs on a 32-core host gets 2. OCR_WORKERS is the
+number of OCR processes the backend runs at once, which keeps
+workers x threads within the machine. Processes that start their own pools
+(PDF page workers, tesseract batch) split their budget with split().
+
+The settings for CPUs without AVX2 (Sandy Bridge and older), where MKL's
+dispatcher and NNPACK kernels fail with SIGILL or "Unsupported hardware",
+are applied only when /proc/cpuinfo lacks avx2. OCR_SAFE_CPU=1 forces
+them, and OCR_SAFE_CPU=0 turns them off.
+
+configure_environment() must run before NumPy, OpenCV or PyTorch are
+imported, because OpenMP reads its variables once at load. apply_runtime()
+then sizes the pools of the libraries that are imported.
+
+Environment:
+    OCR_THREADS     Threads per OCR process, or 'auto' (default)
+    OCR_WORKERS     OCR processes running at once on this host (default: 1)
+    OCR_SAFE_CPU    '1' or '0' to force the no-AVX2 settings on or off (default: detect)
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional
+
+# Only set on CPUs that lack AVX2 (see module docstring)
+SAFE_CPU_SETTINGS = {
+    'MKL_SERVICE_FORCE_INTEL': '0',
+    'PYTORCH_NNPACK_DISABLE': '1',
+}
+
+# OpenMP/BLAS pool sizes read by the native libraries at load time
+THREAD_VARIABLES = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'OMP_THREAD_LIMIT')
+
+_applied: Dict = {}
+
+
+@lru_cache(maxsize=1)
+def cpu_flags() -> FrozenSet[str]:
+    """CPU feature flags from /proc/cpuinfo (empty where it is unavailable)"""
+    try:
+        with open('/proc/cpuinfo') as handle:
+            for line in handle:
+                if line.startswith('flags'):
+                    return frozenset(line.split(':', 1)[1].split())
+    except OSError:
+        pass
+    return frozenset()
+
+
+def needs_safe_cpu_settings() -> bool:
+    """Whether the no-AVX2 settings apply (OCR_SAFE_CPU overrides detection)"""
+    forced = os.environ.get('OCR_SAFE_CPU', '').lower()
+    if forced in ('1', 'true', 'yes'):
+        return True
+    if forced in ('0', 'false', 'no'):
+        return False
+    # Unknown flags (non-Linux, restricted /proc): keep the conservative settings
+    flags = cpu_flags()
+    return not flags or 'avx2' not in flags
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPUs allowed by the cgroup quota (v2 cpu.max, then v1 cfs files), if any"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as handle:
+            quota, period = handle.read().split()[:2]
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as handle:
+            quota = int(handle.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as handle:
+            period = int(handle.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+@lru_cache(maxsize=1)
+def usable_cpus() -> int:
+    """CPUs this process may actually use: affinity mask, capped by the cgroup quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, int(limit)))
+    return max(1, cpus)
+
+
+def thread_budget(workers: Optional[int] = None) -> int:
+    """Threads for one OCR process (OCR_THREADS, or usable CPUs shared by the workers)"""
+    configured = os.environ.get('OCR_THREADS', 'auto').lower()
+    if configured not in ('', 'auto'):
+        try:
+            return max(1, int(configured))
+        except ValueError:
+            pass
+
+    if workers is None:
+        try:
+            workers = int(os.environ.get('OCR_WORKERS', '1'))
+        except ValueError:
+            workers = 1
+    return max(1, usable_cpus() // max(1, workers))
+
+
+def split(threads: int, processes: int) -> int:
+    """Threads for each of ``processes`` children sharing a budget of ``threads``"""
+    return max(1, threads // max(1, processes))
+
+
+def configure_environment(threads: Optional[int] = None) -> Dict:
+    """
+    Export the thread budget (and, where needed, the no-AVX2 settings)
+
+    Call before NumPy/OpenCV/PyTorch are imported. Child processes inherit
+    the variables, so set OCR_THREADS for them with split() first if they
+    should share this process's budget.
+
+    Returns:
+        The applied settings, also reported by describe()
+    """
+    threads = threads or thread_budget()
+    for name in THREAD_VARIABLES:
+        os.environ[name] = str(threads)
+    os.environ['OCR_THREADS'] = str(threads)
+
+    # Keep MKL on the GNU OpenMP runtime that PyTorch/OpenCV already load
+    os.environ['MKL_THREADING_LAYER'] = 'GNU'
+    safe_cpu = needs_safe_cpu_settings()
+    if safe_cpu:
+        os.environ.update(SAFE_CPU_SETTINGS)
+
+    _applied.update({"threads": threads, "safe_cpu": safe_cpu})
+    return dict(_applied)
+
+
+def apply_runtime(torch=None, cv2=None, threads: Optional[int] = None) -> None:
+    """
+    Size the pools of already-imported libraries to the budget
+
+    PyTorch's inter-op pool is kept at one thread: the OCR models run their
+    operators in sequence, so extra inter-op threads only compete with the
+    intra-op ones.
+    """
+    threads = threads or _applied.get("threads") or thread_budget()
+    if torch is not None:
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # Only settable before the first parallel op; keep what is there
+    if cv2 is not None:
+        cv2.setNumThreads(threads)
+    _applied["threads"] = threads
+
+
+def describe() -> Dict:
+    """Thread settings for results and health reports"""
+    return {
+        "threads": _applied.get("threads") or thread_budget(),
+        "usable_cpus": usable_cpus(),
+        "avx2": 'avx2' in cpu_flags(),
+        "safe_cpu": _applied.get("safe_cpu", needs_safe_cpu_settings()),
+    }
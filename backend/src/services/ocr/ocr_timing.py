@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Per-Stage Timing and Profiling for the OCR Pipelines
+
+StageTimer records, for every preprocessing/recognition step:
+- wall time and process CPU time (all threads, so OpenCV's pool counts)
+- input and output image dimensions
+
+Optional extras, off by default because they slow the pipeline down:
+- cProfile: top functions by cumulative time across the whole run
+- tracemalloc: peak Python/NumPy allocation per step
+
+The report is returned as the ``timings`` block of a processor's JSON.
+"""
+
+import time
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+def image_dims(value: Any) -> Optional[List[int]]:
+    """[width, height(, channels)] of an image-like value (or first tuple item)"""
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    shape = getattr(value, 'shape', None)
+    if not shape or len(shape) < 2:
+        return None
+    return [int(shape[1]), int(shape[0])] + ([int(shape[2])] if len(shape) > 2 else [])
+
+
+class StageTimer:
+    """Collects structured timings for a sequence of named pipeline steps"""
+
+    def __init__(self, profile: bool = False, trace_memory: bool = False, profile_top: int = 15):
+        self.steps: List[Dict] = []
+        self.profile_top = profile_top
+        self.trace_memory = trace_memory
+        self._profiler = cProfile.Profile() if profile else None
+        self._started_tracemalloc = False
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    @contextmanager
+    def stage(self, name: str, input_image: Any = None) -> Iterator[Dict]:
+        """
+        Time an inline block; set ``record['output']`` inside it to report
+        output dimensions
+        """
+        record: Dict = {"step": name, "input": image_dims(input_image)}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_ms"] = round((time.perf_counter() - wall_start) * 1000, 2)
+            record["cpu_ms"] = round((time.process_time() - cpu_start) * 1000, 2)
+            if "output" in record:
+                record["output"] = image_dims(record["output"])
+            if self.trace_memory:
+                record["py_peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            self.steps.append(record)
+
+    def run(self, name: str, fn: Callable, image: Any, *args, **kwargs) -> Any:
+        """Call ``fn(image, *args, **kwargs)`` as a timed step and return its result"""
+        with self.stage(name, image) as record:
+            result = fn(image, *args, **kwargs)
+            record["output"] = result
+        return result
+
+    def report(self) -> Dict:
+        """The ``timings`` block: totals, per-step records and optional profile"""
+        if self._profiler is not None:
+            self._profiler.disable()
+
+        report: Dict = {
+            "total_ms": round((time.perf_counter() - self._wall_start) * 1000, 2),
+            "total_cpu_ms": round((time.process_time() - self._cpu_start) * 1000, 2),
+            "steps": self.steps
+        }
+
+        if self._profiler is not None:
+            stats = pstats.Stats(self._profiler)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            report["profile"] = [
+                {
+                    "function": f"{filename}:{line}({func})",
+                    "calls": call_count,
+                    "tottime_ms": round(tottime * 1000, 2),
+                    "cumtime_ms": round(cumtime * 1000, 2)
+                }
+                for (filename, line, func), (_, call_count, tottime, cumtime, _) in rows[:self.profile_top]
+            ]
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+        return report
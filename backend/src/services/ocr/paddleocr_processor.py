@@ -7,6 +7,23 @@ It accepts an image path and returns structured OCR results as JSON.
 
 Usage:
     python3 paddleocr_processor.py <image_path>
+    python3 paddleocr_processor.py - < receipt.jpg
+    python3 paddleocr_processor.py --serve
+    python3 paddleocr_processor.py --health
+
+Server mode (--serve):
+    Keeps PaddleOCR engines resident and reads newline-delimited JSON
+    requests from stdin, writing one JSON response line per request:
+        request:  {"id": 1, "image_path": "/path/receipt.jpg", "lang": "en"}
+    "image_shm" + "image_size" or "image_base64" can replace "image_path"
+    (see ocr_input.py).
+        response: {"id": 1, "text": "...", "confidence": 0.95, ...}
+    {"command": "ping"} is answered with {"pong": true};
+    {"command": "shutdown"} (or EOF on stdin) stops the worker.
+
+Black, blank or badly blurred captures are flagged before preprocessing
+(see ocr_quality.py). OCR_QUALITY_GATE (enforce|warn|off, default warn), or
+"quality_gate" in a server request, sets the gate mode; enforce rejects them.
 
 Output (JSON):
     {
@@ -16,71 +33,102 @@ Output (JSON):
         "processingTime": 1.23
     }
 
+Results are cached on disk by content hash (see ocr_cache.py); a cache hit
+returns before Paddle or OpenCV are imported. Set OCR_CACHE=off to disable.
+
 Requirements:
     pip install paddleocr paddlepaddle opencv-python
 """
 
+import os
 import sys
 import json
 import time
-from pathlib import Path
 
-try:
-    from paddleocr import PaddleOCR
-    import cv2
-    import numpy as np
-    PADDLEOCR_AVAILABLE = True
-except ImportError:
-    PADDLEOCR_AVAILABLE = False
+from ocr_cache import OCRResultCache
+import ocr_health
+import ocr_input
+import ocr_output
+import ocr_preprocessing
+import ocr_quality
+import ocr_threads
+
+# Thread budget for Paddle/OpenCV/BLAS, exported before paddle is imported
+ocr_threads.configure_environment()
+
+# Where PaddleOCR downloads its detector/classifier/recognizer models
+PADDLE_MODEL_DIR = os.path.join(os.path.expanduser("~"), ".paddleocr")
+
+# Heavy dependencies are imported by load_dependencies() on first real OCR
+# work, so cache hits and argument errors never pay the Paddle import.
+PaddleOCR = None
+cv2 = None
+np = None
+PADDLEOCR_AVAILABLE = None
+
+
+def load_dependencies():
+    """Import PaddleOCR/OpenCV/NumPy once; returns whether they are available."""
+    global PaddleOCR, cv2, np, PADDLEOCR_AVAILABLE
+    if PADDLEOCR_AVAILABLE is not None:
+        return PADDLEOCR_AVAILABLE
+    
+    try:
+        from paddleocr import PaddleOCR
+        import cv2
+        import numpy as np
+        ocr_threads.apply_runtime(cv2=cv2)
+        PADDLEOCR_AVAILABLE = True
+    except ImportError:
+        PADDLEOCR_AVAILABLE = False
+    return PADDLEOCR_AVAILABLE
+
+
+# Resident PaddleOCR engines, keyed by language and constructor options.
+# Building an engine loads the detector, classifier and recognizer models,
+# so it is done once per key for the lifetime of the process.
+_ENGINE_CACHE = {}
 
 
-def preprocess_image(image_path):
+def get_engine(lang='en', **options):
     """
-    Preprocess image for better OCR results.
-    Applies deskewing, contrast enhancement, and noise reduction.
+    Return a cached PaddleOCR engine for the given language and options,
+    constructing it on first use.
     """
-    img = cv2.imread(image_path)
-    
-    # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    
-    # Apply adaptive thresholding for better contrast
-    binary = cv2.adaptiveThreshold(
-        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-        cv2.THRESH_BINARY, 11, 2
-    )
-    
-    # Denoise
-    denoised = cv2.fastNlMeansDenoising(binary)
-    
-    # Deskewing (simple rotation correction)
-    coords = np.column_stack(np.where(denoised > 0))
-    if len(coords) > 0:
-        angle = cv2.minAreaRect(coords)[-1]
-        if angle < -45:
-            angle = -(90 + angle)
-        else:
-            angle = -angle
-        
-        if abs(angle) > 0.5:  # Only rotate if necessary
-            (h, w) = denoised.shape
-            center = (w // 2, h // 2)
-            M = cv2.getRotationMatrix2D(center, angle, 1.0)
-            denoised = cv2.warpAffine(
-                denoised, M, (w, h),
-                flags=cv2.INTER_CUBIC,
-                borderMode=cv2.BORDER_REPLICATE
-            )
+    key = (lang, tuple(sorted(options.items())))
+    engine = _ENGINE_CACHE.get(key)
+    if engine is None:
+        ocr_output.log(f"[PaddleOCR] Loading engine: lang={lang}, options={options}")
+        # Minimal parameters by default (server has older version); Paddle's
+        # CPU math pool follows the thread budget unless a request overrides it
+        engine = PaddleOCR(lang=lang, **{"cpu_threads": ocr_threads.thread_budget(), **options})
+        _ENGINE_CACHE[key] = engine
+    return engine
+
+
+def preprocess_image(image_path, timer=None):
+    """
+    Preprocess image for better OCR results.
+    Applies adaptive thresholding, speckle removal and deskewing: the shared
+    "paddleocr" preprocessing profile (see ocr_preprocessing.py).
     
-    return denoised
+    The result is a pipeline buffer, valid until the next call in this thread.
+    """
+    pipeline = ocr_preprocessing.get_pipeline("paddleocr")
+    return pipeline.run(pipeline.load(image_path, timer), timer)
 
 
-def process_receipt(image_path):
+def process_receipt(image_path, lang='en', engine_options=None, quality_gate=None):
     """
     Process receipt image with PaddleOCR.
     Returns OCR results with confidence scores.
+    
+    The engine comes from the module-level cache, so repeated calls in
+    one process (server mode) only pay for preprocessing and inference.
+    An image rejected by the quality gate returns an "error" with the
+    verdict under "quality", before the engine runs.
     """
-    if not PADDLEOCR_AVAILABLE:
+    if not load_dependencies():
         return {
             "error": "PaddleOCR not installed. Please run: pip install paddleocr paddlepaddle opencv-python",
             "available": False
@@ -89,60 +137,26 @@ def process_receipt(image_path):
     start_time = time.time()
     
     try:
-        # Initialize PaddleOCR with minimal parameters (server has older version)
-        ocr = PaddleOCR(lang='en')
-        
-        # Preprocess image
-        preprocessed = preprocess_image(image_path)
-        
-        # Run OCR
-        result = ocr.ocr(preprocessed, cls=True)
-        
-        if not result or not result[0]:
-            return {
-                "text": "",
-                "confidence": 0.0,
-                "words": [],
-                "processingTime": time.time() - start_time,
-                "available": True
-            }
-        
-        # Extract text and confidence
-        words = []
-        full_text_lines = []
-        total_confidence = 0.0
-        word_count = 0
-        
-        for line in result[0]:
-            if line and len(line) >= 2:
-                text = line[1][0]
-                confidence = line[1][1]
-                bbox = line[0]
-                
-                words.append({
-                    "text": text,
-                    "confidence": float(confidence),
-                    "bbox": [[float(x), float(y)] for x, y in bbox]
-                })
-                
-                full_text_lines.append(text)
-                total_confidence += confidence
-                word_count += 1
-        
-        # Calculate average confidence
-        avg_confidence = total_confidence / word_count if word_count > 0 else 0.0
+        # Decode (path or encoded bytes) and gate before building the engine
+        image = ocr_preprocessing.get_pipeline("paddleocr").load(image_path)
+        quality = ocr_quality.check(image, quality_gate)
         
-        processing_time = time.time() - start_time
+        result = recognize_image(image, lang=lang, engine_options=engine_options)
+        result["processingTime"] = float(time.time() - start_time)
+        result["quality"] = quality
+        return result
         
+    except ocr_quality.QualityRejected as e:
+        ocr_output.log(f"[PaddleOCR] {e}", 'warning')
         return {
-            "text": "\n".join(full_text_lines),
-            "confidence": float(avg_confidence),
-            "words": words,
-            "processingTime": float(processing_time),
+            "error": str(e),
+            "text": "",
+            "confidence": 0.0,
+            "words": [],
+            "processingTime": time.time() - start_time,
             "available": True,
-            "wordCount": word_count
+            "quality": e.verdict
         }
-        
     except Exception as e:
         return {
             "error": str(e),
@@ -154,30 +168,181 @@ def process_receipt(image_path):
         }
 
 
-def check_availability():
-    """Check if PaddleOCR is available and working."""
+def recognize_image(image, lang='en', engine_options=None, timer=None):
+    """
+    Preprocess and OCR an already decoded image (BGR or grayscale).
+    Used by process_receipt() and by the engine cascade, which decodes
+    once for every tier; the image is not modified. Raises on errors.
+    """
+    start_time = time.time()
+    ocr = get_engine(lang, **(engine_options or {}))
+    
+    # Preprocess image
+    preprocessed = ocr_preprocessing.get_pipeline("paddleocr").run(image, timer)
+    
+    # Run OCR
+    result = ocr.ocr(preprocessed, cls=True)
+    
+    if not result or not result[0]:
+        return {
+            "text": "",
+            "confidence": 0.0,
+            "words": [],
+            "processingTime": time.time() - start_time,
+            "available": True
+        }
+    
+    # Extract text and confidence
+    words = []
+    full_text_lines = []
+    total_confidence = 0.0
+    word_count = 0
+    
+    for line in result[0]:
+        if line and len(line) >= 2:
+            text = line[1][0]
+            confidence = line[1][1]
+            bbox = line[0]
+            
+            words.append({
+                "text": text,
+                "confidence": float(confidence),
+                "bbox": [[float(x), float(y)] for x, y in bbox]
+            })
+            
+            full_text_lines.append(text)
+            total_confidence += confidence
+            word_count += 1
+    
+    # Calculate average confidence
+    avg_confidence = total_confidence / word_count if word_count > 0 else 0.0
+    
+    processing_time = time.time() - start_time
+    
     return {
-        "available": PADDLEOCR_AVAILABLE,
-        "version": "2.7.0" if PADDLEOCR_AVAILABLE else None,
-        "gpu_available": False  # TODO: Check actual GPU availability
+        "text": "\n".join(full_text_lines),
+        "confidence": float(avg_confidence),
+        "words": words,
+        "processingTime": float(processing_time),
+        "available": True,
+        "wordCount": word_count
     }
 
 
+def check_availability():
+    """
+    Check if PaddleOCR is available, from package metadata only.
+    Does not import paddle, so it returns in milliseconds.
+    """
+    started = time.perf_counter()
+    report = ocr_health.build_report(
+        "paddleocr",
+        ["paddleocr", "paddle", "cv2", "numpy"],
+        models={"paddleocr": ocr_health.directory_info(PADDLE_MODEL_DIR, "**/*.pdiparams")},
+        started=started
+    )
+    report["version"] = report["packages"]["paddleocr"]["version"]
+    report["gpu_available"] = False  # TODO: Check actual GPU availability
+    return report
+
+
+def process_receipt_cached(image_path, cache, lang='en', engine_options=None, quality_gate=None):
+    """
+    process_receipt() through the result cache.
+    Only successful results (no "error" key) are stored.
+    """
+    options = dict(engine_options or {}, preprocess_steps=ocr_preprocessing.profile_steps("paddleocr"),
+                   quality_gate=ocr_quality.gate_mode(quality_gate))
+    key = cache.make_key(image_path, "paddleocr", [lang], options,
+                         code_path=(__file__, ocr_preprocessing.__file__, ocr_quality.__file__))
+    result = cache.get(key)
+    if result is not None:
+        return cache.annotate(result, hit=True)
+    
+    result = process_receipt(image_path, lang=lang, engine_options=engine_options,
+                             quality_gate=quality_gate)
+    if "error" not in result:
+        cache.put(key, result)
+    return cache.annotate(result, hit=False)
+
+
+def emit(payload):
+    """Write a single JSON line to stdout and flush it (server mode framing)"""
+    ocr_output.emit(payload)
+
+
+def serve():
+    """
+    Long-lived worker loop: newline-delimited JSON requests on stdin.
+    Engines are built lazily on first use and reused for every request.
+    """
+    cache = OCRResultCache()
+    emit({"ready": True, "provider": "paddleocr", "available": load_dependencies(), "pid": os.getpid()})
+    
+    for raw_line in sys.stdin:
+        raw_line = raw_line.strip()
+        if not raw_line:
+            continue
+        
+        try:
+            request = json.loads(raw_line)
+            if not isinstance(request, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            emit({"id": None, "error": f"Invalid request: {str(e)}"})
+            continue
+        
+        request_id = request.get("id")
+        command = request.get("command", "ocr")
+        
+        if command == "shutdown":
+            break
+        if command == "ping":
+            emit({"id": request_id, "pong": True})
+            continue
+        
+        try:
+            with ocr_input.request_source(request) as source:
+                if not ocr_input.source_exists(source):
+                    raise FileNotFoundError(f"Image file not found: {ocr_input.describe(source)}")
+                result = process_receipt_cached(
+                    source,
+                    cache,
+                    lang=request.get("lang", "en"),
+                    engine_options=request.get("options"),
+                    quality_gate=request.get("quality_gate")
+                )
+        except Exception as e:
+            # Missing file or segment, bad base64, unknown gate mode, malformed
+            # options: fail this request, never the worker other callers share
+            result = {"error": str(e)}
+        result["id"] = request_id
+        emit(result)
+
+
 if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--serve":
+        serve()
+        sys.exit(0)
+    
+    if len(sys.argv) >= 2 and sys.argv[1] == "--health":
+        ocr_health.print_report(check_availability())
+    
     if len(sys.argv) < 2:
         print(json.dumps({"error": "No image path provided"}))
         sys.exit(1)
     
-    image_path = sys.argv[1]
+    # "-" reads the encoded image from stdin
+    image_path = ocr_input.cli_source(sys.argv[1])
     
     # Check if file exists
-    if not Path(image_path).exists():
-        print(json.dumps({"error": f"Image file not found: {image_path}"}))
+    if not ocr_input.source_exists(image_path):
+        print(json.dumps({"error": f"Image file not found: {ocr_input.describe(image_path)}"}))
         sys.exit(1)
     
     # Process image
-    result = process_receipt(image_path)
+    result = process_receipt_cached(image_path, OCRResultCache())
     
     # Output JSON
-    print(json.dumps(result, indent=2))
+    ocr_output.print_result(result)
 
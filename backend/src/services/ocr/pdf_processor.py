@@ -5,42 +5,130 @@ PDF Receipt Processor with EasyOCR Integration
 Converts PDF receipts to images and runs EasyOCR on each page.
 Supports both single-page and multi-page PDFs.
 
+Born-digital pages are read straight from the embedded text layer (PyPDF2)
+when it is usable; only the remaining pages are rasterized and OCR'd. Each
+page result carries "source": "text-layer" or "ocr".
+
+Pages are rasterized, preprocessed and OCR'd a bounded window at a time
+(--page-window, default 1), so peak memory does not grow with page count.
+
+--page-workers N OCRs pages in N worker processes, each with its own
+EasyOCR Reader (roughly 300-500MB each), rendering and recognizing its pages
+independently; 0 picks one worker per OCR'd page. Either way the count is
+capped at the thread budget (usable CPUs // OCR_WORKERS, see ocr_threads.py).
+Page results are always returned (and streamed) in page order.
+
+--adaptive-dpi renders each scanned page at a cheap preview DPI first to
+find the content bounding box, then renders only that region at the DPI
+that fills EasyOCR's detector canvas (bounded by --dpi). Pages that look
+blank are rendered whole at the minimum adaptive DPI and still OCR'd.
+
 Usage:
     python3 pdf_processor.py <pdf_path> [--dpi 300] [--lang en] [--gpu false]
+    python3 pdf_processor.py <pdf_path> --stream [--page-window 2]
+    python3 pdf_processor.py <pdf_path> --page-workers 4
+    python3 pdf_processor.py --health
+
+With --stream, each page result is printed as its own JSON line as soon as
+the page is done, followed by the usual combined result as the last line.
+
+Results are cached on disk by content hash (see ocr_cache.py); a cache hit
+returns before pdf2image, EasyOCR or OpenCV are imported. Pass --no-cache
+(or set OCR_CACHE=off) to always recompute. Results with a failed page
+("partial": true, see metadata.failed_pages) are not cached.
 """
 
+from __future__ import annotations
+
+import os
 import sys
+import re
 import json
+import time
 import argparse
+import subprocess
 import tempfile
 import warnings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
 
-try:
-    from pdf2image import convert_from_path
-    import easyocr
-    import cv2
-    import numpy as np
-except ImportError as e:
-    print(json.dumps({
-        "success": False,
-        "error": f"Missing dependency: {str(e)}. Install: pip install pdf2image easyocr",
-        "text": "",
-        "confidence": 0.0,
-        "provider": "easyocr-pdf",
-        "pages": []
-    }))
-    sys.exit(1)
+# Thread budget and no-AVX2 settings, exported before torch is imported
+import ocr_threads
+ocr_threads.configure_environment()
+
+from ocr_cache import OCRResultCache
+import ocr_health
+import ocr_output
+from ocr_timing import StageTimer
+import ocr_preprocessing
+
+# Where EasyOCR keeps the CRAFT detector and recognizer weights
+MODEL_STORAGE_DIR = '/tmp/easyocr_models'
+
+# Heavy dependencies are imported by load_dependencies() on first real work,
+# so cache hits and argument errors never pay the PyTorch import.
+convert_from_path = None
+pdfinfo_from_path = None
+easyocr = None
+cv2 = None
+np = None
+PdfReader = None
+
+
+def load_dependencies() -> None:
+    """Import pdf2image/EasyOCR/OpenCV/NumPy once; exits with a JSON error if missing"""
+    global convert_from_path, pdfinfo_from_path, easyocr, cv2, np, PdfReader
+    if easyocr is not None:
+        return
+    
+    try:
+        from pdf2image import convert_from_path, pdfinfo_from_path
+        import easyocr
+        import cv2
+        import numpy as np
+    except ImportError as e:
+        print(json.dumps({
+            "success": False,
+            "error": f"Missing dependency: {str(e)}. Install: pip install pdf2image easyocr",
+            "text": "",
+            "confidence": 0.0,
+            "provider": "easyocr-pdf",
+            "pages": []
+        }))
+        sys.exit(1)
+    
+    ocr_threads.apply_runtime(torch=sys.modules.get('torch'), cv2=cv2)
+    
+    # Optional: text-layer fast path for born-digital PDFs
+    try:
+        from PyPDF2 import PdfReader
+    except ImportError:
+        PdfReader = None
 
 
 class PDFProcessor:
-    """PDF to Image converter with OCR"""
+    """PDF to Image converter with OCR (text-layer fast path for digital PDFs)"""
+    
+    # Minimum characters and usability score for a page's embedded text to be trusted
+    MIN_TEXT_LAYER_CHARS = 20
+    MIN_TEXT_LAYER_SCORE = 0.8
+    
+    # Adaptive rendering: preview resolution, lowest render DPI (keeps glyphs
+    # tall enough for the recognizer) and margin kept around the content
+    PREVIEW_DPI = 50
+    MIN_ADAPTIVE_DPI = 150
+    CONTENT_MARGIN_INCHES = 0.1
     
-    def __init__(self, languages: List[str] = ['en'], gpu: bool = False, dpi: int = 300):
+    def __init__(self, languages: List[str] = ['en'], gpu: bool = False, dpi: int = 300,
+                 page_window: int = 1, use_text_layer: bool = True,
+                 profile: bool = False, trace_memory: bool = False,
+                 page_workers: int = 1, adaptive_dpi: bool = False,
+                 canvas_size: int = 2560):
         """
         Initialize PDF processor with EasyOCR
         
@@ -48,92 +136,314 @@ class PDFProcessor:
             languages: List of language codes for OCR
             gpu: Whether to use GPU acceleration
             dpi: DPI for PDF to image conversion (higher = better quality, slower)
+            page_window: Pages rasterized per poppler call (bounds peak memory)
+            use_text_layer: Read usable embedded text instead of OCR'ing the page
+            profile: Add cProfile top functions to each OCR'd page's timings
+            trace_memory: Add per-step tracemalloc peaks to each page's timings
+            page_workers: Worker processes for OCR'd pages (1 = in-process,
+                0 = one per OCR'd page; capped at the thread budget)
+            adaptive_dpi: Render only each page's content region, at the DPI
+                that fills the detector canvas (``dpi`` becomes the maximum)
+            canvas_size: EasyOCR detector canvas (longest side, pixels)
         """
+        load_dependencies()
+        
         self.dpi = dpi
         self.languages = languages
+        self.gpu = gpu
+        self.page_window = max(1, page_window)
+        self.use_text_layer = use_text_layer and PdfReader is not None
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.page_workers = page_workers
+        self.adaptive_dpi = adaptive_dpi
+        self.canvas_size = canvas_size
+        self._reader = None
+    
+    @property
+    def reader(self):
+        """EasyOCR reader, loaded on first OCR'd page (text-layer PDFs never load it)"""
+        if self._reader is None:
+            ocr_output.log(f"[PDF-OCR] Initializing EasyOCR with languages: {self.languages}, GPU: {self.gpu}, DPI: {self.dpi}")
+            
+            self._reader = easyocr.Reader(
+                self.languages,
+                gpu=self.gpu,
+                model_storage_directory=MODEL_STORAGE_DIR,
+                download_enabled=True,
+                verbose=False
+            )
+            
+            ocr_output.log("[PDF-OCR] Reader initialized successfully")
+        return self._reader
+    
+    @staticmethod
+    def score_text_layer(text: str) -> float:
+        """
+        Score how usable an extracted text layer is (0-1)
         
-        print(f"[PDF-OCR] Initializing EasyOCR with languages: {languages}, GPU: {gpu}, DPI: {dpi}", file=sys.stderr)
+        Penalizes unmapped glyphs ((cid:NN) runs, U+FFFD, control characters),
+        which is what scanned PDFs with junk OCR layers or broken font
+        encodings produce.
+        """
+        stripped = text.strip()
+        if len(stripped) < PDFProcessor.MIN_TEXT_LAYER_CHARS:
+            return 0.0
         
-        # Initialize EasyOCR reader
-        self.reader = easyocr.Reader(
-            languages,
-            gpu=gpu,
-            model_storage_directory='/tmp/easyocr_models',
-            download_enabled=True,
-            verbose=False
+        cid_chars = sum(len(match) for match in re.findall(r'\(cid:\d+\)', stripped))
+        bad_chars = sum(
+            1 for ch in stripped
+            if ch == '\ufffd' or (not ch.isprintable() and ch not in '\n\t')
         )
+        good_chars = sum(1 for ch in stripped if ch.isalnum())
         
-        print("[PDF-OCR] Reader initialized successfully", file=sys.stderr)
+        # Receipts are mostly letters/digits; a text layer without them is not a receipt text layer
+        if good_chars < PDFProcessor.MIN_TEXT_LAYER_CHARS // 2:
+            return 0.0
+        
+        return max(0.0, 1.0 - (cid_chars + bad_chars) / len(stripped))
     
-    def convert_pdf_to_images(self, pdf_path: str) -> List[np.ndarray]:
+    def extract_text_layer(self, pdf_path: str) -> Dict[int, Tuple[str, float]]:
         """
-        Convert PDF pages to images
+        Extract usable embedded text per page
         
-        Args:
-            pdf_path: Path to PDF file
-            
         Returns:
-            List of images (one per page) as numpy arrays
+            Mapping of 1-indexed page number to (text, score) for pages whose
+            text layer passes MIN_TEXT_LAYER_SCORE; other pages are omitted
         """
+        if not self.use_text_layer:
+            return {}
+        
+        usable = {}
         try:
-            # Convert PDF to images (one per page)
-            # Uses poppler under the hood
+            pdf = PdfReader(pdf_path)
+            for page_num, page in enumerate(pdf.pages, start=1):
+                try:
+                    text = page.extract_text() or ''
+                except Exception as e:
+                    ocr_output.log(f"[PDF-OCR] Text layer unreadable on page {page_num}: {str(e)}", 'warning')
+                    continue
+                
+                score = self.score_text_layer(text)
+                if score >= self.MIN_TEXT_LAYER_SCORE:
+                    usable[page_num] = (text, score)
+        except Exception as e:
+            ocr_output.log(f"[PDF-OCR] Text layer extraction failed, using OCR for all pages: {str(e)}", 'warning')
+            return {}
+        
+        ocr_output.log(f"[PDF-OCR] Usable text layer on {len(usable)} page(s)", 'debug')
+        return usable
+    
+    @staticmethod
+    def text_layer_page_result(page_num: int, text: str, score: float) -> Dict:
+        """Build a page result from embedded text, matching the OCR page schema"""
+        text_lines = [line.strip() for line in text.splitlines() if line.strip()]
+        return {
+            "page": page_num,
+            "text": '\n'.join(text_lines),
+            "confidence": round(score, 4),
+            "line_count": len(text_lines),
+            "lines": [{"text": line, "confidence": round(score, 4)} for line in text_lines],
+            "source": "text-layer"
+        }
+    
+    @staticmethod
+    def _to_bgr(pil_img) -> np.ndarray:
+        """Convert a PIL page image to OpenCV BGR format"""
+        img_array = np.array(pil_img)
+        
+        # Convert RGB to BGR (OpenCV format)
+        if len(img_array.shape) == 3 and img_array.shape[2] == 3:
+            img_array = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+        
+        return img_array
+    
+    def get_page_count(self, pdf_path: str) -> int:
+        """Read the page count from the PDF header via poppler's pdfinfo"""
+        return int(pdfinfo_from_path(pdf_path)["Pages"])
+    
+    def iter_pdf_pages(self, pdf_path: str,
+                       page_numbers: Optional[List[int]] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Rasterize a PDF lazily, ``page_window`` pages per poppler call
+        
+        Only the current window is held in memory; each PIL page is released
+        as soon as its BGR copy has been made.
+        
+        Args:
+            pdf_path: Path to PDF file
+            page_numbers: Ascending 1-indexed pages to render (default: all)
+        
+        Yields:
+            (page_number, image) with 1-indexed page numbers
+        """
+        if page_numbers is None:
+            page_numbers = list(range(1, self.get_page_count(pdf_path) + 1))
+        
+        start = 0
+        while start < len(page_numbers):
+            # Window = run of consecutive pages, at most page_window long
+            end = start
+            while (end + 1 < len(page_numbers) and end + 1 - start < self.page_window and
+                   page_numbers[end + 1] == page_numbers[end] + 1):
+                end += 1
+            first_page, last_page = page_numbers[start], page_numbers[end]
+            start = end + 1
+            
             pil_images = convert_from_path(
                 pdf_path,
                 dpi=self.dpi,
                 fmt='png',
-                thread_count=2  # Parallel processing for multi-page PDFs
+                first_page=first_page,
+                last_page=last_page,
+                thread_count=min(2, last_page - first_page + 1)
             )
             
-            # Convert PIL images to OpenCV format (numpy arrays)
-            cv_images = []
-            for pil_img in pil_images:
-                # Convert PIL to numpy array
-                img_array = np.array(pil_img)
-                
-                # Convert RGB to BGR (OpenCV format)
-                if len(img_array.shape) == 3 and img_array.shape[2] == 3:
-                    img_array = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-                
-                cv_images.append(img_array)
+            for offset in range(len(pil_images)):
+                image = self._to_bgr(pil_images[offset])
+                pil_images[offset] = None
+                yield first_page + offset, image
+                del image
+    
+    @staticmethod
+    def render_page(pdf_path: str, page_num: int, dpi: int,
+                    crop: Optional[Tuple[int, int, int, int]] = None, gray: bool = False) -> np.ndarray:
+        """
+        Render one page (optionally a pixel region of it) with pdftoppm
+        
+        The PPM/PGM stream is read from pdftoppm's stdout and decoded in
+        memory; nothing touches the filesystem.
+        
+        Args:
+            crop: (x, y, width, height) in pixels at ``dpi``
+            gray: Render a single-channel image
+        """
+        command = ['pdftoppm', '-r', str(dpi), '-f', str(page_num), '-l', str(page_num)]
+        if gray:
+            command.append('-gray')
+        if crop is not None:
+            x, y, width, height = crop
+            command += ['-x', str(x), '-y', str(y), '-W', str(width), '-H', str(height)]
+        command.append(pdf_path)
+        
+        completed = subprocess.run(command, capture_output=True, timeout=120)
+        if completed.returncode != 0:
+            raise RuntimeError(f"pdftoppm failed on page {page_num}: "
+                               f"{completed.stderr.decode('utf-8', 'replace').strip()}")
+        
+        flags = cv2.IMREAD_GRAYSCALE if gray else cv2.IMREAD_COLOR
+        image = cv2.imdecode(np.frombuffer(completed.stdout, np.uint8), flags)
+        if image is None:
+            raise RuntimeError(f"pdftoppm returned no image for page {page_num}")
+        return image
+    
+    @staticmethod
+    def content_bbox(preview: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Bounding box (x, y, width, height) of ink on a grayscale preview
+        
+        Ink is anything clearly darker than its neighbourhood (adaptive
+        threshold), so a receipt scanned on a dark bed is found by its text
+        and paper edge rather than compared against the bed's median. Rows
+        and columns need at least two ink pixels, which drops isolated
+        specks. Returns None for a blank page.
+        """
+        ink = cv2.adaptiveThreshold(preview, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 20) > 0
+        rows = np.flatnonzero(np.count_nonzero(ink, axis=1) >= 2)
+        cols = np.flatnonzero(np.count_nonzero(ink, axis=0) >= 2)
+        if len(rows) == 0 or len(cols) == 0:
+            return None
+        return int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1)
+    
+    def render_page_adaptive(self, pdf_path: str, page_num: int) -> Tuple[np.ndarray, Dict]:
+        """
+        Render only the content region of a page, at a DPI picked for the detector
+        
+        A PREVIEW_DPI grayscale render locates the content. The region's
+        longest side is then rendered at ``canvas_size`` pixels, clamped to
+        [MIN_ADAPTIVE_DPI, dpi], since EasyOCR would downscale anything larger.
+        A page that looks blank is still rendered whole at MIN_ADAPTIVE_DPI
+        and OCR'd, in case the preview missed faint text.
+        
+        Returns:
+            (image, render info)
+        """
+        preview = self.render_page(pdf_path, page_num, self.PREVIEW_DPI, gray=True)
+        page_height_in = preview.shape[0] / self.PREVIEW_DPI
+        page_width_in = preview.shape[1] / self.PREVIEW_DPI
+        
+        bbox = self.content_bbox(preview)
+        if bbox is None:
+            ocr_output.log(f"[PDF-OCR] Page {page_num}: no content found in preview, rendering whole page", 'debug')
+            image = self.render_page(pdf_path, page_num, self.MIN_ADAPTIVE_DPI)
+            return image, {"dpi": self.MIN_ADAPTIVE_DPI, "blank": True}
+        
+        # Content region in inches, with a margin, clamped to the page
+        margin = self.CONTENT_MARGIN_INCHES
+        left = max(0.0, bbox[0] / self.PREVIEW_DPI - margin)
+        top = max(0.0, bbox[1] / self.PREVIEW_DPI - margin)
+        right = min(page_width_in, (bbox[0] + bbox[2]) / self.PREVIEW_DPI + margin)
+        bottom = min(page_height_in, (bbox[1] + bbox[3]) / self.PREVIEW_DPI + margin)
+        
+        longest_in = max(right - left, bottom - top)
+        dpi = int(max(self.MIN_ADAPTIVE_DPI, min(self.dpi, self.canvas_size / longest_in)))
+        crop = (int(left * dpi), int(top * dpi),
+                max(1, int((right - left) * dpi)), max(1, int((bottom - top) * dpi)))
+        
+        image = self.render_page(pdf_path, page_num, dpi, crop=crop)
+        content_fraction = ((right - left) * (bottom - top)) / (page_width_in * page_height_in)
+        ocr_output.log(f"[PDF-OCR] Page {page_num}: rendering {content_fraction:.0%} of the page at {dpi} DPI", 'debug')
+        
+        return image, {"dpi": dpi, "crop": list(crop), "content_fraction": round(content_fraction, 3)}
+    
+    def ocr_single_page(self, pdf_path: str, page_num: int) -> Dict:
+        """Render and OCR one page on its own (adaptive mode and page workers)"""
+        if not self.adaptive_dpi:
+            _, image = next(self.iter_pdf_pages(pdf_path, [page_num]))
+            return self.extract_text_from_image(image, page_num)
+        
+        image, render = self.render_page_adaptive(pdf_path, page_num)
+        page_result = self.extract_text_from_image(image, page_num)
+        page_result["render"] = render
+        return page_result
+    
+    def convert_pdf_to_images(self, pdf_path: str) -> List[np.ndarray]:
+        """
+        Convert PDF pages to images
+        
+        Materializes every page; prefer iter_pdf_pages() for large documents.
+        
+        Args:
+            pdf_path: Path to PDF file
             
-            print(f"[PDF-OCR] Converted {len(cv_images)} pages from PDF", file=sys.stderr)
+        Returns:
+            List of images (one per page) as numpy arrays
+        """
+        try:
+            cv_images = [image for _, image in self.iter_pdf_pages(pdf_path)]
+            ocr_output.log(f"[PDF-OCR] Converted {len(cv_images)} pages from PDF", 'debug')
             return cv_images
             
         except Exception as e:
-            print(f"[PDF-OCR] Error converting PDF: {str(e)}", file=sys.stderr)
+            ocr_output.log(f"[PDF-OCR] Error converting PDF: {str(e)}", 'error')
             raise
     
-    def preprocess_image(self, image: np.ndarray) -> np.ndarray:
+    def preprocess_image(self, image: np.ndarray, timer: Optional[StageTimer] = None) -> np.ndarray:
         """
         Preprocess image for better OCR accuracy
         
+        Grayscale, bilateral denoise and adaptive threshold: the shared
+        "easyocr-pdf" preprocessing profile (see ocr_preprocessing.py).
+        
         Args:
             image: Image as numpy array
+            timer: Optional StageTimer that records each step
             
         Returns:
-            Preprocessed image
+            Preprocessed image (a pipeline buffer, valid until the next
+            preprocess_image() call in this thread)
         """
-        # Convert to grayscale if color
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
-        
-        # Denoise
-        denoised = cv2.bilateralFilter(gray, 9, 75, 75)
-        
-        # Adaptive threshold for text enhancement
-        enhanced = cv2.adaptiveThreshold(
-            denoised,
-            255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY,
-            11,
-            2
-        )
-        
-        return enhanced
+        return ocr_preprocessing.get_pipeline("easyocr-pdf").run(image, timer)
     
     def extract_text_from_image(self, image: np.ndarray, page_num: int) -> Dict:
         """
@@ -146,12 +456,16 @@ class PDFProcessor:
         Returns:
             Dictionary with extracted text and metadata
         """
+        timer = StageTimer(profile=self.profile, trace_memory=self.trace_memory)
         try:
             # Preprocess
-            preprocessed = self.preprocess_image(image)
+            preprocessed = self.preprocess_image(image, timer)
             
             # Run EasyOCR
-            results = self.reader.readtext(
+            reader = self.reader
+            results = timer.run(
+                "recognition",
+                reader.readtext,
                 preprocessed,
                 detail=1,
                 paragraph=False,
@@ -159,7 +473,7 @@ class PDFProcessor:
                 text_threshold=0.7,
                 low_text=0.4,
                 link_threshold=0.4,
-                canvas_size=2560,
+                canvas_size=self.canvas_size,
                 mag_ratio=1.5
             )
             
@@ -184,7 +498,8 @@ class PDFProcessor:
                 "lines": [
                     {"text": text, "confidence": round(conf, 4)}
                     for text, conf in zip(text_lines, confidences)
-                ]
+                ],
+                "timings": timer.report()
             }
             
         except Exception as e:
@@ -194,24 +509,84 @@ class PDFProcessor:
                 "confidence": 0.0,
                 "error": str(e),
                 "line_count": 0,
-                "lines": []
+                "lines": [],
+                "timings": timer.report()
             }
     
-    def process_pdf(self, pdf_path: str) -> Dict:
+    def resolve_page_workers(self, page_count: int) -> int:
+        """
+        Number of page worker processes to use for ``page_count`` OCR'd pages
+        
+        Never more than this process's thread budget (affinity, cgroup quota
+        and OCR_WORKERS applied), so workers x threads do not oversubscribe.
+        """
+        budget = ocr_threads.thread_budget()
+        workers = self.page_workers if self.page_workers > 0 else budget
+        return max(1, min(workers, budget, page_count))
+    
+    def ocr_pages_sequential(self, pdf_path: str, page_numbers: List[int],
+                             page_count: int) -> Iterator[Tuple[int, Dict]]:
+        """OCR pages in this process, one rasterized window at a time"""
+        if self.adaptive_dpi:
+            for page_num in page_numbers:
+                ocr_output.log(f"[PDF-OCR] Processing page {page_num}/{page_count}", 'debug')
+                yield page_num, self.ocr_single_page(pdf_path, page_num)
+            return
+        
+        for page_num, image in self.iter_pdf_pages(pdf_path, page_numbers):
+            ocr_output.log(f"[PDF-OCR] Processing page {page_num}/{page_count}", 'debug')
+            page_result = self.extract_text_from_image(image, page_num)
+            del image
+            yield page_num, page_result
+    
+    def ocr_pages_parallel(self, pdf_path: str, page_numbers: List[int],
+                           workers: int) -> Iterator[Tuple[int, Dict]]:
+        """
+        OCR pages across worker processes, yielding results in page order
+        
+        Each worker renders and recognizes its own pages, so only page
+        numbers and result dicts cross process boundaries. Workers are
+        spawned rather than forked because PyTorch is already imported here.
+        This process's thread budget is split between the workers.
+        """
+        ocr_output.log(f"[PDF-OCR] OCR'ing {len(page_numbers)} pages on {workers} worker processes")
+        
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_page_worker,
+            initargs=({
+                "languages": self.languages, "gpu": self.gpu, "dpi": self.dpi,
+                "profile": self.profile, "trace_memory": self.trace_memory,
+                "adaptive_dpi": self.adaptive_dpi, "canvas_size": self.canvas_size,
+                "threads": ocr_threads.split(ocr_threads.thread_budget(), workers)
+            },)
+        )
+        try:
+            futures = [(page_num, pool.submit(_ocr_page, pdf_path, page_num)) for page_num in page_numbers]
+            for page_num, future in futures:
+                yield page_num, future.result()
+        finally:
+            # Abandoned early (error or consumer stopped): drop pages not yet started
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    def process_pdf(self, pdf_path: str,
+                    on_page: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
-        Process entire PDF (all pages)
+        Process entire PDF (all pages), one page window at a time
         
         Args:
             pdf_path: Path to PDF file
+            on_page: Optional callback invoked with each page result as soon
+                as that page is done (used by --stream)
             
         Returns:
             Dictionary with combined results from all pages
         """
         try:
-            # Convert PDF to images
-            images = self.convert_pdf_to_images(pdf_path)
+            page_count = self.get_page_count(pdf_path)
             
-            if not images:
+            if page_count == 0:
                 return {
                     "success": False,
                     "error": "Failed to convert PDF to images (0 pages extracted)",
@@ -221,17 +596,34 @@ class PDFProcessor:
                     "pages": []
                 }
             
-            # Process each page
+            # Born-digital pages come from the text layer; only the rest are rasterized
+            text_layer = self.extract_text_layer(pdf_path)
+            ocr_pages = [i for i in range(1, page_count + 1) if i not in text_layer]
+            
+            workers = self.resolve_page_workers(len(ocr_pages))
+            if workers > 1:
+                ocr_results = self.ocr_pages_parallel(pdf_path, ocr_pages, workers)
+            else:
+                ocr_results = self.ocr_pages_sequential(pdf_path, ocr_pages, page_count)
+            
+            # Pages are consumed in order as they finish
             page_results = []
             all_text = []
             all_confidences = []
             
-            for i, image in enumerate(images, start=1):
-                print(f"[PDF-OCR] Processing page {i}/{len(images)}", file=sys.stderr)
-                
-                page_result = self.extract_text_from_image(image, i)
+            for i in range(1, page_count + 1):
+                if i in text_layer:
+                    ocr_output.log(f"[PDF-OCR] Page {i}/{page_count}: using embedded text layer", 'debug')
+                    text, score = text_layer[i]
+                    page_result = self.text_layer_page_result(i, text, score)
+                else:
+                    _, page_result = next(ocr_results)
+                    page_result["source"] = "ocr"
                 page_results.append(page_result)
                 
+                if on_page is not None:
+                    on_page(page_result)
+                
                 if page_result.get('text'):
                     all_text.append(f"--- Page {i} ---")
                     all_text.append(page_result['text'])
@@ -241,16 +633,28 @@ class PDFProcessor:
             combined_text = '\n\n'.join(all_text)
             avg_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0.0
             
+            # Pages whose OCR raised (Reader init, model download, readtext)
+            failed_pages = [page["page"] for page in page_results if page.get("error")]
+            if page_results and len(failed_pages) == len(page_results):
+                raise RuntimeError(page_results[0]["error"])
+            
             return {
                 "success": True,
+                "partial": bool(failed_pages),
                 "text": combined_text,
                 "confidence": round(avg_confidence, 4),
                 "provider": "easyocr-pdf",
-                "page_count": len(images),
+                "page_count": len(page_results),
                 "pages": page_results,
                 "metadata": {
                     "dpi": self.dpi,
-                    "languages": self.languages
+                    "languages": self.languages,
+                    "page_window": self.page_window,
+                    "text_layer_pages": len(text_layer),
+                    "ocr_pages": len(ocr_pages),
+                    "page_workers": workers,
+                    "failed_pages": failed_pages,
+                    "dpi_mode": "adaptive" if self.adaptive_dpi else "fixed"
                 }
             }
             
@@ -265,15 +669,77 @@ class PDFProcessor:
             }
 
 
+# PDFProcessor of a page worker process (see PDFProcessor.ocr_pages_parallel)
+_page_processor = None
+
+
+def _init_page_worker(options: Dict) -> None:
+    """Build this worker's processor (PDFProcessor kwargs); its Reader loads on the first page"""
+    global _page_processor
+    # Torch is not imported yet in a fresh spawned worker, so OpenMP still
+    # picks up this worker's share of the budget
+    ocr_threads.configure_environment(options.pop("threads"))
+    _page_processor = PDFProcessor(use_text_layer=False, **options)
+
+
+def _ocr_page(pdf_path: str, page_num: int) -> Dict:
+    """Pool task: render and OCR one page"""
+    ocr_output.log(f"[PDF-OCR] Processing page {page_num} (pid {os.getpid()})", 'debug')
+    return _page_processor.ocr_single_page(pdf_path, page_num)
+
+
+def health_report() -> Dict:
+    """Versions, poppler and model presence, without importing EasyOCR/PyTorch/OpenCV"""
+    started = time.perf_counter()
+    report = ocr_health.build_report(
+        "easyocr-pdf",
+        ["pdf2image", "easyocr", "torch", "cv2", "numpy"],
+        models={"easyocr": ocr_health.directory_info(MODEL_STORAGE_DIR, '*.pth')},
+        binaries={"pdftoppm": ocr_health.binary_info('pdftoppm', ('-v',))},
+        started=started
+    )
+    report["text_layer"] = ocr_health.package_info("PyPDF2")
+    return report
+
+
+def emit_line(payload: Dict) -> None:
+    """Write a single JSON line to stdout and flush it (--stream framing)"""
+    ocr_output.emit(payload)
+
+
 def main():
     """Main entry point for command-line usage"""
     parser = argparse.ArgumentParser(description='PDF Receipt Processor with EasyOCR')
-    parser.add_argument('pdf_path', help='Path to PDF receipt')
+    parser.add_argument('pdf_path', nargs='?', help='Path to PDF receipt')
     parser.add_argument('--dpi', type=int, default=300, help='DPI for conversion (default: 300)')
     parser.add_argument('--lang', default='en', help='Language code (default: en)')
     parser.add_argument('--gpu', default='false', help='Use GPU (default: false)')
+    parser.add_argument('--page-window', type=int, default=1,
+                        help='Pages rasterized and held in memory at once (default: 1)')
+    parser.add_argument('--page-workers', type=int, default=1,
+                        help="Worker processes for OCR'd pages, each with its own Reader, capped at the thread budget "
+                             "(0 = auto, default: 1)")
+    parser.add_argument('--adaptive-dpi', action='store_true',
+                        help='Render only the content region of each page, at the DPI the detector needs (max --dpi)')
+    parser.add_argument('--no-text-layer', action='store_true',
+                        help='Always OCR pages, even when the PDF has a usable text layer')
+    parser.add_argument('--stream', action='store_true',
+                        help='Print each page result as a JSON line as soon as it is done')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the on-disk result cache')
+    parser.add_argument('--profile', action='store_true', help="Add cProfile top functions to each page's timings")
+    parser.add_argument('--trace-memory', action='store_true', help="Add per-step tracemalloc peaks to each page's timings")
+    parser.add_argument('--health', action='store_true',
+                        help='Report package versions, poppler and model presence without loading EasyOCR')
+    ocr_output.add_arguments(parser)
     
     args = parser.parse_args()
+    ocr_output.configure(args.output, args.log_level)
+    
+    if args.health:
+        ocr_health.print_report(health_report())
+    
+    if not args.pdf_path:
+        parser.error('pdf_path is required unless --health is given')
     
     # Validate PDF exists
     if not Path(args.pdf_path).exists():
@@ -291,15 +757,54 @@ def main():
     languages = [lang.strip() for lang in args.lang.split(',')]
     use_gpu = args.gpu.lower() in ('true', '1', 'yes')
     
+    # Cache hit: answer without loading pdf2image/EasyOCR/PyTorch at all
+    # Profiling runs want fresh measurements, never a cached result
+    profiling = args.profile or args.trace_memory
+    cache = OCRResultCache(enabled=False if args.no_cache or profiling else None)
+    key = cache.make_key(args.pdf_path, 'easyocr-pdf', languages,
+                         {"dpi": args.dpi, "text_layer": not args.no_text_layer,
+                          "adaptive_dpi": args.adaptive_dpi,
+                          "preprocess_steps": ocr_preprocessing.profile_steps("easyocr-pdf")},
+                         code_path=(__file__, ocr_preprocessing.__file__))
+    cached = cache.get(key)
+    if cached is not None:
+        cache.annotate(cached, hit=True)
+        if args.stream:
+            for page in cached.get('pages', []):
+                emit_line({"type": "page", **page})
+            emit_line({"type": "result", **cached})
+        else:
+            ocr_output.print_result(cached)
+        sys.exit(0)
+    
     # Initialize processor
     try:
-        processor = PDFProcessor(languages=languages, gpu=use_gpu, dpi=args.dpi)
+        processor = PDFProcessor(languages=languages, gpu=use_gpu, dpi=args.dpi,
+                                 page_window=args.page_window,
+                                 use_text_layer=not args.no_text_layer,
+                                 profile=args.profile, trace_memory=args.trace_memory,
+                                 page_workers=args.page_workers,
+                                 adaptive_dpi=args.adaptive_dpi)
         
         # Process PDF
-        result = processor.process_pdf(args.pdf_path)
+        if args.stream:
+            result = processor.process_pdf(
+                args.pdf_path,
+                on_page=lambda page: emit_line({"type": "page", **page})
+            )
+        else:
+            result = processor.process_pdf(args.pdf_path)
+        
+        # Failed pages are often transient (model download, Reader init): never cache them
+        if result.get('success') and not result.get('partial'):
+            cache.put(key, result)
+        cache.annotate(result, hit=False)
         
         # Output JSON result
-        print(json.dumps(result, indent=2))
+        if args.stream:
+            emit_line({"type": "result", **result})
+        else:
+            ocr_output.print_result(result)
         
         # Exit with appropriate code
         sys.exit(0 if result.get('success', False) else 1)
@@ -0,0 +1,236 @@
+/**
+ * Cascade OCR Provider
+ *
+ * Runs the cheap Tesseract engine first and escalates to EasyOCR (and
+ * optionally PaddleOCR) only when its answer is weak: low confidence, too many
+ * weak lines, or no total/date/merchant (see ocr_cascade.py). When only a few
+ * lines are weak, just those are re-read by EasyOCR's recognizer on crops
+ * before a full EasyOCR pass is paid for. Clean receipts finish at Tesseract
+ * speed; hard ones still get the accurate engine.
+ *
+ * Configuration (environment):
+ * - OCR_CASCADE_TIERS: escalation order (default: tesseract,easyocr)
+ * - OCR_CASCADE_MIN_CONFIDENCE: mean confidence a tier needs to answer (default: 0.75)
+ * - OCR_CASCADE_REQUIRE: fields a tier must find (default: total,date,merchant)
+ * - OCR_CASCADE_REFINE_MAX_LINES: most weak lines re-read on crops, 0 = never (default: 8)
+ */
+
+import { spawn } from 'child_process';
+import { promises as fs } from 'fs';
+import path from 'path';
+import { OCRProvider, OCRResult } from '../types';
+import { PythonWorker, WorkerTimeoutError } from './PythonWorker';
+import { OutputTail, pythonOutputEnv } from './PythonOutput';
+
+export class CascadeProvider implements OCRProvider {
+  readonly name = 'cascade';
+
+  private pythonPath: string;
+  private scriptPath: string;
+  private cascadeArgs: string[];
+  private worker: PythonWorker | null = null;
+
+  constructor(options: {
+    pythonPath?: string;
+    tiers?: string[];
+    minConfidence?: number;
+    requiredFields?: string[];
+    refineMaxLines?: number;
+    persistentWorker?: boolean;
+  } = {}) {
+    this.pythonPath = options.pythonPath || 'python3';
+    this.scriptPath = path.join(__dirname, '..', 'ocr_cascade.py');
+
+    const tiers = options.tiers?.join(',') || process.env.OCR_CASCADE_TIERS || 'tesseract,easyocr';
+    const minConfidence = options.minConfidence ?? Number(process.env.OCR_CASCADE_MIN_CONFIDENCE || 0.75);
+    const required = options.requiredFields?.join(',') ?? process.env.OCR_CASCADE_REQUIRE ?? 'total,date,merchant';
+    const refineMaxLines = options.refineMaxLines ?? Number(process.env.OCR_CASCADE_REFINE_MAX_LINES || 8);
+    this.cascadeArgs = [
+      '--tiers', tiers,
+      '--min-confidence', minConfidence.toString(),
+      '--require', required,
+      '--refine-max-lines', refineMaxLines.toString()
+    ];
+
+    // Persistent worker keeps escalation engines loaded between receipts
+    // (disable with OCR_CASCADE_PERSISTENT_WORKER=false)
+    const persistentWorker = options.persistentWorker !== undefined
+      ? options.persistentWorker
+      : process.env.OCR_CASCADE_PERSISTENT_WORKER !== 'false';
+
+    if (persistentWorker) {
+      this.worker = new PythonWorker(
+        'Cascade',
+        this.pythonPath,
+        [this.scriptPath, '--serve', ...this.cascadeArgs],
+        this.buildEnv()
+      );
+    }
+
+    console.log('[Cascade] Provider initialized', {
+      pythonPath: this.pythonPath,
+      tiers,
+      minConfidence,
+      required,
+      refineMaxLines,
+      persistentWorker,
+      scriptPath: this.scriptPath
+    });
+  }
+
+  /**
+   * Available when at least one tier's engine is installed
+   */
+  async isAvailable(): Promise<boolean> {
+    try {
+      await fs.access(this.scriptPath);
+
+      // Package metadata only (does not import any engine)
+      const health = JSON.parse(await this.executePython([this.scriptPath, '--health', ...this.cascadeArgs]));
+      if (!health.available) {
+        throw new Error(`No cascade tier installed: ${JSON.stringify(health.tiers)}`);
+      }
+
+      console.log('[Cascade] Provider is available', { tiers: health.tiers });
+      return true;
+    } catch (error) {
+      console.error('[Cascade] Provider not available:', error);
+      return false;
+    }
+  }
+
+  async process(imagePath: string): Promise<OCRResult> {
+    return this.recognize(imagePath);
+  }
+
+  /**
+   * Process an in-memory image (encoded JPEG/PNG bytes) without writing it to disk
+   */
+  async processBuffer(image: Buffer): Promise<OCRResult> {
+    return this.recognize(image);
+  }
+
+  private async recognize(input: string | Buffer): Promise<OCRResult> {
+    const startTime = Date.now();
+
+    try {
+      if (typeof input === 'string') {
+        console.log('[Cascade] Processing image:', input);
+        await fs.access(input);
+      } else {
+        console.log(`[Cascade] Processing in-memory image (${input.length} bytes)`);
+      }
+
+      const result = await this.runOCR(input);
+
+      if (!result.success) {
+        throw new Error(result.error || 'Cascade OCR failed');
+      }
+
+      const processingTime = Date.now() - startTime;
+
+      console.log('[Cascade] Processing complete:', {
+        tier: result.cascade?.tier,
+        accepted: result.cascade?.accepted,
+        tiers: (result.cascade?.tiers || []).map((tier: any) => `${tier.tier}:${tier.wall_ms ?? '-'}ms`),
+        confidence: result.confidence,
+        processingTime: `${processingTime}ms`
+      });
+
+      // Report the engine that answered, so downstream stats stay per engine
+      return {
+        text: result.text || '',
+        confidence: result.confidence || 0.0,
+        provider: result.provider || this.name,
+        processingTime,
+        metadata: {
+          lineCount: result.line_count,
+          lines: result.lines || [],
+          preprocessed: true,
+          quality: result.metadata?.quality,
+          cascade: result.cascade
+        }
+      };
+
+    } catch (error) {
+      console.error('[Cascade] Processing error:', error);
+
+      return {
+        text: '',
+        confidence: 0,
+        provider: this.name,
+        processingTime: Date.now() - startTime,
+        error: error instanceof Error ? error.message : 'Unknown error'
+      };
+    }
+  }
+
+  /**
+   * Run the cascade on one image, preferring the persistent worker and
+   * falling back to a one-shot Python process
+   */
+  private async runOCR(input: string | Buffer): Promise<any> {
+    if (this.worker) {
+      try {
+        return typeof input === 'string'
+          ? await this.worker.request({ image_path: input })
+          : await this.worker.requestImage(input);
+      } catch (error) {
+        // Only a crashed or unstartable worker is worth a one-shot retry
+        if (error instanceof WorkerTimeoutError) {
+          throw error;
+        }
+        console.warn('[Cascade] Persistent worker failed, falling back to one-shot process:', error);
+      }
+    }
+
+    const args = [this.scriptPath, typeof input === 'string' ? input : '-', ...this.cascadeArgs];
+    const output = await this.executePython(args, typeof input === 'string' ? undefined : input);
+    return JSON.parse(output);
+  }
+
+  /**
+   * Environment for the cascade's Python processes (EasyOCR model cache, compact output)
+   */
+  private buildEnv(): NodeJS.ProcessEnv {
+    return {
+      ...process.env,
+      HOME: process.env.HOME || '/var/lib/expenseapp',
+      EASYOCR_MODULE_PATH: '/var/lib/expenseapp/.EasyOCR',
+      ...pythonOutputEnv()
+    };
+  }
+
+  /**
+   * Execute Python command and capture output, optionally piping bytes to its stdin
+   */
+  private executePython(args: string[], stdin?: Buffer): Promise<string> {
+    return new Promise((resolve, reject) => {
+      const python = spawn(this.pythonPath, args, { env: this.buildEnv() });
+      python.stdin.end(stdin);
+
+      const stdout: Buffer[] = [];
+      const stderr = new OutputTail();
+
+      python.stdout.on('data', (data: Buffer) => {
+        stdout.push(data);
+      });
+
+      python.stderr.on('data', (data: Buffer) => {
+        stderr.append(data);
+      });
+
+      python.on('close', (code) => {
+        if (code !== 0) {
+          reject(new Error(`Python process exited with code ${code}: ${stderr}`));
+        } else {
+          resolve(Buffer.concat(stdout).toString());
+        }
+      });
+
+      python.on('error', (error) => {
+        reject(new Error(`Failed to spawn Python process: ${error.message}`));
+      });
+    });
+  }
+}
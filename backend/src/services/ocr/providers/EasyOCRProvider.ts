@@ -16,6 +16,8 @@ import { spawn } from 'child_process';
 import { promises as fs } from 'fs';
 import path from 'path';
 import { OCRProvider, OCRResult } from '../types';
+import { PythonWorker, WorkerTimeoutError } from './PythonWorker';
+import { OutputTail, pythonOutputEnv } from './PythonOutput';
 
 export class EasyOCRProvider implements OCRProvider {
   readonly name = 'easyocr';
@@ -24,11 +26,13 @@ export class EasyOCRProvider implements OCRProvider {
   private scriptPath: string;
   private languages: string[];
   private useGPU: boolean;
+  private worker: PythonWorker | null = null;
   
   constructor(options: {
     pythonPath?: string;
     languages?: string[];
     useGPU?: boolean;
+    persistentWorker?: boolean;
   } = {}) {
     this.pythonPath = options.pythonPath || 'python3';
     this.languages = options.languages || ['en'];
@@ -37,10 +41,31 @@ export class EasyOCRProvider implements OCRProvider {
     // Path to Python processor script
     this.scriptPath = path.join(__dirname, '..', 'easyocr_processor.py');
     
+    // Persistent worker keeps the EasyOCR Reader loaded between receipts
+    // (disable with EASYOCR_PERSISTENT_WORKER=false to spawn one process per image)
+    const persistentWorker = options.persistentWorker !== undefined
+      ? options.persistentWorker
+      : process.env.EASYOCR_PERSISTENT_WORKER !== 'false';
+    
+    if (persistentWorker) {
+      this.worker = new PythonWorker(
+        'EasyOCR',
+        this.pythonPath,
+        [
+          this.scriptPath,
+          '--serve',
+          '--lang', this.languages.join(','),
+          '--gpu', this.useGPU ? 'true' : 'false'
+        ],
+        this.buildEnv()
+      );
+    }
+    
     console.log('[EasyOCR] Provider initialized', {
       pythonPath: this.pythonPath,
       languages: this.languages,
       useGPU: this.useGPU,
+      persistentWorker,
       scriptPath: this.scriptPath
     });
   }
@@ -50,16 +75,20 @@ export class EasyOCRProvider implements OCRProvider {
    */
   async isAvailable(): Promise<boolean> {
     try {
-      // Check if Python is available
-      await this.executePython(['-c', 'import sys; print(sys.version)']);
-      
-      // Check if EasyOCR is installed
-      await this.executePython(['-c', 'import easyocr; print(easyocr.__version__)']);
-      
       // Check if script exists
       await fs.access(this.scriptPath);
       
-      console.log('[EasyOCR] Provider is available');
+      // Check packages and models from metadata (does not import EasyOCR/PyTorch)
+      const health = JSON.parse(await this.executePython([this.scriptPath, '--health']));
+      if (!health.available) {
+        throw new Error(`EasyOCR dependencies missing: ${JSON.stringify(health.packages)}`);
+      }
+      
+      console.log('[EasyOCR] Provider is available', {
+        easyocr: health.packages?.easyocr?.version,
+        torch: health.packages?.torch?.version,
+        modelsPresent: health.models?.easyocr?.present
+      });
       return true;
     } catch (error) {
       console.error('[EasyOCR] Provider not available:', error);
@@ -71,28 +100,30 @@ export class EasyOCRProvider implements OCRProvider {
    * Process image with EasyOCR
    */
   async process(imagePath: string): Promise<OCRResult> {
+    return this.recognize(imagePath);
+  }
+  
+  /**
+   * Process an in-memory image (encoded JPEG/PNG bytes) without writing it to disk
+   */
+  async processBuffer(image: Buffer): Promise<OCRResult> {
+    return this.recognize(image);
+  }
+  
+  private async recognize(input: string | Buffer): Promise<OCRResult> {
     const startTime = Date.now();
     
     try {
-      console.log('[EasyOCR] Processing image:', imagePath);
-      
-      // Validate image exists
-      await fs.access(imagePath);
-      
-      // Build command arguments
-      const args = [
-        this.scriptPath,
-        imagePath,
-        '--lang', this.languages.join(','),
-        '--gpu', this.useGPU ? 'true' : 'false',
-        '--preprocess', 'true'
-      ];
-      
-      // Execute Python script
-      const output = await this.executePython(args);
+      if (typeof input === 'string') {
+        console.log('[EasyOCR] Processing image:', input);
+        
+        // Validate image exists
+        await fs.access(input);
+      } else {
+        console.log(`[EasyOCR] Processing in-memory image (${input.length} bytes)`);
+      }
       
-      // Parse JSON response
-      const result = JSON.parse(output);
+      const result = await this.runOCR(input);
       
       // Handle error response
       if (!result.success) {
@@ -111,7 +142,8 @@ export class EasyOCRProvider implements OCRProvider {
           lineCount: result.line_count,
           detectionCount: result.metadata?.detection_count,
           preprocessed: result.metadata?.preprocessed,
-          lines: result.lines || []
+          lines: result.lines || [],
+          quality: result.metadata?.quality
         }
       };
       
@@ -137,6 +169,44 @@ export class EasyOCRProvider implements OCRProvider {
     }
   }
   
+  /**
+   * Run OCR on a single image, preferring the persistent worker and falling back
+   * to a one-shot Python process if the worker cannot be used
+   *
+   * In-memory images reach the worker through shared memory and the one-shot
+   * process through stdin ("-" as the image path).
+   */
+  private async runOCR(input: string | Buffer): Promise<any> {
+    if (this.worker) {
+      try {
+        return typeof input === 'string'
+          ? await this.worker.request({ image_path: input, preprocess: true })
+          : await this.worker.requestImage(input, { preprocess: true });
+      } catch (error) {
+        // Only a crashed or unstartable worker is worth a one-shot retry
+        if (error instanceof WorkerTimeoutError) {
+          throw error;
+        }
+        console.warn('[EasyOCR] Persistent worker failed, falling back to one-shot process:', error);
+      }
+    }
+    
+    // Build command arguments
+    const args = [
+      this.scriptPath,
+      typeof input === 'string' ? input : '-',
+      '--lang', this.languages.join(','),
+      '--gpu', this.useGPU ? 'true' : 'false',
+      '--preprocess', 'true'
+    ];
+    
+    // Execute Python script
+    const output = await this.executePython(args, typeof input === 'string' ? undefined : input);
+    
+    // Parse JSON response
+    return JSON.parse(output);
+  }
+  
   /**
    * Process PDF with EasyOCR (multi-page support)
    */
@@ -153,14 +223,23 @@ export class EasyOCRProvider implements OCRProvider {
       const pdfScriptPath = path.join(__dirname, '..', 'pdf_processor.py');
       
       // Build command arguments
+      // Multi-page scans are OCR'd in parallel worker processes, one Reader each
+      // (EASYOCR_PDF_PAGE_WORKERS, default 2: each worker loads its own Reader, so keep it
+      // small; the processor also caps it at its thread budget. 0 = auto, 1 = sequential)
       const args = [
         pdfScriptPath,
         pdfPath,
         '--dpi', dpi.toString(),
         '--lang', this.languages.join(','),
-        '--gpu', this.useGPU ? 'true' : 'false'
+        '--gpu', this.useGPU ? 'true' : 'false',
+        '--page-workers', process.env.EASYOCR_PDF_PAGE_WORKERS || '2'
       ];
       
+      // Render only each page's content region at the DPI the detector needs
+      if (process.env.EASYOCR_PDF_ADAPTIVE_DPI === 'true') {
+        args.push('--adaptive-dpi');
+      }
+      
       // Execute Python script
       const output = await this.executePython(args);
       
@@ -184,7 +263,8 @@ export class EasyOCRProvider implements OCRProvider {
           pageCount: result.page_count,
           pages: result.pages || [],
           dpi: result.metadata?.dpi,
-          languages: result.metadata?.languages
+          languages: result.metadata?.languages,
+          pageWorkers: result.metadata?.page_workers
         }
       };
       
@@ -211,42 +291,48 @@ export class EasyOCRProvider implements OCRProvider {
   }
   
   /**
-   * Execute Python command and capture output
+   * Environment for EasyOCR Python processes
    */
-  private executePython(args: string[]): Promise<string> {
+  private buildEnv(): NodeJS.ProcessEnv {
+    // Set HOME environment for EasyOCR model cache
+    // Thread counts and the no-AVX2 safeguards are chosen by the script from the
+    // host's CPU flags (ocr_threads.py); OCR_THREADS / OCR_WORKERS /
+    // OCR_SAFE_CPU in the backend environment override them
+    return {
+      ...process.env,
+      HOME: process.env.HOME || '/var/lib/expenseapp',
+      EASYOCR_MODULE_PATH: '/var/lib/expenseapp/.EasyOCR',
+      // Single-line JSON results, no per-step stderr chatter
+      ...pythonOutputEnv()
+    };
+  }
+  
+  /**
+   * Execute Python command and capture output, optionally piping bytes to its stdin
+   */
+  private executePython(args: string[], stdin?: Buffer): Promise<string> {
     return new Promise((resolve, reject) => {
-      // Set HOME environment for EasyOCR model cache
-      // Disable CPU optimizations that require AVX2 (for older CPUs like Sandy Bridge)
-      const env = {
-        ...process.env,
-        HOME: process.env.HOME || '/var/lib/expenseapp',
-        EASYOCR_MODULE_PATH: '/var/lib/expenseapp/.EasyOCR',
-        // Disable PyTorch optimizations that cause SIGILL on older CPUs
-        MKL_THREADING_LAYER: 'GNU',
-        MKL_SERVICE_FORCE_INTEL: '0',
-        OMP_NUM_THREADS: '1',
-        // Disable NNPACK (causes "Unsupported hardware" errors)
-        PYTORCH_NNPACK_DISABLE: '1'
-      };
-      
-      const python = spawn(this.pythonPath, args, { env });
+      const python = spawn(this.pythonPath, args, { env: this.buildEnv() });
+      python.stdin.end(stdin);
       
-      let stdout = '';
-      let stderr = '';
+      // Results are collected whole (decoded once, so multi-byte characters
+      // split across chunks survive); stderr only keeps its tail for errors
+      const stdout: Buffer[] = [];
+      const stderr = new OutputTail();
       
-      python.stdout.on('data', (data) => {
-        stdout += data.toString();
+      python.stdout.on('data', (data: Buffer) => {
+        stdout.push(data);
       });
       
-      python.stderr.on('data', (data) => {
-        stderr += data.toString();
+      python.stderr.on('data', (data: Buffer) => {
+        stderr.append(data);
       });
       
       python.on('close', (code) => {
         if (code !== 0) {
           reject(new Error(`Python process exited with code ${code}: ${stderr}`));
         } else {
-          resolve(stdout);
+          resolve(Buffer.concat(stdout).toString());
         }
       });
       
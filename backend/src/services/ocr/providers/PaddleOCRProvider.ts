@@ -9,11 +9,14 @@ import { spawn } from 'child_process';
 import path from 'path';
 import fs from 'fs';
 import { OCRProvider, OCRResult } from '../types';
+import { PythonWorker, WorkerTimeoutError } from './PythonWorker';
+import { OutputTail, pythonOutputEnv } from './PythonOutput';
 
 export class PaddleOCRProvider implements OCRProvider {
   name = 'paddleocr';
   private pythonPath: string;
   private scriptPath: string;
+  private worker: PythonWorker | null = null;
   
   constructor() {
     this.pythonPath = process.env.PYTHON_PATH || 'python3';
@@ -21,20 +24,42 @@ export class PaddleOCRProvider implements OCRProvider {
     // Use environment variable or fall back to relative path from project root
     const projectRoot = process.env.PROJECT_ROOT || path.join(__dirname, '../../../..');
     this.scriptPath = path.join(projectRoot, 'src/services/ocr/paddleocr_processor.py');
+    
+    // Resident worker keeps PaddleOCR models loaded between receipts
+    // (disable with PADDLEOCR_PERSISTENT_WORKER=false to spawn one process per image)
+    if (process.env.PADDLEOCR_PERSISTENT_WORKER !== 'false') {
+      this.worker = new PythonWorker('PaddleOCR', this.pythonPath, [this.scriptPath, '--serve'],
+        { ...process.env, ...pythonOutputEnv() }, 45000);
+    }
   }
   
   /**
    * Process image with PaddleOCR
    */
   async process(imagePath: string): Promise<OCRResult> {
+    return this.recognize(imagePath);
+  }
+  
+  /**
+   * Process an in-memory image (encoded JPEG/PNG bytes) without writing it to disk
+   */
+  async processBuffer(image: Buffer): Promise<OCRResult> {
+    return this.recognize(image);
+  }
+  
+  private async recognize(input: string | Buffer): Promise<OCRResult> {
     const startTime = Date.now();
     
     try {
-      console.log('[PaddleOCR] Starting OCR processing for:', imagePath);
-      
-      // Check if file exists
-      if (!fs.existsSync(imagePath)) {
-        throw new Error(`Image file not found: ${imagePath}`);
+      if (typeof input === 'string') {
+        console.log('[PaddleOCR] Starting OCR processing for:', input);
+        
+        // Check if file exists
+        if (!fs.existsSync(input)) {
+          throw new Error(`Image file not found: ${input}`);
+        }
+      } else {
+        console.log(`[PaddleOCR] Starting OCR processing for in-memory image (${input.length} bytes)`);
       }
       
       // Check if Python script exists
@@ -43,7 +68,7 @@ export class PaddleOCRProvider implements OCRProvider {
       }
       
       // Call Python script
-      const result = await this.callPythonScript(imagePath);
+      const result = await this.callPythonScript(input);
       
       const processingTime = Date.now() - startTime;
       
@@ -73,7 +98,8 @@ export class PaddleOCRProvider implements OCRProvider {
         metadata: {
           wordCount: result.wordCount,
           preprocessed: true,
-          available: true
+          available: true,
+          quality: result.quality
         }
       };
       
@@ -94,35 +120,55 @@ export class PaddleOCRProvider implements OCRProvider {
   }
   
   /**
-   * Call Python script to process image
+   * Call Python script to process image, via the resident worker when enabled
+   *
+   * In-memory images go to the worker through shared memory and to a one-shot
+   * process through stdin ("-" as the image path).
    */
-  private async callPythonScript(imagePath: string): Promise<any> {
+  private async callPythonScript(input: string | Buffer): Promise<any> {
+    if (this.worker) {
+      try {
+        return typeof input === 'string'
+          ? await this.worker.request({ image_path: input, lang: 'en' })
+          : await this.worker.requestImage(input, { lang: 'en' });
+      } catch (error: any) {
+        // Only a crashed or unstartable worker is worth a one-shot retry
+        if (error instanceof WorkerTimeoutError) {
+          throw error;
+        }
+        console.warn('[PaddleOCR] Resident worker failed, falling back to one-shot process:', error.message);
+      }
+    }
+    
     return new Promise((resolve, reject) => {
-      let stdout = '';
-      let stderr = '';
+      const stdout: Buffer[] = [];
+      const stderr = new OutputTail();
       
-      const python = spawn(this.pythonPath, [this.scriptPath, imagePath]);
+      const python = spawn(this.pythonPath, [this.scriptPath, typeof input === 'string' ? input : '-'],
+        { env: { ...process.env, ...pythonOutputEnv() } });
+      python.stdin.end(typeof input === 'string' ? undefined : input);
       
-      python.stdout.on('data', (data) => {
-        stdout += data.toString();
+      python.stdout.on('data', (data: Buffer) => {
+        stdout.push(data);
       });
       
-      python.stderr.on('data', (data) => {
-        stderr += data.toString();
+      python.stderr.on('data', (data: Buffer) => {
+        stderr.append(data);
       });
       
       python.on('close', (code) => {
         if (code !== 0) {
-          console.error('[PaddleOCR] Python script error:', stderr);
-          reject(new Error(stderr || `Python process exited with code ${code}`));
+          console.error('[PaddleOCR] Python script error:', stderr.toString());
+          reject(new Error(stderr.toString() || `Python process exited with code ${code}`));
           return;
         }
         
+        const output = Buffer.concat(stdout).toString();
         try {
-          const result = JSON.parse(stdout);
+          const result = JSON.parse(output);
           resolve(result);
         } catch (error: any) {
-          console.error('[PaddleOCR] Failed to parse Python output:', stdout);
+          console.error('[PaddleOCR] Failed to parse Python output:', output.slice(0, 500));
           reject(new Error(`Failed to parse OCR result: ${error.message}`));
         }
       });
@@ -151,35 +197,29 @@ export class PaddleOCRProvider implements OCRProvider {
         return false;
       }
       
-      // Try to run Python and check if PaddleOCR is installed
+      // Ask the processor for a health report (package metadata only; no paddle import)
       const result = await new Promise<boolean>((resolve) => {
-        console.log('[PaddleOCR] Testing availability with command:', this.pythonPath, ['-c', 'import paddleocr; print("ok")']);
-        const python = spawn(this.pythonPath, ['-c', 'import paddleocr; print("ok")']);
+        const python = spawn(this.pythonPath, [this.scriptPath, '--health']);
         
-        let success = false;
         let stdoutData = '';
-        let stderrData = '';
         
         python.stdout.on('data', (data) => {
-          const text = data.toString();
-          stdoutData += text;
-          console.log('[PaddleOCR] stdout:', JSON.stringify(text.trim()));
-          if (text.trim() === 'ok') {
-            success = true;
-            console.log('[PaddleOCR] Match found! Setting success = true');
-          }
+          stdoutData += data.toString();
         });
         
-        python.stderr.on('data', (data) => {
-          stderrData += data.toString();
-          console.log('[PaddleOCR] stderr:', data.toString().slice(0, 200));
-        });
-        
-        python.on('close', (code) => {
-          console.log('[PaddleOCR] Process closed with code:', code);
-          console.log('[PaddleOCR] Final success value:', success);
-          console.log('[PaddleOCR] Full stdout:', JSON.stringify(stdoutData.trim()));
-          resolve(success);
+        python.on('close', () => {
+          try {
+            const health = JSON.parse(stdoutData);
+            console.log('[PaddleOCR] Health:', {
+              available: health.available,
+              version: health.version,
+              elapsedMs: health.elapsed_ms
+            });
+            resolve(Boolean(health.available));
+          } catch (error) {
+            console.error('[PaddleOCR] Failed to parse health report:', stdoutData.slice(0, 200));
+            resolve(false);
+          }
         });
         
         python.on('error', (err) => {
@@ -188,10 +228,10 @@ export class PaddleOCRProvider implements OCRProvider {
         });
         
         setTimeout(() => {
-          console.warn('[PaddleOCR] Timeout reached (15s), killing process');
+          console.warn('[PaddleOCR] Health check timeout reached (5s), killing process');
           python.kill();
           resolve(false);
-        }, 15000); // Increased from 5s to 15s - PaddleOCR takes ~8s to import models
+        }, 5000);
       });
       
       if (result) {
@@ -0,0 +1,51 @@
+/**
+ * Python Process Output Helpers
+ *
+ * Shared by the providers that spawn the OCR scripts:
+ * - pythonOutputEnv() asks the scripts for single-line JSON results and only
+ *   warning-or-worse stderr messages (see ocr_output.py)
+ * - OutputTail keeps just the end of a process's stderr, so a chatty or
+ *   long-running script cannot grow an unbounded string in Node
+ */
+
+const DEFAULT_TAIL_BYTES = 8192;
+
+/**
+ * Environment overrides for OCR scripts (OCR_OUTPUT / OCR_LOG_LEVEL can be set
+ * on the backend to change them, e.g. OCR_LOG_LEVEL=debug while troubleshooting)
+ */
+export function pythonOutputEnv(): NodeJS.ProcessEnv {
+  return {
+    OCR_OUTPUT: process.env.OCR_OUTPUT || 'compact',
+    OCR_LOG_LEVEL: process.env.OCR_LOG_LEVEL || 'warning'
+  };
+}
+
+/**
+ * Bounded buffer holding the last `limit` bytes written to it
+ */
+export class OutputTail {
+  private chunks: Buffer[] = [];
+  private size = 0;
+  private dropped = false;
+
+  constructor(private readonly limit: number = DEFAULT_TAIL_BYTES) {}
+
+  append(chunk: Buffer): void {
+    this.chunks.push(chunk);
+    this.size += chunk.length;
+
+    while (this.size > this.limit && this.chunks.length > 1) {
+      this.size -= this.chunks.shift()!.length;
+      this.dropped = true;
+    }
+  }
+
+  toString(): string {
+    const text = Buffer.concat(this.chunks).toString();
+    if (text.length <= this.limit && !this.dropped) {
+      return text;
+    }
+    return '...' + text.slice(-this.limit);
+  }
+}
@@ -0,0 +1,279 @@
+/**
+ * Persistent Python Worker
+ *
+ * Keeps one long-lived Python OCR process (started with `--serve`) and talks to it
+ * over newline-delimited JSON on stdin/stdout. The OCR models are loaded once when the
+ * worker starts instead of once per receipt.
+ *
+ * Protocol:
+ * - Worker prints `{"ready": true}` once the models are loaded
+ * - Each request is one JSON line with a numeric `id`
+ * - Each response is one JSON line echoing that `id`
+ *
+ * The worker reads one request at a time, so requests queue here and only one is
+ * written to it at once; the request timeout runs from that write, not from queueing.
+ * A timed-out or crashed worker is restarted and the queue carries on. Timeouts reject
+ * with WorkerTimeoutError so callers can tell a slow image from a broken worker.
+ *
+ * Images already in memory are handed over through a POSIX shared-memory segment
+ * (`image_shm` + `image_size`, see ocr_input.py) instead of a temp file, falling back
+ * to inline base64 where /dev/shm does not exist.
+ */
+
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import { existsSync, promises as fs } from 'fs';
+import path from 'path';
+
+// POSIX shm_open() segments live here on Linux; Python attaches them by name
+const SHM_DIR = '/dev/shm';
+
+/**
+ * A request the worker accepted but did not answer in time
+ *
+ * Re-running the same image in a one-shot process would most likely take just as long,
+ * so providers rethrow this instead of falling back.
+ */
+export class WorkerTimeoutError extends Error {
+  constructor(message: string) {
+    super(message);
+    this.name = 'WorkerTimeoutError';
+  }
+}
+
+interface PendingRequest {
+  id: number;
+  line: string;
+  resolve: (result: any) => void;
+  reject: (error: Error) => void;
+  timer?: NodeJS.Timeout;
+}
+
+export class PythonWorker {
+  private process: ChildProcessWithoutNullStreams | null = null;
+  private ready: Promise<void> | null = null;
+  private queue: PendingRequest[] = [];
+  private inFlight: PendingRequest | null = null;
+  private nextId = 1;
+  private shmCounter = 0;
+
+  constructor(
+    private readonly label: string,
+    private readonly pythonPath: string,
+    private readonly args: string[],
+    private readonly env: NodeJS.ProcessEnv = process.env,
+    private readonly requestTimeoutMs: number = 60000,
+    private readonly startupTimeoutMs: number = 120000
+  ) {}
+
+  /**
+   * Send a request to the worker, starting it first if needed
+   */
+  request(payload: Record<string, unknown>): Promise<any> {
+    const id = this.nextId++;
+
+    return new Promise((resolve, reject) => {
+      this.queue.push({ id, line: JSON.stringify({ id, ...payload }) + '\n', resolve, reject });
+      this.pump();
+    });
+  }
+
+  /**
+   * Send a request whose image is in memory rather than on disk
+   *
+   * The encoded bytes go into a shared-memory segment that the worker decodes in
+   * place; the segment is removed once the response (or an error) arrives.
+   */
+  async requestImage(image: Buffer, payload: Record<string, unknown> = {}): Promise<any> {
+    if (!existsSync(SHM_DIR)) {
+      return this.request({ ...payload, image_base64: image.toString('base64') });
+    }
+
+    const name = `expenseapp-ocr-${process.pid}-${++this.shmCounter}`;
+    const segmentPath = path.join(SHM_DIR, name);
+    await fs.writeFile(segmentPath, image, { mode: 0o600 });
+    try {
+      return await this.request({ ...payload, image_shm: name, image_size: image.length });
+    } finally {
+      await fs.unlink(segmentPath).catch(() => undefined);
+    }
+  }
+
+  /**
+   * Start the worker process if it is not already running
+   */
+  start(): Promise<void> {
+    if (this.ready) {
+      return this.ready;
+    }
+
+    this.ready = new Promise((resolve, reject) => {
+      console.log(`[${this.label}] Starting persistent worker:`, this.pythonPath, this.args.join(' '));
+
+      const python = spawn(this.pythonPath, this.args, { env: this.env });
+      this.process = python;
+      let stdoutBuffer = '';
+
+      let started = false;
+      const startupTimer = setTimeout(() => {
+        if (!started) {
+          this.stop();
+          reject(new Error(`${this.label} worker did not become ready within ${this.startupTimeoutMs}ms`));
+        }
+      }, this.startupTimeoutMs);
+
+      python.stdout.on('data', (data) => {
+        stdoutBuffer += data.toString();
+
+        let newlineIndex: number;
+        while ((newlineIndex = stdoutBuffer.indexOf('\n')) >= 0) {
+          const line = stdoutBuffer.slice(0, newlineIndex).trim();
+          stdoutBuffer = stdoutBuffer.slice(newlineIndex + 1);
+          if (!line) {
+            continue;
+          }
+
+          let message: any;
+          try {
+            message = JSON.parse(line);
+          } catch (error) {
+            console.warn(`[${this.label}] Ignoring non-JSON worker output:`, line.slice(0, 200));
+            continue;
+          }
+
+          if (message.ready && !started) {
+            started = true;
+            clearTimeout(startupTimer);
+            console.log(`[${this.label}] Persistent worker ready (pid ${python.pid})`);
+            resolve();
+            continue;
+          }
+
+          this.settle(message);
+        }
+      });
+
+      python.stderr.on('data', (data) => {
+        // Worker progress lines are diagnostic only; keep the tail for debugging
+        const text = data.toString().trim();
+        if (text) {
+          console.log(`[${this.label}] worker:`, text.slice(-500));
+        }
+      });
+
+      python.on('close', (code) => {
+        clearTimeout(startupTimer);
+        console.warn(`[${this.label}] Persistent worker exited with code ${code}`);
+        if (!started) {
+          reject(new Error(`${this.label} worker exited before becoming ready (code ${code})`));
+        }
+        // A worker that was already replaced (timeout, stop()) owns no requests
+        if (this.process === python) {
+          this.process = null;
+          this.ready = null;
+          this.failInFlight(new Error(`${this.label} worker exited with code ${code}`));
+          if (started) {
+            this.pump();
+          }
+        }
+      });
+
+      python.on('error', (error) => {
+        clearTimeout(startupTimer);
+        if (!started) {
+          reject(new Error(`Failed to spawn ${this.label} worker: ${error.message}`));
+        }
+        if (this.process === python) {
+          this.process = null;
+          this.ready = null;
+          this.failInFlight(new Error(`Failed to spawn ${this.label} worker: ${error.message}`));
+        }
+      });
+    });
+
+    return this.ready;
+  }
+
+  /**
+   * Stop the worker; it will be restarted on the next request
+   */
+  stop(): void {
+    this.kill();
+
+    const error = new Error(`${this.label} worker stopped`);
+    this.failInFlight(error);
+    for (const request of this.queue.splice(0)) {
+      request.reject(error);
+    }
+  }
+
+  /**
+   * Write the next queued request once the worker is ready and idle
+   */
+  private pump(): void {
+    if (this.inFlight || this.queue.length === 0) {
+      return;
+    }
+
+    this.start().then(() => {
+      if (this.inFlight || this.queue.length === 0 || !this.process) {
+        return;
+      }
+
+      const request = this.queue.shift()!;
+      request.timer = setTimeout(() => {
+        console.warn(`[${this.label}] Worker request ${request.id} timed out (${this.requestTimeoutMs}ms), restarting worker`);
+        this.inFlight = null;
+        request.reject(new WorkerTimeoutError(`${this.label} worker request timeout (${this.requestTimeoutMs}ms)`));
+        this.kill();
+        this.pump();
+      }, this.requestTimeoutMs);
+
+      this.inFlight = request;
+      this.process.stdin.write(request.line);
+    }, (error: Error) => {
+      // The worker cannot start, so nothing queued will run
+      for (const request of this.queue.splice(0)) {
+        request.reject(error);
+      }
+    });
+  }
+
+  /**
+   * Kill the current process without touching the queue
+   */
+  private kill(): void {
+    const python = this.process;
+    this.process = null;
+    this.ready = null;
+
+    if (python) {
+      python.stdin.end();
+      python.kill();
+    }
+  }
+
+  private settle(message: any): void {
+    const request = this.inFlight;
+    // A line the worker could not parse is answered with a null id; with one request
+    // in flight at a time it can only belong to that request
+    const unknownId = message.id !== null && message.id !== undefined && request?.id !== message.id;
+    if (!request || unknownId) {
+      console.warn(`[${this.label}] Received response for unknown request id:`, message.id);
+      return;
+    }
+
+    clearTimeout(request.timer);
+    this.inFlight = null;
+    request.resolve(message);
+    this.pump();
+  }
+
+  private failInFlight(error: Error): void {
+    const request = this.inFlight;
+    if (request) {
+      clearTimeout(request.timer);
+      this.inFlight = null;
+      request.reject(error);
+    }
+  }
+}
@@ -15,6 +15,7 @@ import { spawn } from 'child_process';
 import { promises as fs } from 'fs';
 import path from 'path';
 import { OCRProvider, OCRResult } from '../types';
+import { OutputTail, pythonOutputEnv } from './PythonOutput';
 
 export class TesseractProvider implements OCRProvider {
   readonly name = 'tesseract';
@@ -53,19 +54,19 @@ export class TesseractProvider implements OCRProvider {
    */
   async isAvailable(): Promise<boolean> {
     try {
-      // Check if Python is available
-      await this.executePython(['-c', 'import sys; print(sys.version)']);
-      
-      // Check if required Python packages are installed
-      await this.executePython(['-c', 'import cv2, pytesseract; print("OK")']);
-      
       // Check if script exists
       await fs.access(this.scriptPath);
       
-      // Check if tesseract binary is available
-      await this.executePython(['-c', 'import pytesseract; pytesseract.get_tesseract_version()']);
+      // Check packages and tesseract binary from metadata (does not import OpenCV)
+      const health = JSON.parse(await this.executePython([this.scriptPath, '--health']));
+      if (!health.available) {
+        throw new Error(`Tesseract dependencies missing: ${JSON.stringify({ ...health.packages, ...health.binaries })}`);
+      }
       
-      console.log('[Tesseract] Provider is available');
+      console.log('[Tesseract] Provider is available', {
+        tesseract: health.binaries?.tesseract?.version,
+        languages: health.models?.tessdata?.languages
+      });
       return true;
     } catch (error) {
       console.error('[Tesseract] Provider not available:', error);
@@ -125,7 +126,8 @@ export class TesseractProvider implements OCRProvider {
           psmMode: result.metadata?.psm_mode,
           wordCount: result.metadata?.word_count,
           skewAngle: result.metadata?.skew_angle,
-          stepsApplied: result.metadata?.steps_applied
+          stepsApplied: result.metadata?.steps_applied,
+          quality: result.metadata?.quality
         }
       };
       
@@ -157,24 +159,26 @@ export class TesseractProvider implements OCRProvider {
    */
   private executePython(args: string[]): Promise<string> {
     return new Promise((resolve, reject) => {
-      const python = spawn(this.pythonPath, args);
+      const python = spawn(this.pythonPath, args, { env: { ...process.env, ...pythonOutputEnv() } });
       
-      let stdout = '';
-      let stderr = '';
+      // Results are collected whole (decoded once, so multi-byte characters
+      // split across chunks survive); stderr only keeps its tail for errors
+      const stdout: Buffer[] = [];
+      const stderr = new OutputTail();
       
-      python.stdout.on('data', (data) => {
-        stdout += data.toString();
+      python.stdout.on('data', (data: Buffer) => {
+        stdout.push(data);
       });
       
-      python.stderr.on('data', (data) => {
-        stderr += data.toString();
+      python.stderr.on('data', (data: Buffer) => {
+        stderr.append(data);
       });
       
       python.on('close', (code) => {
         if (code !== 0) {
           reject(new Error(`Python process exited with code ${code}: ${stderr}`));
         } else {
-          resolve(stdout);
+          resolve(Buffer.concat(stdout).toString());
         }
       });
       
@@ -8,35 +8,206 @@ Optimized for maximum accuracy on receipts and invoices through:
 - Structured output with confidence metrics
 
 Hardware: Optimized for Sandy Bridge CPUs (AVX-only, no AVX2)
+
+Usage:
+    python3 tesseract_processor.py <image_path> [--psm 6] [--try-all-psm]
+    python3 tesseract_processor.py - [--psm 6] < receipt.jpg
+    python3 tesseract_processor.py --batch <image_path> [<image_path> ...] [--workers N]
+    python3 tesseract_processor.py --manifest <file_with_one_path_per_line> [--workers N]
+    python3 tesseract_processor.py --health
+
+Batch mode runs preprocessing + OCR across a process pool and prints one
+JSON line per image as soon as it finishes (completion order, not input order;
+each line carries "index" and "image_path").
+
+Results are cached on disk by content hash (see ocr_cache.py); a cache hit
+returns before OpenCV/NumPy/pytesseract are imported. Pass --no-cache
+(or set OCR_CACHE=off) to always recompute.
+
+Black, blank or badly blurred captures are flagged by a quality gate
+before preprocessing (see ocr_quality.py; --quality-gate enforce rejects
+them without OCR, off skips the check).
+
+Recognition backends (--backend, or OCR_TESSERACT_BACKEND):
+    tesserocr    in-process TessBaseAPI handles, kept per language and PSM
+                 mode: pixels are passed directly and the traineddata loads
+                 once per process (batch workers, the cascade's serve loop)
+    subprocess   pytesseract / the tesseract binary: a temp PNG, a fork and
+                 a model load on every call
+    auto         tesserocr when installed, else subprocess (default)
+Both return the same result schema.
 """
 
+from __future__ import annotations
+
 import sys
 import os
+import io
 import json
 import argparse
 import subprocess
+import threading
+import time
 import warnings
-from pathlib import Path
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from typing import Dict, List, Tuple, Optional
 import tempfile
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
 
-try:
-    import cv2
-    import numpy as np
-    from PIL import Image
-    import pytesseract
-except ImportError as e:
-    print(json.dumps({
-        "success": False,
-        "error": f"Missing dependency: {str(e)}",
-        "text": "",
-        "confidence": 0.0,
-        "provider": "tesseract"
-    }))
-    sys.exit(1)
+# Thread budget for OpenCV/BLAS and the tesseract binary (OMP_THREAD_LIMIT)
+import ocr_threads
+ocr_threads.configure_environment()
+
+from ocr_cache import OCRResultCache
+from ocr_timing import StageTimer
+import ocr_health
+import ocr_input
+import ocr_output
+import ocr_preprocessing
+import ocr_quality
+
+# Heavy dependencies are imported by load_dependencies() on first real OCR
+# work, so cache hits and argument errors never pay the OpenCV import.
+cv2 = None
+np = None
+Image = None
+pytesseract = None
+
+# Optional in-process backend, imported by resolve_backend() on first use
+tesserocr = None
+tesserocr_error: Optional[str] = None
+tesserocr_threads: Optional[int] = None  # OMP_THREAD_LIMIT in force when it loaded
+
+BACKENDS = ('auto', 'tesserocr', 'subprocess')
+
+# Column order of Tesseract's TSV output (TessBaseAPI::GetTSVText omits the header)
+TSV_COLUMNS = ['level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+               'left', 'top', 'width', 'height', 'conf', 'text']
+
+_api_handles: Dict[Tuple[str, int], Dict] = {}
+_api_handles_lock = threading.Lock()
+
+
+def load_dependencies() -> None:
+    """Import OpenCV/NumPy/PIL/pytesseract once; exits with a JSON error if missing"""
+    global cv2, np, Image, pytesseract
+    if pytesseract is not None:
+        return
+    
+    try:
+        import cv2
+        import numpy as np
+        from PIL import Image
+        import pytesseract
+    except ImportError as e:
+        print(json.dumps({
+            "success": False,
+            "error": f"Missing dependency: {str(e)}",
+            "text": "",
+            "confidence": 0.0,
+            "provider": "tesseract"
+        }))
+        sys.exit(1)
+
+
+def load_tesserocr() -> bool:
+    """
+    Import tesserocr once; False if it is missing or broken
+    
+    Being installed is not enough: a build linked against another
+    libtesseract fails on import. The reason is kept in tesserocr_error.
+    
+    Tesseract has no per-handle thread setting: OpenMP reads
+    OMP_THREAD_LIMIT once, when libtesseract pulls it in. The import
+    therefore runs with the limit lowered to one PSM candidate's share of
+    the budget (recognize_best runs them side by side); the environment
+    is restored afterwards, for the subprocesses this process starts.
+    """
+    global tesserocr, tesserocr_error, tesserocr_threads
+    if tesserocr is not None:
+        return True
+    if tesserocr_error is not None:
+        return False
+    
+    if not ocr_health.package_info('tesserocr')["installed"]:
+        tesserocr_error = "tesserocr is not installed"
+        return False
+    threads = ocr_threads.split(ocr_threads.thread_budget(), len(TesseractOCR.PSM_MODES))
+    inherited = os.environ.get('OMP_THREAD_LIMIT')
+    os.environ['OMP_THREAD_LIMIT'] = str(threads)
+    try:
+        import tesserocr
+    except (ImportError, OSError) as e:
+        tesserocr_error = f"tesserocr failed to import: {e}"
+        ocr_output.log(f"[Tesseract] {tesserocr_error}", 'warning')
+        return False
+    finally:
+        if inherited is None:
+            os.environ.pop('OMP_THREAD_LIMIT', None)
+        else:
+            os.environ['OMP_THREAD_LIMIT'] = inherited
+    tesserocr_threads = threads
+    return True
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """
+    Effective backend: the given one, else OCR_TESSERACT_BACKEND, else 'auto'
+    
+    'auto' uses tesserocr only if it imports, and falls back to the binary
+    otherwise. An explicit 'tesserocr' that cannot be imported raises.
+    """
+    backend = (backend or os.environ.get('OCR_TESSERACT_BACKEND') or 'auto').lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown tesseract backend: {backend}")
+    
+    if backend == 'subprocess':
+        return backend
+    if load_tesserocr():
+        return 'tesserocr'
+    if backend == 'auto':
+        return 'subprocess'
+    raise ValueError(f"Tesseract backend 'tesserocr' unavailable: {tesserocr_error}")
+
+
+def backend_cache_fields(backend: Optional[str] = None) -> Dict:
+    """
+    Cache-key fields for the recognition backend, without importing it
+    
+    The requested backend (not the resolved one, which needs the import)
+    plus the installed tesserocr version from package metadata, so entries
+    from the binary and from tesserocr builds do not mix.
+    """
+    requested = (backend or os.environ.get('OCR_TESSERACT_BACKEND') or 'auto').lower()
+    fields = {"backend": requested}
+    if requested != 'subprocess':
+        fields["tesserocr"] = ocr_health.package_info('tesserocr')["version"]
+    return fields
+
+
+@contextmanager
+def tesserocr_api(language: str, psm_mode: int):
+    """
+    Exclusive use of the shared TessBaseAPI for a language and PSM mode
+    
+    Handles live as long as the process, and are created on first use so
+    every forked batch worker builds its own. One handle serves one caller
+    at a time; handles of different PSM modes load and recognize in
+    parallel (tesserocr releases the GIL while Tesseract runs).
+    """
+    if not load_tesserocr():
+        raise RuntimeError(tesserocr_error)
+    with _api_handles_lock:
+        handle = _api_handles.setdefault((language, psm_mode), {"api": None, "lock": threading.Lock()})
+    
+    with handle["lock"]:
+        if handle["api"] is None:
+            handle["api"] = tesserocr.PyTessBaseAPI(lang=language, psm=psm_mode)
+            handle["api"].SetVariable('preserve_interword_spaces', '1')
+        yield handle["api"]
 
 
 class AdvancedImagePreprocessor:
@@ -44,244 +215,269 @@ class AdvancedImagePreprocessor:
     Advanced image preprocessing optimized for receipt OCR
     
     Implements best practices:
-    - DPI normalization (300 DPI target)
+    - DPI normalization (300 DPI target, detected DPI, capped working size)
     - Noise reduction (bilateral filter, morphology)
-    - Deskewing (rotation correction)
+    - Deskewing (angle estimated on a downscaled proxy, rotation at full resolution)
     - Adaptive thresholding (binarization)
     - Edge cropping (remove dark borders)
     - Contrast enhancement
     """
     
-    def __init__(self, target_dpi: int = 300):
+    # Metadata DPI values written by cameras/screenshots regardless of content
+    PLACEHOLDER_DPIS = (72, 96)
+    
+    # Median glyph height of 9-10pt receipt print, in inches (~24px at 300 DPI)
+    REFERENCE_TEXT_HEIGHT_INCHES = 0.08
+    
+    # 80mm thermal paper; fallback prior when neither metadata nor text works
+    # (reported only, see resample_dpi)
+    RECEIPT_WIDTH_INCHES = 3.15
+    
+    def __init__(self, target_dpi: int = 300, max_megapixels: float = 12.0,
+                 max_upscale: float = 2.0, deskew_proxy_width: int = 1000,
+                 deskew_precision: float = 0.1):
+        """
+        Args:
+            target_dpi: DPI the image is resampled towards
+            max_megapixels: Cap on the working resolution
+            max_upscale: Largest allowed enlargement factor
+            deskew_proxy_width: Width of the copy the skew angle is estimated
+                on; 0 uses the original full-resolution Hough transform
+            deskew_precision: Angle precision of the proxy search, in degrees
+        """
+        load_dependencies()
         self.target_dpi = target_dpi
-        
-    def normalize_dpi(self, image: np.ndarray, current_dpi: int = 72) -> np.ndarray:
-        """Resize image to target DPI for optimal OCR"""
-        if current_dpi == self.target_dpi:
-            return image
-            
-        scale_factor = self.target_dpi / current_dpi
-        if scale_factor == 1.0:
-            return image
-            
-        height, width = image.shape[:2]
-        new_width = int(width * scale_factor)
-        new_height = int(height * scale_factor)
-        
-        print(f"[Preprocessor] Normalizing DPI: {current_dpi} -> {self.target_dpi} (scale: {scale_factor:.2f}x)", file=sys.stderr)
-        return cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
+        self.max_megapixels = max_megapixels
+        self.max_upscale = max_upscale
+        self.deskew_params = {
+            "method": "projection" if deskew_proxy_width > 0 else "hough",
+            "proxy_width": deskew_proxy_width,
+            "precision": deskew_precision
+        }
     
-    def denoise(self, image: np.ndarray) -> np.ndarray:
-        """Remove noise while preserving text edges"""
-        print("[Preprocessor] Applying bilateral denoise filter...", file=sys.stderr)
-        # Bilateral filter: reduces noise while keeping edges sharp
-        denoised = cv2.bilateralFilter(image, 9, 75, 75)
+    def read_metadata_dpi(self, image_path: ocr_input.ImageSource) -> Optional[float]:
+        """Read DPI from JFIF/EXIF/PNG metadata (header only, no pixel decode)"""
+        if ocr_input.is_buffer(image_path):
+            image_path = io.BytesIO(image_path)
+        try:
+            with Image.open(image_path) as pil_image:
+                dpi = pil_image.info.get('dpi')
+                if not dpi:
+                    x_resolution = pil_image.getexif().get(282)  # EXIF XResolution
+                    dpi = (x_resolution, x_resolution) if x_resolution else None
+        except Exception:
+            return None
         
-        # Additional morphological noise reduction
-        kernel = np.ones((1, 1), np.uint8)
-        denoised = cv2.morphologyEx(denoised, cv2.MORPH_CLOSE, kernel)
+        if not dpi:
+            return None
         
-        return denoised
+        value = float(dpi[0])
+        if value <= 1 or round(value) in self.PLACEHOLDER_DPIS:
+            return None
+        return value
     
-    def deskew(self, image: np.ndarray) -> Tuple[np.ndarray, float]:
-        """Correct image rotation/skew"""
-        print("[Preprocessor] Detecting and correcting skew...", file=sys.stderr)
+    def estimate_dpi_from_text(self, image: np.ndarray) -> Optional[float]:
+        """
+        Estimate DPI from the median height of glyph-like connected components
         
-        # Convert to grayscale if needed
+        Works on a copy at most 1000px wide so the cost is independent of the
+        upload resolution.
+        """
         gray = image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape[:2]
+        factor = min(1.0, 1000.0 / max(width, 1))
+        if factor < 1.0:
+            gray = cv2.resize(gray, (int(width * factor), int(height * factor)), interpolation=cv2.INTER_AREA)
         
-        # Detect edges
-        edges = cv2.Canny(gray, 50, 150, apertureSize=3)
-        
-        # Detect lines using Hough Transform
-        lines = cv2.HoughLines(edges, 1, np.pi / 180, 200)
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
         
-        if lines is None or len(lines) == 0:
-            print("[Preprocessor] No skew detected", file=sys.stderr)
-            return image, 0.0
+        small_height = gray.shape[0]
+        heights = []
+        for i in range(1, count):
+            w = stats[i, cv2.CC_STAT_WIDTH]
+            h = stats[i, cv2.CC_STAT_HEIGHT]
+            # Glyph-like: a few pixels tall, not a rule line or a photo blob
+            if 4 <= h <= small_height * 0.1 and 0.1 <= w / h <= 3.0:
+                heights.append(h)
         
-        # Calculate average angle
-        angles = []
-        for line in lines[:min(50, len(lines))]:  # Use top 50 lines
-            rho, theta = line[0]
-            angle = np.degrees(theta) - 90
-            if -45 < angle < 45:  # Filter out near-horizontal lines
-                angles.append(angle)
+        if len(heights) < 20:
+            return None
         
-        if not angles:
-            return image, 0.0
+        text_height = float(np.median(heights)) / factor
+        dpi = text_height / self.REFERENCE_TEXT_HEIGHT_INCHES
+        return dpi if 50 <= dpi <= 1200 else None
+    
+    def detect_dpi(self, image_path: ocr_input.ImageSource, image: np.ndarray) -> Tuple[float, str]:
+        """
+        Determine the effective DPI of an upload
         
-        median_angle = np.median(angles)
+        Returns:
+            (dpi, source) where source is 'metadata', 'text_height' or 'receipt_width'
+        """
+        dpi = self.read_metadata_dpi(image_path)
+        if dpi:
+            return dpi, 'metadata'
         
-        # Only deskew if angle is significant
-        if abs(median_angle) < 0.5:
-            print(f"[Preprocessor] Skew negligible: {median_angle:.2f}°", file=sys.stderr)
-            return image, median_angle
+        dpi = self.estimate_dpi_from_text(image)
+        if dpi:
+            return dpi, 'text_height'
         
-        print(f"[Preprocessor] Correcting skew: {median_angle:.2f}°", file=sys.stderr)
+        # Receipts are portrait: the short side is roughly the paper width
+        return min(image.shape[:2]) / self.RECEIPT_WIDTH_INCHES, 'receipt_width'
+    
+    def resample_dpi(self, dpi: float, source: str) -> float:
+        """
+        DPI to resample from: the detected one, unless it is the paper-width guess
         
-        # Rotate image
+        Phone photos rarely fill the frame with the receipt, so short side
+        over paper width overstates their DPI and would shrink them ~3x.
+        With only that guess the image keeps its resolution, and only the
+        max_megapixels cap applies.
+        """
+        return self.target_dpi if source == 'receipt_width' else dpi
+    
+    def resample_scale(self, image: np.ndarray, current_dpi: float) -> float:
+        """
+        Scale factor towards target DPI, bounded by max_upscale and max_megapixels
+        """
         height, width = image.shape[:2]
-        center = (width // 2, height // 2)
-        rotation_matrix = cv2.getRotationMatrix2D(center, median_angle, 1.0)
+        scale_factor = min(self.target_dpi / current_dpi, self.max_upscale)
         
-        # Calculate new dimensions to avoid cropping
-        cos = np.abs(rotation_matrix[0, 0])
-        sin = np.abs(rotation_matrix[0, 1])
-        new_width = int((height * sin) + (width * cos))
-        new_height = int((height * cos) + (width * sin))
+        max_pixels = self.max_megapixels * 1_000_000
+        if width * height * scale_factor * scale_factor > max_pixels:
+            scale_factor = (max_pixels / (width * height)) ** 0.5
         
-        rotation_matrix[0, 2] += (new_width / 2) - center[0]
-        rotation_matrix[1, 2] += (new_height / 2) - center[1]
-        
-        deskewed = cv2.warpAffine(image, rotation_matrix, (new_width, new_height), 
-                                   flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
-        
-        return deskewed, median_angle
+        return scale_factor
     
-    def adaptive_threshold(self, image: np.ndarray) -> np.ndarray:
-        """Apply adaptive thresholding for binarization"""
-        print("[Preprocessor] Applying adaptive thresholding...", file=sys.stderr)
-        
-        # Convert to grayscale if needed
-        gray = image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    def normalize_dpi(self, image: np.ndarray, current_dpi: float = 72) -> np.ndarray:
+        """
+        Resize image towards target DPI for optimal OCR (resolution-capped)
         
-        # Apply adaptive threshold
-        binary = cv2.adaptiveThreshold(
-            gray, 255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY,
-            11,  # Block size
-            2    # Constant subtracted from mean
-        )
+        An image already at the target DPI is still shrunk if it exceeds
+        max_megapixels; within 5% of scale 1.0 it is returned as is.
+        """
+        scale_factor = self.resample_scale(image, current_dpi)
+        if abs(scale_factor - 1.0) < 0.05:
+            return image
         
-        # Check if image is inverted (more white pixels than black)
-        # Tesseract expects black text on white background
-        white_pixels = np.sum(binary == 255)
-        black_pixels = np.sum(binary == 0)
+        height, width = image.shape[:2]
+        new_width = int(width * scale_factor)
+        new_height = int(height * scale_factor)
         
-        if black_pixels > white_pixels:
-            print("[Preprocessor] Inverting binary image (detected white text on black background)", file=sys.stderr)
-            binary = cv2.bitwise_not(binary)
+        # INTER_AREA for shrinking (antialiased, cheap), INTER_CUBIC only when enlarging
+        interpolation = cv2.INTER_AREA if scale_factor < 1.0 else cv2.INTER_CUBIC
         
-        return binary
+        ocr_output.log(f"[Preprocessor] Normalizing DPI: {current_dpi:.0f} -> {self.target_dpi} (scale: {scale_factor:.2f}x)", 'debug')
+        return cv2.resize(image, (new_width, new_height), interpolation=interpolation)
+    
+    # Single-step helpers (private buffers; process() runs the shared pipeline)
+    
+    def denoise(self, image: np.ndarray) -> np.ndarray:
+        """Remove noise while preserving text edges"""
+        return ocr_preprocessing.run_step("denoising", image)
+    
+    def deskew(self, image: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Correct image rotation/skew"""
+        metadata = {}
+        deskewed = ocr_preprocessing.run_step("deskewing", image, metadata, **self.deskew_params)
+        return deskewed, metadata["skew_angle"]
+    
+    def adaptive_threshold(self, image: np.ndarray) -> np.ndarray:
+        """Apply adaptive thresholding for binarization (dark text on light background)"""
+        return ocr_preprocessing.run_step("adaptive_threshold", image, fix_inverted=True)
     
     def crop_borders(self, image: np.ndarray) -> np.ndarray:
         """Remove dark borders/edges from image"""
-        print("[Preprocessor] Cropping borders...", file=sys.stderr)
-        
-        gray = image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Find non-black regions
-        _, thresh = cv2.threshold(gray, 1, 255, cv2.THRESH_BINARY)
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        if not contours:
-            return image
-        
-        # Get bounding box of largest contour
-        largest_contour = max(contours, key=cv2.contourArea)
-        x, y, w, h = cv2.boundingRect(largest_contour)
-        
-        # Add small margin
-        margin = 10
-        x = max(0, x - margin)
-        y = max(0, y - margin)
-        w = min(image.shape[1] - x, w + 2 * margin)
-        h = min(image.shape[0] - y, h + 2 * margin)
-        
-        cropped = image[y:y+h, x:x+w]
-        print(f"[Preprocessor] Cropped to {w}x{h} (from {image.shape[1]}x{image.shape[0]})", file=sys.stderr)
-        
-        return cropped
+        return ocr_preprocessing.run_step("border_cropping", image)
     
     def enhance_contrast(self, image: np.ndarray) -> np.ndarray:
         """Enhance contrast using CLAHE"""
-        print("[Preprocessor] Enhancing contrast with CLAHE...", file=sys.stderr)
-        
-        gray = image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Create CLAHE (Contrast Limited Adaptive Histogram Equalization)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(gray)
-        
-        return enhanced
+        return ocr_preprocessing.run_step("contrast_enhancement", image)
     
     def sharpen(self, image: np.ndarray) -> np.ndarray:
         """Sharpen image to enhance text edges"""
-        print("[Preprocessor] Sharpening image...", file=sys.stderr)
-        
-        kernel = np.array([[-1, -1, -1],
-                           [-1,  9, -1],
-                           [-1, -1, -1]])
-        sharpened = cv2.filter2D(image, -1, kernel)
-        
-        return sharpened
+        return ocr_preprocessing.run_step("sharpening", image)
     
-    def process(self, image_path: str, save_debug: bool = False) -> Tuple[np.ndarray, Dict]:
+    def process(self, image_path: ocr_input.ImageSource, save_debug: bool = False,
+                timer: Optional[StageTimer] = None,
+                quality_gate: Optional[str] = None,
+                image: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Dict]:
         """
         Complete preprocessing pipeline for receipt OCR
         
+        Args:
+            image_path: Path to receipt image, or its encoded bytes
+            save_debug: Write the binarized image next to the input (paths only)
+            timer: Collects per-step timings; one is created if omitted
+            quality_gate: Quality gate mode (default: $OCR_QUALITY_GATE or warn)
+            image: The already decoded (and gated) image, e.g. from the engine
+                cascade; load and gate are skipped and image_path is only read
+                for its DPI metadata. It is not modified.
+        
+        Everything after DPI normalization is the shared "tesseract"
+        preprocessing profile (see ocr_preprocessing.py).
+        
         Returns:
-            processed_image: Optimized image for OCR
-            metadata: Processing metadata (DPI, skew, dimensions, etc.)
+            processed_image: Optimized image for OCR (a pipeline buffer, valid
+                until the next process() call in this thread)
+            metadata: Processing metadata (DPI, skew, dimensions, per-step timings, etc.)
+        
+        Raises:
+            ocr_quality.QualityRejected: the gate is enforced and rejected the image
         """
-        print(f"[Preprocessor] Loading image: {image_path}", file=sys.stderr)
+        owns_timer = timer is None
+        timer = timer or StageTimer()
         
-        # Load image
-        image = cv2.imread(image_path)
+        quality = None
         if image is None:
-            raise ValueError(f"Could not load image: {image_path}")
+            ocr_output.log(f"[Preprocessor] Loading image: {ocr_input.describe(image_path)}", 'debug')
+            
+            # Load image
+            with timer.stage("load") as record:
+                image = ocr_preprocessing.decode_image(image_path)
+                record["output"] = image
+            
+            # Reject unreadable captures before any real work
+            with timer.stage("quality_gate", image):
+                quality = ocr_quality.check(image, quality_gate)
         
         metadata = {
             "original_size": {"width": image.shape[1], "height": image.shape[0]},
             "steps_applied": []
         }
+        if quality is not None:
+            metadata["quality"] = quality
         
-        # Step 1: Normalize DPI
-        image = self.normalize_dpi(image)
+        # Step 1: Normalize DPI (detected, not assumed; working size is capped)
+        with timer.stage("dpi_normalization", image) as record:
+            current_dpi, dpi_source = self.detect_dpi(image_path, image)
+            image = self.normalize_dpi(image, self.resample_dpi(current_dpi, dpi_source))
+            record["output"] = image
+        metadata["detected_dpi"] = round(current_dpi, 1)
+        metadata["dpi_source"] = dpi_source
+        metadata["dpi_scale"] = round(image.shape[1] / metadata["original_size"]["width"], 3)
         metadata["steps_applied"].append("dpi_normalization")
         
-        # Step 2: Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        metadata["steps_applied"].append("grayscale_conversion")
-        
-        # Step 3: Crop borders
-        gray = self.crop_borders(gray)
-        metadata["steps_applied"].append("border_cropping")
-        
-        # Step 4: Denoise
-        gray = self.denoise(gray)
-        metadata["steps_applied"].append("denoising")
-        
-        # Step 5: Deskew
-        gray, skew_angle = self.deskew(gray)
-        metadata["skew_angle"] = float(skew_angle)
-        metadata["steps_applied"].append("deskewing")
-        
-        # Step 6: Enhance contrast
-        gray = self.enhance_contrast(gray)
-        metadata["steps_applied"].append("contrast_enhancement")
-        
-        # Step 7: Sharpen
-        gray = self.sharpen(gray)
-        metadata["steps_applied"].append("sharpening")
-        
-        # Step 8: Simple Otsu's thresholding (more reliable than adaptive for receipts)
-        # Otsu's method automatically determines optimal threshold
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        metadata["steps_applied"].append("otsu_threshold")
+        # Steps 2-8: grayscale, crop borders, denoise, deskew, contrast, sharpen,
+        # Otsu threshold (more reliable than adaptive for receipts)
+        binary = ocr_preprocessing.get_pipeline("tesseract").run(
+            image, timer, metadata, params={"deskewing": self.deskew_params}
+        )
         
         metadata["final_size"] = {"width": binary.shape[1], "height": binary.shape[0]}
         
         # Save debug image if requested
-        if save_debug:
+        if save_debug and not ocr_input.is_buffer(image_path):
             debug_path = image_path.replace('.', '_preprocessed.')
             cv2.imwrite(debug_path, binary)
-            print(f"[Preprocessor] Saved debug image: {debug_path}", file=sys.stderr)
+            ocr_output.log(f"[Preprocessor] Saved debug image: {debug_path}")
             metadata["debug_image"] = debug_path
         
-        print(f"[Preprocessor] Pipeline complete: {len(metadata['steps_applied'])} steps applied", file=sys.stderr)
+        ocr_output.log(f"[Preprocessor] Pipeline complete: {len(metadata['steps_applied'])} steps applied", 'debug')
+        
+        if owns_timer:
+            metadata["timings"] = timer.report()
         
         return binary, metadata
 
@@ -306,8 +502,10 @@ class TesseractOCR:
         3,  # Fully automatic page segmentation
     ]
     
-    def __init__(self, language: str = 'eng'):
+    def __init__(self, language: str = 'eng', backend: Optional[str] = None):
+        load_dependencies()
         self.language = language
+        self.backend = resolve_backend(backend)
         
     def recognize(self, image: np.ndarray, psm_mode: int = 6) -> Dict:
         """
@@ -320,7 +518,7 @@ class TesseractOCR:
         Returns:
             dict with text, confidence, and metadata
         """
-        print(f"[Tesseract] Running OCR with PSM mode {psm_mode}...", file=sys.stderr)
+        ocr_output.log(f"[Tesseract] Running OCR with PSM mode {psm_mode}...", 'debug')
         
         # Custom config for receipts
         custom_config = f'--psm {psm_mode} -c preserve_interword_spaces=1'
@@ -329,67 +527,19 @@ class TesseractOCR:
         
         try:
             # Extract text with confidence data
-            data = pytesseract.image_to_data(
-                image,
-                lang=self.language,
-                config=custom_config,
-                output_type=pytesseract.Output.DICT
-            )
-            
-            # Calculate overall confidence (average of confident words)
-            confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
-            
-            # Extract per-line confidence and build full text
-            lines = []
-            all_words = []
-            current_line = []
-            current_line_conf = []
-            current_line_num = -1
-            
-            for i in range(len(data['text'])):
-                # Group by line_num for proper line extraction
-                line_num = data['line_num'][i]
-                
-                if line_num != current_line_num:
-                    # Save previous line
-                    if current_line:
-                        line_text = ' '.join(current_line)
-                        line_conf = sum(current_line_conf) / len(current_line_conf) if current_line_conf else 0
-                        lines.append({"text": line_text, "confidence": line_conf / 100})
-                    # Start new line
-                    current_line = []
-                    current_line_conf = []
-                    current_line_num = line_num
-                
-                word = data['text'][i].strip()
-                conf = int(data['conf'][i])
-                
-                if word and conf > 0:
-                    current_line.append(word)
-                    current_line_conf.append(conf)
-                    all_words.append(word)
-            
-            # Add last line
-            if current_line:
-                line_text = ' '.join(current_line)
-                line_conf = sum(current_line_conf) / len(current_line_conf) if current_line_conf else 0
-                lines.append({"text": line_text, "confidence": line_conf / 100})
-            
-            # Build full text from lines (preserves structure better than joining all words)
-            text = '\n'.join([line['text'] for line in lines])
-            
-            return {
-                "text": text.strip(),
-                "confidence": avg_confidence / 100,  # Convert to 0-1 range
-                "line_count": len(lines),
-                "lines": lines,
-                "word_count": len(data['text']),
-                "psm_mode": psm_mode
-            }
+            if self.backend == 'tesserocr':
+                data = self._api_data(image, psm_mode)
+            else:
+                data = pytesseract.image_to_data(
+                    image,
+                    lang=self.language,
+                    config=custom_config,
+                    output_type=pytesseract.Output.DICT
+                )
+            return self._build_result(data, psm_mode)
             
         except Exception as e:
-            print(f"[Tesseract] OCR error: {str(e)}", file=sys.stderr)
+            ocr_output.log(f"[Tesseract] OCR error: {str(e)}", 'warning')
             return {
                 "text": "",
                 "confidence": 0.0,
@@ -397,74 +547,563 @@ class TesseractOCR:
                 "psm_mode": psm_mode
             }
     
-    def recognize_best(self, image: np.ndarray) -> Dict:
+    def _build_result(self, data: Dict, psm_mode: int) -> Dict:
         """
-        Try multiple PSM modes and return best result
+        Turn image_to_data-style column dict into the recognize() result schema
+        
+        Each line carries a ``bbox`` ([left, top, right, bottom] of its words,
+        in the recognized image's pixels) for selective re-OCR (ocr_refine.py).
         """
+        # Calculate overall confidence (average of confident words)
+        confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
+        avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        
+        # Extract per-line confidence and build full text
+        lines = []
+        all_words = []
+        current_line = []
+        current_line_conf = []
+        current_line_box = None
+        current_line_num = -1
+        
+        for i in range(len(data['text'])):
+            # Group by line_num for proper line extraction
+            line_num = data['line_num'][i]
+            
+            if line_num != current_line_num:
+                # Save previous line
+                if current_line:
+                    line_text = ' '.join(current_line)
+                    line_conf = sum(current_line_conf) / len(current_line_conf) if current_line_conf else 0
+                    lines.append({"text": line_text, "confidence": line_conf / 100, "bbox": current_line_box})
+                # Start new line
+                current_line = []
+                current_line_conf = []
+                current_line_box = None
+                current_line_num = line_num
+            
+            word = data['text'][i].strip()
+            conf = int(data['conf'][i])
+            
+            if word and conf > 0:
+                current_line.append(word)
+                current_line_conf.append(conf)
+                all_words.append(word)
+                
+                left, top = data['left'][i], data['top'][i]
+                right, bottom = left + data['width'][i], top + data['height'][i]
+                if current_line_box is None:
+                    current_line_box = [left, top, right, bottom]
+                else:
+                    current_line_box = [min(current_line_box[0], left), min(current_line_box[1], top),
+                                        max(current_line_box[2], right), max(current_line_box[3], bottom)]
+        
+        # Add last line
+        if current_line:
+            line_text = ' '.join(current_line)
+            line_conf = sum(current_line_conf) / len(current_line_conf) if current_line_conf else 0
+            lines.append({"text": line_text, "confidence": line_conf / 100, "bbox": current_line_box})
+        
+        # Build full text from lines (preserves structure better than joining all words)
+        text = '\n'.join([line['text'] for line in lines])
+        
+        return {
+            "text": text.strip(),
+            "confidence": avg_confidence / 100,  # Convert to 0-1 range
+            "line_count": len(lines),
+            "lines": lines,
+            "word_count": len(data['text']),
+            "psm_mode": psm_mode
+        }
+    
+    def _run_tsv(self, image_file: str, psm_mode: int, cancel: threading.Event,
+                 threads: Optional[int] = None) -> Optional[Dict]:
+        """
+        Run the tesseract binary for one PSM mode and parse its TSV output
+        
+        Unlike pytesseract.image_to_data this keeps a handle on the
+        subprocess, so it can be killed as soon as ``cancel`` is set.
+        ``threads`` overrides OMP_THREAD_LIMIT for this run only.
+        
+        Returns:
+            Column dict in pytesseract Output.DICT layout, or None if cancelled
+        """
+        cmd = [
+            pytesseract.pytesseract.tesseract_cmd, image_file, 'stdout',
+            '-l', self.language,
+            '--psm', str(psm_mode),
+            '-c', 'preserve_interword_spaces=1',
+            'tsv'
+        ]
+        env = None
+        if threads is not None:
+            env = dict(os.environ, OMP_THREAD_LIMIT=str(threads))
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+        
+        while True:
+            try:
+                stdout, stderr = proc.communicate(timeout=0.05)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel.is_set():
+                    proc.kill()
+                    proc.communicate()
+                    return None
+        
+        if proc.returncode != 0:
+            raise RuntimeError(stderr.decode('utf-8', errors='replace').strip() or
+                               f"tesseract exited with code {proc.returncode}")
+        
+        rows = stdout.decode('utf-8', errors='replace').splitlines()
+        return self._parse_tsv(rows[0].split('\t') if rows else [], rows[1:])
+    
+    def _api_data(self, image: np.ndarray, psm_mode: int) -> Dict:
+        """
+        Recognize with the in-process backend (see tesserocr_api)
+        
+        The pixel buffer goes to Tesseract as-is, like the array pytesseract
+        would have written to a PNG, and its TSV comes back as a string.
+        
+        Returns:
+            Column dict in pytesseract Output.DICT layout
+        """
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        
+        with tesserocr_api(self.language, psm_mode) as api:
+            try:
+                api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+                api.Recognize()
+                tsv = api.GetTSVText(0)
+            finally:
+                api.Clear()
+        
+        return self._parse_tsv(TSV_COLUMNS, tsv.splitlines())
+    
+    @staticmethod
+    def _parse_tsv(header: List[str], rows: List[str]) -> Dict:
+        """Tesseract TSV rows to a column dict (numbers as int, missing as -1)"""
+        data = {column: [] for column in header}
+        
+        for row in rows:
+            cells = row.split('\t')
+            cells += [''] * (len(header) - len(cells))  # empty text column is dropped
+            for column, cell in zip(header, cells):
+                if column == 'text':
+                    data[column].append(cell)
+                else:
+                    data[column].append(int(float(cell)) if cell else -1)
+        
+        return data
+    
+    def recognize_best(self, image: np.ndarray, confidence_threshold: Optional[float] = None,
+                       max_workers: Optional[int] = None) -> Dict:
+        """
+        Try multiple PSM modes concurrently and return best result
+        
+        Each PSM mode is a separate tesseract subprocess sharing one temp
+        image (tesserocr backend: its own API handle, no temp file). If
+        ``confidence_threshold`` (0-1) is set, the first mode to reach it
+        wins and the still-running modes are killed (tesserocr: modes not
+        yet started are skipped; a running one cannot be interrupted).
+        
+        Concurrent modes share the thread budget instead of each taking
+        all of it: every binary gets its share as OMP_THREAD_LIMIT, and
+        tesserocr (whose limit was fixed at import) runs only as many modes
+        at once as the budget holds.
+        
+        The returned dict carries ``psm_candidates`` with per-mode status,
+        confidence and wall time.
+        """
+        cancel = threading.Event()
+        candidates = {}
         best_result = None
         best_confidence = 0.0
         
-        for psm in self.PSM_MODES:
-            result = self.recognize(image, psm)
+        def run_mode(psm: int) -> Tuple[int, Optional[Dict], float]:
+            started = time.perf_counter()
+            if image_file is None:
+                data = None if cancel.is_set() else self._api_data(image, psm)
+            else:
+                data = self._run_tsv(image_file, psm, cancel, threads)
+            elapsed = time.perf_counter() - started
+            return psm, (self._build_result(data, psm) if data is not None else None), elapsed
+        
+        image_file = None
+        if self.backend == 'subprocess':
+            fd, image_file = tempfile.mkstemp(suffix='.png', prefix='tess_')
+            os.close(fd)
+        try:
+            if image_file is not None:
+                cv2.imwrite(image_file, image)
+            workers = min(max_workers or len(self.PSM_MODES), len(self.PSM_MODES))
+            budget = ocr_threads.thread_budget()
+            if image_file is None:
+                workers = min(workers, max(1, budget // (tesserocr_threads or budget)))
+            threads = ocr_threads.split(budget, workers)
             
-            if result.get('confidence', 0) > best_confidence:
-                best_confidence = result['confidence']
-                best_result = result
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(run_mode, psm): psm for psm in self.PSM_MODES}
+                
+                for future in as_completed(futures):
+                    psm = futures[future]
+                    if future.cancelled():
+                        continue
+                    try:
+                        psm, result, elapsed = future.result()
+                    except Exception as e:
+                        ocr_output.log(f"[Tesseract] OCR error (PSM {psm}): {str(e)}", 'warning')
+                        candidates[psm] = {"status": "error", "error": str(e)}
+                        continue
+                    
+                    if result is None:
+                        candidates[psm] = {"status": "cancelled", "time_ms": round(elapsed * 1000, 1)}
+                        continue
+                    
+                    candidates[psm] = {
+                        "status": "completed",
+                        "confidence": round(result['confidence'], 4),
+                        "time_ms": round(elapsed * 1000, 1)
+                    }
+                    ocr_output.log(f"[Tesseract] PSM {psm}: confidence {result['confidence']:.2%} in {elapsed:.2f}s", 'debug')
+                    
+                    # Ties go to the preferred (earlier) PSM mode, as in sequential order
+                    if (best_result is None or result['confidence'] > best_confidence or
+                            (result['confidence'] == best_confidence and
+                             self.PSM_MODES.index(psm) < self.PSM_MODES.index(best_result['psm_mode']))):
+                        best_confidence = result['confidence']
+                        best_result = result
+                    
+                    if confidence_threshold is not None and result['confidence'] >= confidence_threshold:
+                        ocr_output.log(f"[Tesseract] PSM {psm} reached threshold {confidence_threshold:.2%}, cancelling remaining modes", 'debug')
+                        cancel.set()
+                        for pending in futures:
+                            pending.cancel()
+        finally:
+            if image_file is not None:
+                os.unlink(image_file)
+        
+        for psm in self.PSM_MODES:
+            candidates.setdefault(psm, {"status": "cancelled"})
+        
+        if best_result is None:
+            errors = [c.get("error") for c in candidates.values() if c.get("error")]
+            best_result = {
+                "text": "",
+                "confidence": 0.0,
+                "error": errors[0] if errors else "No PSM mode produced a result",
+                "psm_mode": None
+            }
         
-        print(f"[Tesseract] Best PSM mode: {best_result['psm_mode']} (confidence: {best_confidence:.2%})", file=sys.stderr)
+        best_result["psm_candidates"] = {str(psm): candidates[psm] for psm in self.PSM_MODES}
+        best_result["psm_confidence_threshold"] = confidence_threshold
+        
+        ocr_output.log(f"[Tesseract] Best PSM mode: {best_result['psm_mode']} (confidence: {best_confidence:.2%})", 'debug')
         return best_result
 
 
+def process_image(image_path: ocr_input.ImageSource, language: str = 'eng', psm_mode: int = 6,
+                  try_all_psm: bool = False, save_debug: bool = False,
+                  target_dpi: int = 300,
+                  psm_confidence_threshold: Optional[float] = None,
+                  max_megapixels: float = 12.0,
+                  deskew_proxy_width: int = 1000, deskew_precision: float = 0.1,
+                  profile: bool = False, trace_memory: bool = False,
+                  quality_gate: Optional[str] = None, backend: Optional[str] = None) -> Dict:
+    """
+    Preprocess and OCR a single image, returning the CLI output dict
+    
+    Per-step timings (preprocessing steps plus recognition) are returned in
+    metadata.timings; ``profile``/``trace_memory`` add cProfile and
+    tracemalloc data to that block.
+    
+    An image rejected by the quality gate returns success=false with the
+    verdict under "quality", without running OCR. A failed recognition
+    returns success=false with its error (and is never cached).
+    
+    Raises on missing/unreadable input; callers decide how to report it.
+    """
+    if not ocr_input.source_exists(image_path):
+        raise FileNotFoundError(f"Image not found: {ocr_input.describe(image_path)}")
+    
+    timer = StageTimer(profile=profile, trace_memory=trace_memory)
+    
+    # Preprocess image
+    preprocessor = AdvancedImagePreprocessor(target_dpi=target_dpi, max_megapixels=max_megapixels,
+                                             deskew_proxy_width=deskew_proxy_width,
+                                             deskew_precision=deskew_precision)
+    try:
+        processed_image, preprocessing_metadata = preprocessor.process(
+            image_path,
+            save_debug=save_debug,
+            timer=timer,
+            quality_gate=quality_gate
+        )
+    except ocr_quality.QualityRejected as e:
+        ocr_output.log(f"[Tesseract] {e}", 'warning')
+        return {
+            "success": False,
+            "error": str(e),
+            "text": "",
+            "confidence": 0.0,
+            "provider": "tesseract",
+            "quality": e.verdict,
+            "metadata": {"timings": timer.report()}
+        }
+    
+    # Run OCR
+    ocr = TesseractOCR(language=language, backend=backend)
+    
+    with timer.stage("recognition", processed_image):
+        if try_all_psm:
+            ocr_result = ocr.recognize_best(processed_image, confidence_threshold=psm_confidence_threshold)
+        else:
+            ocr_result = ocr.recognize(processed_image, psm_mode=psm_mode)
+    
+    # A failed recognition (binary missing, tesseract error) is not a result
+    if "error" in ocr_result:
+        return {
+            "success": False,
+            "error": ocr_result["error"],
+            "text": "",
+            "confidence": 0.0,
+            "provider": "tesseract",
+            "metadata": {"timings": timer.report()}
+        }
+    
+    # Combine results
+    return {
+        "success": True,
+        "text": ocr_result.get("text", ""),
+        "confidence": ocr_result.get("confidence", 0.0),
+        "line_count": ocr_result.get("line_count", 0),
+        "lines": ocr_result.get("lines", []),
+        "provider": "tesseract",
+        "metadata": {
+            **preprocessing_metadata,
+            "psm_mode": ocr_result.get("psm_mode"),
+            "psm_candidates": ocr_result.get("psm_candidates"),
+            "word_count": ocr_result.get("word_count"),
+            "backend": ocr.backend,
+            "language": language,
+            "target_dpi": target_dpi,
+            "timings": timer.report()
+        }
+    }
+
+
+def health_report() -> Dict:
+    """Versions and tesseract binary/languages, without importing OpenCV"""
+    started = time.perf_counter()
+    report = ocr_health.build_report(
+        "tesseract",
+        ["cv2", "numpy", "PIL", "pytesseract"],
+        binaries={"tesseract": ocr_health.binary_info('tesseract')},
+        started=started
+    )
+    report["packages"]["tesserocr"] = ocr_health.package_info('tesserocr')  # Optional backend
+    try:
+        report["backend"] = resolve_backend()
+    except ValueError as e:
+        report["backend"] = None
+        report["backend_error"] = str(e)
+    if tesserocr_error and report["packages"]["tesserocr"]["installed"]:
+        report["packages"]["tesserocr"]["error"] = tesserocr_error
+    
+    # Installed traineddata (listing does not load any model)
+    languages = []
+    if report["binaries"]["tesseract"]["present"]:
+        try:
+            completed = subprocess.run(['tesseract', '--list-langs'], capture_output=True, text=True, timeout=5)
+            languages = [line.strip() for line in completed.stdout.splitlines()[1:] if line.strip()]
+        except (OSError, subprocess.SubprocessError):
+            pass
+    report["models"] = {"tessdata": {"present": bool(languages), "languages": languages}}
+    return report
+
+
+def cache_key(cache: OCRResultCache, image_path: ocr_input.ImageSource, options: Dict) -> str:
+    """Cache key for a tesseract request (options as passed to process_image)"""
+    key_options = {
+        name: value for name, value in options.items()
+        if name not in ('language', 'save_debug', 'profile', 'trace_memory')
+    }
+    # tesserocr may link a different libtesseract than the binary
+    key_options.update(backend_cache_fields(options.get('backend')))
+    key_options["preprocess_steps"] = ocr_preprocessing.profile_steps("tesseract")
+    key_options["quality_gate"] = ocr_quality.gate_mode(options.get('quality_gate'))
+    return cache.make_key(image_path, 'tesseract', [options.get('language', 'eng')],
+                          key_options, code_path=(__file__, ocr_preprocessing.__file__, ocr_quality.__file__))
+
+
+def process_image_cached(image_path: ocr_input.ImageSource, options: Dict, cache: OCRResultCache) -> Dict:
+    """
+    process_image() through the result cache
+    
+    --save-debug and profiling runs always recompute, since the debug image
+    and the measurements are the point of those runs.
+    """
+    if options.get('save_debug') or options.get('profile') or options.get('trace_memory'):
+        return process_image(image_path, **options)
+    
+    if not ocr_input.source_exists(image_path):
+        raise FileNotFoundError(f"Image not found: {ocr_input.describe(image_path)}")
+    
+    key = cache_key(cache, image_path, options)
+    result = cache.get(key)
+    if result is not None:
+        return cache.annotate(result, hit=True)
+    
+    result = process_image(image_path, **options)
+    if result.get('success'):
+        cache.put(key, result)
+    return cache.annotate(result, hit=False)
+
+
+def _init_batch_worker(threads: int) -> None:
+    """Give each pool worker its share of the budget so N workers never oversubscribe"""
+    load_dependencies()
+    ocr_threads.configure_environment(threads)  # OMP_THREAD_LIMIT for tesseract (tesserocr loads after this)
+    ocr_threads.apply_runtime(cv2=cv2, threads=threads)
+
+
+def _process_batch_item(index: int, image_path: str, options: Dict,
+                        use_cache: bool = True) -> Dict:
+    """Pool task: never raises, so one bad receipt cannot abort the batch"""
+    try:
+        result = process_image_cached(image_path, options, OCRResultCache(enabled=None if use_cache else False))
+    except Exception as e:
+        result = {
+            "success": False,
+            "error": str(e),
+            "text": "",
+            "confidence": 0.0,
+            "provider": "tesseract"
+        }
+    result["index"] = index
+    result["image_path"] = image_path
+    return result
+
+
+def read_manifest(manifest_path: str) -> List[str]:
+    """Read image paths from a manifest file (one per line, '#' comments, '-' for stdin)"""
+    handle = sys.stdin if manifest_path == '-' else open(manifest_path, 'r')
+    try:
+        return [
+            line.strip() for line in handle
+            if line.strip() and not line.strip().startswith('#')
+        ]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def process_batch(image_paths: List[str], options: Dict, workers: Optional[int] = None,
+                  use_cache: bool = True) -> int:
+    """
+    OCR many images across a process pool, printing one JSON line per result
+    
+    Returns:
+        Number of failed images
+    """
+    budget = ocr_threads.thread_budget()
+    workers = workers or budget
+    workers = max(1, min(workers, len(image_paths)))
+    
+    # Import once in the parent: forked workers inherit the loaded modules,
+    # and a missing dependency fails the batch once instead of per worker
+    load_dependencies()
+    threads = ocr_threads.split(budget, workers)
+    ocr_output.log(f"[Tesseract] Batch: {len(image_paths)} images on {workers} workers x {threads} threads")
+    
+    failures = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(threads,)) as pool:
+        futures = [
+            pool.submit(_process_batch_item, index, image_path, options, use_cache)
+            for index, image_path in enumerate(image_paths)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            if not result.get("success"):
+                failures += 1
+            ocr_output.emit(result)
+    
+    return failures
+
+
 def main():
     parser = argparse.ArgumentParser(description='Advanced Tesseract OCR Processor')
-    parser.add_argument('image_path', help='Path to receipt image')
+    parser.add_argument('image_paths', nargs='*', metavar='image_path', help='Path to receipt image ("-" reads the image bytes from stdin)')
     parser.add_argument('--lang', default='eng', help='Language code (default: eng)')
     parser.add_argument('--psm', type=int, default=6, help='Page segmentation mode (default: 6)')
     parser.add_argument('--try-all-psm', action='store_true', help='Try all PSM modes and pick best')
+    parser.add_argument('--psm-confidence-threshold', type=float, default=None,
+                        help='With --try-all-psm, stop at the first PSM mode reaching this confidence (0-1)')
     parser.add_argument('--save-debug', action='store_true', help='Save preprocessed image for debugging')
     parser.add_argument('--target-dpi', type=int, default=300, help='Target DPI for normalization (default: 300)')
+    parser.add_argument('--max-megapixels', type=float, default=12.0,
+                        help='Cap on the working resolution after DPI normalization (default: 12)')
+    parser.add_argument('--deskew-proxy-width', type=int, default=1000,
+                        help='Width of the copy used to estimate skew; 0 = full-resolution Hough (default: 1000)')
+    parser.add_argument('--deskew-precision', type=float, default=0.1,
+                        help='Skew angle precision in degrees (default: 0.1)')
+    parser.add_argument('--batch', action='store_true', help='Process every image_path and emit one JSON line per result')
+    parser.add_argument('--manifest', help='File with one image path per line (implies --batch, "-" reads stdin)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Batch worker processes (default: the thread budget, see ocr_threads.py)')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the on-disk result cache')
+    parser.add_argument('--profile', action='store_true', help='Add cProfile top functions to metadata.timings')
+    parser.add_argument('--trace-memory', action='store_true', help='Add per-step tracemalloc peaks to metadata.timings')
+    parser.add_argument('--quality-gate', choices=ocr_quality.GATE_MODES, default=None,
+                        help='Reject, only report, or skip unreadable captures (default: $OCR_QUALITY_GATE or warn)')
+    parser.add_argument('--backend', choices=BACKENDS, default=None,
+                        help='In-process tesserocr or the tesseract binary (default: $OCR_TESSERACT_BACKEND or auto)')
+    parser.add_argument('--health', action='store_true',
+                        help='Report package versions and tesseract languages without loading OpenCV')
+    ocr_output.add_arguments(parser)
     
     args = parser.parse_args()
+    ocr_output.configure(args.output, args.log_level)
+    
+    if args.health:
+        ocr_health.print_report(health_report())
+    
+    options = {
+        "language": args.lang,
+        "psm_mode": args.psm,
+        "try_all_psm": args.try_all_psm,
+        "save_debug": args.save_debug,
+        "target_dpi": args.target_dpi,
+        "psm_confidence_threshold": args.psm_confidence_threshold,
+        "max_megapixels": args.max_megapixels,
+        "deskew_proxy_width": args.deskew_proxy_width,
+        "deskew_precision": args.deskew_precision,
+        "profile": args.profile,
+        "trace_memory": args.trace_memory,
+        "quality_gate": args.quality_gate,
+        "backend": args.backend
+    }
+    
+    if args.batch or args.manifest:
+        image_paths = list(args.image_paths)
+        if args.manifest:
+            image_paths.extend(read_manifest(args.manifest))
+        if not image_paths:
+            parser.error('no images given for batch mode')
+        failures = process_batch(image_paths, options, workers=args.workers, use_cache=not args.no_cache)
+        sys.exit(0 if failures == 0 else 1)
+    
+    if len(args.image_paths) != 1:
+        parser.error('exactly one image_path is required (use --batch for several)')
     
     try:
-        # Validate input
-        if not Path(args.image_path).exists():
-            raise FileNotFoundError(f"Image not found: {args.image_path}")
-        
-        # Preprocess image
-        preprocessor = AdvancedImagePreprocessor(target_dpi=args.target_dpi)
-        processed_image, preprocessing_metadata = preprocessor.process(
-            args.image_path,
-            save_debug=args.save_debug
-        )
-        
-        # Run OCR
-        ocr = TesseractOCR(language=args.lang)
-        
-        if args.try_all_psm:
-            ocr_result = ocr.recognize_best(processed_image)
-        else:
-            ocr_result = ocr.recognize(processed_image, psm_mode=args.psm)
-        
-        # Combine results
-        output = {
-            "success": True,
-            "text": ocr_result.get("text", ""),
-            "confidence": ocr_result.get("confidence", 0.0),
-            "line_count": ocr_result.get("line_count", 0),
-            "lines": ocr_result.get("lines", []),
-            "provider": "tesseract",
-            "metadata": {
-                **preprocessing_metadata,
-                "psm_mode": ocr_result.get("psm_mode"),
-                "word_count": ocr_result.get("word_count"),
-                "language": args.lang,
-                "target_dpi": args.target_dpi
-            }
-        }
+        cache = OCRResultCache(enabled=False if args.no_cache else None)
+        output = process_image_cached(ocr_input.cli_source(args.image_paths[0]), options, cache)
         
         # Output JSON
-        print(json.dumps(output, indent=2))
+        ocr_output.print_result(output)
         sys.exit(0)
         
     except Exception as e:
@@ -480,4 +1119,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
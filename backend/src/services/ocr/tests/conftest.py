@@ -0,0 +1,16 @@
+"""
+Unit tests for the OCR processors
+
+The processors are scripts that import their shared modules as top-level
+names (``import ocr_cache``), so the OCR directory goes on sys.path. Only
+pure-Python helpers are tested here; tests that need NumPy/OpenCV skip
+when they are missing, and no OCR engine is ever loaded.
+
+Run from backend/src/services/ocr:
+    python3 -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
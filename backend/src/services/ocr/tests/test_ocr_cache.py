@@ -0,0 +1,138 @@
+import os
+import time
+
+import pytest
+
+import ocr_cache
+from ocr_cache import OCRResultCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return OCRResultCache(cache_dir=str(tmp_path / 'cache'), max_bytes=1024 * 1024,
+                          max_age_seconds=3600, enabled=True)
+
+
+def write_entry(cache, key, result, written, read=None):
+    """put() an entry, then backdate its write time (mtime) and last read (atime)"""
+    cache.put(key, result)
+    os.utime(cache._entry_path(key), (read if read is not None else written, written))
+
+
+def test_put_then_get_round_trips(cache):
+    key = 'ab' + '0' * 62
+    cache.put(key, {"success": True, "text": "TOTAL 12.34"})
+
+    assert cache.get(key) == {"success": True, "text": "TOTAL 12.34"}
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_missing_entry_counts_a_miss(cache):
+    assert cache.get('cd' + '0' * 62) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = OCRResultCache(cache_dir=str(tmp_path / 'cache'), enabled=False)
+    cache.put('ab' + '0' * 62, {"success": True})
+
+    assert cache.get('ab' + '0' * 62) is None
+    assert not (tmp_path / 'cache').exists()
+    assert cache.stats(False)["enabled"] is False
+
+
+def test_directory_is_created_private(cache):
+    cache.put('ab' + '0' * 62, {"success": True})
+
+    assert cache.cache_dir.stat().st_mode & 0o777 == 0o700
+
+
+def test_shared_directory_disables_cache(tmp_path):
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    shared.chmod(0o777)
+    cache = OCRResultCache(cache_dir=str(shared), enabled=True)
+    cache.put('ab' + '0' * 62, {"success": True})
+
+    assert cache.get('ab' + '0' * 62) is None
+    assert list(shared.iterdir()) == []
+    assert cache.stats(False)["enabled"] is False
+
+
+def test_expired_entry_is_dropped_on_read(cache):
+    key = 'ab' + '0' * 62
+    write_entry(cache, key, {"success": True}, written=time.time() - 7200)
+
+    assert cache.get(key) is None
+    assert not cache._entry_path(key).exists()
+
+
+def test_read_keeps_write_time_for_expiry(cache):
+    key = 'ab' + '0' * 62
+    written = time.time() - 600
+    write_entry(cache, key, {"success": True}, written=written)
+
+    assert cache.get(key) is not None
+    stat = cache._entry_path(key).stat()
+    assert stat.st_mtime == pytest.approx(written)
+    assert stat.st_atime > written + 500
+
+
+def test_evict_drops_least_recently_read_first(cache):
+    now = time.time()
+    payload = {"text": "x" * 400}
+    write_entry(cache, 'aa' + '0' * 62, payload, written=now - 300, read=now - 10)  # old, read recently
+    write_entry(cache, 'bb' + '0' * 62, payload, written=now - 200)                 # never read
+    write_entry(cache, 'cc' + '0' * 62, payload, written=now - 100)
+    entry_size = cache._entry_path('aa' + '0' * 62).stat().st_size
+    cache.max_bytes = 2 * entry_size
+
+    cache.evict()
+
+    assert cache._entry_path('aa' + '0' * 62).exists()
+    assert not cache._entry_path('bb' + '0' * 62).exists()
+    assert cache._entry_path('cc' + '0' * 62).exists()
+
+
+def test_evict_drops_expired_entries_under_budget(cache):
+    write_entry(cache, 'aa' + '0' * 62, {"success": True}, written=time.time() - 7200)
+    write_entry(cache, 'bb' + '0' * 62, {"success": True}, written=time.time())
+
+    cache.evict()
+
+    assert not cache._entry_path('aa' + '0' * 62).exists()
+    assert cache._entry_path('bb' + '0' * 62).exists()
+
+
+def test_eviction_scan_is_rate_limited(cache, monkeypatch):
+    scans = []
+    monkeypatch.setattr(cache, 'evict', lambda: scans.append(True))
+
+    cache.put('aa' + '0' * 62, {"success": True})
+    cache.put('bb' + '0' * 62, {"success": True})
+    assert len(scans) == 1
+
+    marker = cache.cache_dir / '.last-evict'
+    past = time.time() - ocr_cache.EVICT_INTERVAL_SECONDS - 1
+    os.utime(marker, (past, past))
+    cache.put('cc' + '0' * 62, {"success": True})
+    assert len(scans) == 2
+
+
+def test_unserializable_result_is_not_stored(cache):
+    key = 'ab' + '0' * 62
+    cache.put(key, {"image": object()})
+
+    assert cache.get(key) is None
+    assert list(cache._entry_path(key).parent.glob('*.tmp')) == []
+
+
+def test_key_depends_on_content_and_options(cache, tmp_path):
+    image = tmp_path / 'receipt.png'
+    image.write_bytes(b'receipt bytes')
+
+    key = cache.make_key(str(image), 'tesseract', ['eng'], {"psm": 6})
+    assert key == cache.make_key(b'receipt bytes', 'tesseract', ['eng'], {"psm": 6})
+    assert key != cache.make_key(str(image), 'tesseract', ['eng'], {"psm": 4})
+    assert key != cache.make_key(b'other bytes', 'tesseract', ['eng'], {"psm": 6})
+    assert key != cache.make_key(str(image), 'easyocr', ['eng'], {"psm": 6})
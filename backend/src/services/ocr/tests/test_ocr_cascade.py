@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from ocr_cascade import DEFAULT_THRESHOLDS, OCRCascade, evaluate
+
+RECEIPT = ["ACME MARKET", "2024-03-05 12:01", "MILK 2.99", "TOTAL $12.34"]
+
+
+def result(confidence, texts=RECEIPT, line_confidence=None):
+    line_confidence = confidence if line_confidence is None else line_confidence
+    return {
+        "success": True,
+        "confidence": confidence,
+        "lines": [{"text": text, "confidence": line_confidence} for text in texts],
+    }
+
+
+@pytest.fixture
+def cascade():
+    cascade = OCRCascade.__new__(OCRCascade)
+    cascade.thresholds = dict(DEFAULT_THRESHOLDS)
+    return cascade
+
+
+def test_clean_receipt_is_accepted():
+    verdict = evaluate(result(0.9), DEFAULT_THRESHOLDS)
+
+    assert verdict["accepted"]
+    assert verdict["fields"] == {"total": True, "date": True, "merchant": True}
+
+
+def test_rejection_reasons():
+    assert evaluate({"confidence": 0.0, "lines": []}, DEFAULT_THRESHOLDS)["reasons"][0] == "no_text"
+    assert "low_confidence" in evaluate(result(0.5, line_confidence=0.9), DEFAULT_THRESHOLDS)["reasons"]
+    assert "weak_lines" in evaluate(result(0.8, line_confidence=0.4), DEFAULT_THRESHOLDS)["reasons"]
+    assert evaluate(result(0.9, RECEIPT[:3]), DEFAULT_THRESHOLDS)["reasons"] == ["no_total"]
+
+
+def test_weak_field_line_does_not_count():
+    lines = result(0.9)["lines"]
+    lines[3]["confidence"] = 0.3
+
+    verdict = evaluate({"confidence": 0.9, "lines": lines}, DEFAULT_THRESHOLDS)
+    assert "no_total" in verdict["reasons"]
+
+
+def test_more_fields_beat_higher_confidence(cascade):
+    attempts = []
+    best, accepted = cascade._consider(attempts, None, 'tesseract', result(0.7), time.perf_counter())
+    best, _ = cascade._consider(attempts, best, 'easyocr', result(0.74, RECEIPT[:2]), time.perf_counter())
+
+    assert not accepted
+    assert best[1] == 'tesseract'
+    assert [attempt["tier"] for attempt in attempts] == ['tesseract', 'easyocr']
+
+
+def test_confidence_breaks_field_ties(cascade):
+    best, _ = cascade._consider([], None, 'tesseract', result(0.6), time.perf_counter())
+    best, _ = cascade._consider([], best, 'easyocr', result(0.7), time.perf_counter())
+
+    assert best[1] == 'easyocr'
+
+
+def test_accepted_tier_wins(cascade):
+    attempts = []
+    best, _ = cascade._consider(attempts, None, 'tesseract', result(0.7), time.perf_counter())
+    best, accepted = cascade._consider(attempts, best, 'easyocr', result(0.9), time.perf_counter())
+
+    assert accepted
+    assert best[1] == 'easyocr' and best[3]
+    assert attempts[1]["accepted"] and attempts[1]["reasons"] == []
+
+
+def test_refinement_summary_moves_into_the_attempt(cascade):
+    refined = dict(result(0.9), refinement={"refined_lines": 2})
+    attempts = []
+    cascade._consider(attempts, None, 'tesseract+refine', refined, time.perf_counter())
+
+    assert attempts[0]["refined_lines"] == 2
+    assert "refinement" not in refined
@@ -0,0 +1,46 @@
+import pytest
+
+from ocr_refine import crop_box, should_refine, weak_line_indices, word_weighted_confidence
+
+
+def line(confidence, text="WORD", bbox=(10, 10, 100, 30)):
+    return {"text": text, "confidence": confidence, "bbox": list(bbox) if bbox else None}
+
+
+def test_weak_lines_are_below_the_bar_and_have_a_box():
+    lines = [line(0.9), line(0.4), line(0.59), line(0.6), line(0.2, bbox=None)]
+
+    assert weak_line_indices(lines) == [1, 2]
+    assert weak_line_indices(lines, min_line_confidence=0.95) == [0, 1, 2, 3]
+
+
+def test_refine_only_a_few_weak_lines():
+    assert not should_refine([line(0.9)] * 4)
+    assert should_refine([line(0.9)] * 3 + [line(0.3)])
+    assert should_refine([line(0.9), line(0.3)])
+
+
+def test_no_refine_when_most_lines_are_weak():
+    assert not should_refine([line(0.9)] + [line(0.3)] * 2)
+
+
+def test_no_refine_past_max_lines():
+    lines = [line(0.9)] * 20 + [line(0.3)] * 9
+
+    assert not should_refine(lines)
+    assert should_refine(lines, max_lines=9)
+
+
+def test_confidence_is_weighted_by_words():
+    lines = [line(1.0, "ACME MARKET MAIN STREET"), line(0.5, "TOTAL")]
+
+    assert word_weighted_confidence(lines) == pytest.approx((4 * 1.0 + 0.5) / 5)
+
+
+def test_empty_line_counts_once():
+    assert word_weighted_confidence([line(0.8, ""), line(0.4, "X")]) == pytest.approx(0.6)
+
+
+def test_crop_box_pads_and_clips():
+    assert crop_box([10, 20, 110, 40], (100, 100)) == [5, 100, 15, 45]
+    assert crop_box([0, 0, 1, 1], (100, 100), padding=0) is None
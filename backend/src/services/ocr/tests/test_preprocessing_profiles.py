@@ -0,0 +1,57 @@
+import pytest
+
+import ocr_preprocessing
+from ocr_preprocessing import parse_steps, profile_steps
+
+
+def test_parse_plain_steps():
+    assert parse_steps("grayscale_conversion, denoising") == ["grayscale_conversion", "denoising"]
+
+
+def test_parse_step_parameters():
+    steps = parse_steps("binary_denoising:strategy=morph:kernel=3,resize:max_dim=1500.5,deskewing:expand=false")
+
+    assert steps == [
+        ("binary_denoising", {"strategy": "morph", "kernel": 3}),
+        ("resize", {"max_dim": 1500.5}),
+        ("deskewing", {"expand": False}),
+    ]
+
+
+def test_parse_skips_empty_items():
+    assert parse_steps("grayscale_conversion,,") == ["grayscale_conversion"]
+
+
+def test_parse_rejects_parameter_without_value():
+    with pytest.raises(ValueError, match="strategy"):
+        parse_steps("binary_denoising:strategy")
+
+
+def test_profile_without_override(monkeypatch):
+    monkeypatch.delenv('OCR_PREPROCESS_EASYOCR', raising=False)
+
+    assert profile_steps("easyocr") == ocr_preprocessing.PROFILES["easyocr"]
+
+
+def test_environment_overrides_profile(monkeypatch):
+    monkeypatch.setenv('OCR_PREPROCESS_EASYOCR_PDF', "grayscale_conversion,adaptive_threshold:block_size=15")
+
+    assert profile_steps("easyocr-pdf") == ["grayscale_conversion", ("adaptive_threshold", {"block_size": 15})]
+
+
+def test_empty_override_disables_preprocessing(monkeypatch):
+    monkeypatch.setenv('OCR_PREPROCESS_PADDLEOCR', "")
+
+    assert profile_steps("paddleocr") == []
+
+
+def test_unknown_profile_raises(monkeypatch):
+    monkeypatch.delenv('OCR_PREPROCESS_NOPE', raising=False)
+
+    with pytest.raises(ValueError, match="nope"):
+        profile_steps("nope")
+
+
+def test_pipeline_rejects_unknown_step():
+    with pytest.raises(ValueError, match="Unknown preprocessing step: sepia"):
+        ocr_preprocessing.PreprocessingPipeline(["grayscale_conversion", "sepia"])
@@ -0,0 +1,94 @@
+import pytest
+
+import easyocr_processor
+from easyocr_processor import EasyOCRProcessor
+from ocr_timing import StageTimer
+
+tile_offsets = EasyOCRProcessor.tile_offsets
+merge_tiles = EasyOCRProcessor.merge_tiles
+
+
+def line(top, bottom, text, confidence=0.9, left=10, right=200):
+    """A readtext-style detection with a rectangular box"""
+    return ([[left, top], [right, top], [right, bottom], [left, bottom]], text, confidence)
+
+
+def test_short_image_is_one_tile():
+    assert tile_offsets(1000, 1280, 192) == [0]
+    assert tile_offsets(1280, 1280, 192) == [0]
+
+
+def test_tiles_step_by_height_minus_overlap():
+    assert tile_offsets(3000, 1280, 192) == [0, 1088, 1720]
+
+
+def test_last_tile_is_aligned_with_the_bottom():
+    height, tile_height = 5000, 1280
+    offsets = tile_offsets(height, tile_height, 192)
+
+    assert offsets[-1] + tile_height == height
+    assert offsets == sorted(offsets)
+    assert all(b - a <= tile_height - 192 for a, b in zip(offsets, offsets[1:]))
+
+
+def test_merge_shifts_lines_to_page_coordinates():
+    results, duplicates = merge_tiles([[line(10, 40, "A")], [line(900, 930, "B")]], [0, 1088], 1280)
+
+    assert [text for _, text, _ in results] == ["A", "B"]
+    assert results[1][0][0] == [10.0, 1988.0]
+    assert duplicates == 0
+
+
+def test_merge_keeps_a_line_in_the_overlap_once():
+    # Page rows 1100-1130 lie in both strips (offsets 0 and 1088)
+    tile_results = [[line(1100, 1130, "TOTAL 12.34", 0.8)], [line(12, 42, "TOTAL 12.34", 0.9)]]
+    results, duplicates = merge_tiles(tile_results, [0, 1088], 1280)
+
+    assert [text for _, text, _ in results] == ["TOTAL 12.34"]
+    assert duplicates == 1
+
+
+def test_merge_keeps_the_more_confident_of_two_owners():
+    # Centres either side of the band edge (1184): both strips claim the line
+    tile_results = [[line(1160, 1200, "SUBTOTAL", 0.7)], [line(90, 120, "SUBTOTAL", 0.95)]]
+    results, duplicates = merge_tiles(tile_results, [0, 1088], 1280)
+
+    assert results == [line(1178, 1208, "SUBTOTAL", 0.95)]
+    assert duplicates == 1
+
+
+def test_merge_preserves_reading_order():
+    tile_results = [
+        [line(100, 130, "MERCHANT"), line(1000, 1030, "ITEM 1")],
+        [line(300, 330, "ITEM 2"), line(1200, 1230, "TOTAL")],
+    ]
+    results, _ = merge_tiles(tile_results, [0, 1088], 1280)
+
+    assert [text for _, text, _ in results] == ["MERCHANT", "ITEM 1", "ITEM 2", "TOTAL"]
+
+
+class FakeReader:
+    """readtext() stand-in that records the strips it is given"""
+
+    def __init__(self):
+        self.calls = []
+
+    def readtext(self, image, **options):
+        self.calls.append((image.shape, options["canvas_size"]))
+        return [line(100, 140, "LINE", left=100, right=1500)]
+
+
+def test_read_tiled_caps_the_width_and_maps_boxes_back(monkeypatch):
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(easyocr_processor, 'cv2', pytest.importorskip("cv2"))
+
+    processor = EasyOCRProcessor.__new__(EasyOCRProcessor)
+    processor.reader = FakeReader()
+    image = np.zeros((12000, 3200, 3), np.uint8)
+
+    results, info = processor.read_tiled(image, StageTimer())
+
+    assert all(shape[1] == EasyOCRProcessor.TILE_MAX_WIDTH for shape, _ in processor.reader.calls)
+    assert all(canvas == EasyOCRProcessor.TILE_MAX_WIDTH for _, canvas in processor.reader.calls)
+    assert info["scale"] == 0.5
+    assert results[0][0][0] == [200.0, 200.0]
@@ -24,11 +24,18 @@ export interface OCRResult {
     pageCount?: number; // PDF: number of pages processed
     pages?: Array<{ page: number; text: string; confidence: number }>; // PDF: per-page results
     dpi?: number; // PDF: DPI used for conversion
+    pageWorkers?: number; // PDF: worker processes used for OCR'd pages
     languages?: string[]; // OCR: languages used
     // Tesseract-specific metadata
     psmMode?: number; // Tesseract: Page segmentation mode used
     skewAngle?: number; // Tesseract: Skew angle detected and corrected (degrees)
     stepsApplied?: string[]; // Tesseract: Preprocessing steps applied
+    quality?: { action: 'accept' | 'warn' | 'reject'; reasons: string[] }; // Pre-OCR image quality verdict
+    cascade?: { // Cascade: tier that answered and what each tier cost
+      tier: string | null;
+      accepted: boolean;
+      tiers: Array<{ tier: string; wall_ms?: number; accepted?: boolean; reasons?: string[]; skipped?: string; error?: string }>;
+    };
   };
 }
 
@@ -79,6 +86,8 @@ export interface UserCorrection {
 export interface OCRProvider {
   name: string;
   process(imagePath: string): Promise<OCRResult>;
+  /** Encoded image bytes, for providers that can skip the temp file */
+  processBuffer?(image: Buffer): Promise<OCRResult>;
   isAvailable(): Promise<boolean>;
 }
 
@@ -102,8 +111,8 @@ export interface LLMProvider {
 }
 
 export interface OCRServiceConfig {
-  primaryProvider: 'tesseract' | 'paddleocr' | 'easyocr';
-  fallbackProvider?: 'tesseract' | 'paddleocr' | 'easyocr';
+  primaryProvider: 'tesseract' | 'paddleocr' | 'easyocr' | 'cascade';
+  fallbackProvider?: 'tesseract' | 'paddleocr' | 'easyocr' | 'cascade';
   inferenceEngine: 'rule-based' | 'llm' | 'hybrid';
   llmProvider?: 'openai' | 'claude' | 'local' | 'ollama';
   confidenceThreshold: number; // Minimum confidence to accept OCR result